@@ -27,14 +27,12 @@ class AssignRoleByEmailRequest(BaseModel):
 async def verify_admin(current_user = Depends(get_current_user)):
     """Verify that the current user is an admin"""
     try:
-        import firebase_admin
-        from firebase_admin import db
+        from backend.firebase_repository import firebase_repository
         
         user_id = current_user.get("user_id")
         
         # Check admin role in Firebase
-        ref = db.reference(f'/user_roles/{user_id}/role')
-        role = ref.get()
+        role = await firebase_repository.get(f'/user_roles/{user_id}/role')
         
         if role != 'admin':
             raise HTTPException(status_code=403, detail="Admin access required")
@@ -79,8 +77,7 @@ async def update_user_role(
     Update a user's role by user ID (Admin only)
     """
     try:
-        import firebase_admin
-        from firebase_admin import db
+        from backend.firebase_repository import firebase_repository
         from datetime import datetime
         import time
 
@@ -88,16 +85,14 @@ async def update_user_role(
             raise HTTPException(status_code=400, detail="Invalid role. Must be: admin or user")
 
         # Update role in Firebase
-        ref = db.reference(f'/user_roles/{request.user_id}')
-        ref.set({
+        await firebase_repository.set(f'/user_roles/{request.user_id}', {
             'role': request.role,
             'assigned_by': admin_user.get('user_id'),
             'updatedAt': datetime.utcnow().isoformat()
         })
 
         # Log admin action
-        log_ref = db.reference('admin_logs')
-        log_ref.push({
+        await firebase_repository.push('admin_logs', {
             'action': 'role_assignment',
             'admin_id': admin_user.get('user_id'),
             'target_user_id': request.user_id,
@@ -128,7 +123,8 @@ async def assign_role_by_email(
     """
     try:
         import firebase_admin
-        from firebase_admin import db, auth as firebase_auth
+        from firebase_admin import auth as firebase_auth
+        from backend.firebase_repository import firebase_repository
         from datetime import datetime
         import time
 
@@ -137,7 +133,9 @@ async def assign_role_by_email(
 
         # Find user by email in Firebase Auth
         try:
-            user_record = firebase_auth.get_user_by_email(request.email)
+            user_record = await firebase_repository.run(
+                "get_user_by_email", firebase_auth.get_user_by_email, request.email
+            )
             target_user_id = user_record.uid
         except firebase_admin.auth.UserNotFoundError:
             raise HTTPException(status_code=404, detail=f"User not found with email: {request.email}")
@@ -146,8 +144,7 @@ async def assign_role_by_email(
             raise HTTPException(status_code=500, detail="Failed to find user")
 
         # Assign role in Firebase Realtime Database
-        ref = db.reference(f'/user_roles/{target_user_id}')
-        ref.set({
+        await firebase_repository.set(f'/user_roles/{target_user_id}', {
             'role': request.role,
             'email': request.email,
             'assigned_by': admin_user.get('user_id'),
@@ -155,8 +152,7 @@ async def assign_role_by_email(
         })
 
         # Log admin action
-        log_ref = db.reference('admin_logs')
-        log_ref.push({
+        await firebase_repository.push('admin_logs', {
             'action': 'role_assignment_by_email',
             'admin_id': admin_user.get('user_id'),
             'target_user_id': target_user_id,
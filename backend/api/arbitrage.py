@@ -0,0 +1,64 @@
+"""
+Arbitrage Scanner API Endpoints
+"""
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from typing import Optional, List
+import logging
+
+from backend.auth import get_current_user
+from backend.services.arbitrage_scanner import arbitrage_scanner
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/arbitrage", tags=["arbitrage"])
+
+
+class ArbitrageSymbolsRequest(BaseModel):
+    symbols: List[str]  # ['BTCUSDT', 'ETH/USDT', ...]
+
+
+async def _ensure_scanner_running():
+    if not arbitrage_scanner.is_running:
+        await arbitrage_scanner.start()
+
+
+@router.get("/opportunities")
+async def get_arbitrage_opportunities(
+    min_profit_percent: Optional[float] = None,
+    symbols: Optional[str] = None,
+    current_user = Depends(get_current_user)
+):
+    """Current cross-exchange opportunities, best first (live updates: /ws/signals)"""
+    await _ensure_scanner_running()
+
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()] if symbols else None
+    opportunities = arbitrage_scanner.get_opportunities(min_profit_percent, symbol_list)
+    return {
+        "opportunities": opportunities,
+        "count": len(opportunities),
+        "symbols": arbitrage_scanner.symbols
+    }
+
+
+@router.post("/symbols")
+async def add_arbitrage_symbols(
+    request: ArbitrageSymbolsRequest,
+    current_user = Depends(get_current_user)
+):
+    """Add symbols to the shared scan universe"""
+    if not request.symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+
+    await _ensure_scanner_running()
+    added = await arbitrage_scanner.add_symbols(request.symbols)
+    return {
+        "added": added,
+        "symbols": arbitrage_scanner.symbols,
+        "max_symbols": arbitrage_scanner.max_symbols
+    }
+
+
+@router.get("/stats")
+async def get_arbitrage_stats():
+    """Scanner and book feed statistics"""
+    return arbitrage_scanner.get_stats()
@@ -54,7 +54,7 @@ async def update_auto_trading_settings(
 
         # Check subscription plan - Auto-trading requires Pro or Enterprise
         if settings.enabled:
-            subscription = get_user_subscription(user_id)
+            subscription = await get_user_subscription(user_id)
             user_tier = subscription.get('tier', 'free') if subscription else 'free'
 
             if user_tier == 'free':
@@ -65,7 +65,7 @@ async def update_auto_trading_settings(
 
         # Validate exchange API keys exist
         if settings.enabled:
-            api_keys = get_user_api_keys(user_id, settings.exchange)
+            api_keys = await get_user_api_keys(user_id, settings.exchange)
             if not api_keys:
                 raise HTTPException(
                     status_code=400,
@@ -73,7 +73,7 @@ async def update_auto_trading_settings(
                 )
         
         # Save settings to Firebase
-        saved = save_auto_trading_settings(user_id, settings.dict())
+        saved = await save_auto_trading_settings(user_id, settings.dict())
         if not saved:
             raise HTTPException(
                 status_code=500,
@@ -116,7 +116,7 @@ async def get_auto_trading_settings(
         user_id = current_user.get('user_id') or current_user.get('id')
         
         # Get settings from Firebase
-        settings = get_auto_trading_settings(user_id)
+        settings = await get_auto_trading_settings(user_id)
         if not settings:
             raise HTTPException(
                 status_code=500,
@@ -171,7 +171,7 @@ async def get_signals_history(
         user_id = current_user.get('user_id') or current_user.get('id')
         
         # Get signals from Firebase
-        signals = get_user_signals(user_id, limit)
+        signals = await get_user_signals(user_id, limit)
         
         return {
             "signals": signals,
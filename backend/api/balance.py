@@ -5,7 +5,8 @@ from typing import Optional
 import logging
 
 from backend.firebase_admin import get_user_api_keys
-from backend.services.unified_exchange import unified_exchange, ExchangeError, AuthenticationError
+from backend.services.unified_exchange import ExchangeError, AuthenticationError
+from backend.services.account_state import account_state
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -75,7 +76,7 @@ async def get_exchange_balance(
 
         logger.info(f"Balance request for {exchange} from user {user_id}")
 
-        api_keys = get_user_api_keys(user_id, exchange)
+        api_keys = await get_user_api_keys(user_id, exchange)
         if not api_keys:
             raise HTTPException(
                 status_code=404,
@@ -92,11 +93,12 @@ async def get_exchange_balance(
                 detail=f"Incomplete API credentials for {exchange}"
             )
 
-        # Use unified exchange service
-        balance = await unified_exchange.get_balance(
-            exchange=exchange,
-            api_key=api_key,
-            api_secret=api_secret,
+        # Shared per-user state: concurrent/polling requests reuse one exchange call
+        balance = await account_state.get_balance(
+            user_id,
+            exchange,
+            api_key,
+            api_secret,
             is_futures=is_futures,
             passphrase=passphrase
         )
@@ -10,6 +10,7 @@ import logging
 
 from backend.auth import get_current_user
 from backend.firebase_admin import get_user_api_keys, get_all_user_exchanges
+from backend.services.account_state import account_state
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/integrations", tags=["integrations"])
@@ -19,10 +20,13 @@ async def check_exchange_health(
     exchange: str,
     api_key: str,
     api_secret: str,
-    passphrase: str = ""
+    passphrase: str = "",
+    user_id: str = None
 ) -> Dict:
     """
     Check health of a single exchange connection
+    With a user_id the balance read goes through the shared account state
+    cache, so a dashboard poll does not add a signed request per exchange.
     Returns: {exchange, connected, last_ping, error}
     """
     result = {
@@ -36,7 +40,10 @@ async def check_exchange_health(
     try:
         start_time = datetime.utcnow()
 
-        if exchange == "binance":
+        if user_id and exchange in ("binance", "bybit", "okx", "kucoin", "mexc"):
+            await account_state.get_balance(user_id, exchange, api_key, api_secret, True, passphrase)
+
+        elif exchange == "binance":
             from backend.services import binance_service
             # Try to fetch server time (lightweight endpoint)
             await binance_service.get_balance(api_key, api_secret, is_futures=True)
@@ -106,7 +113,7 @@ async def get_integrations_health(current_user: dict = Depends(get_current_user)
         user_id = current_user.get("user_id") or current_user.get("id")
 
         # Get all user's exchanges from Firebase
-        user_exchanges = get_all_user_exchanges(user_id)
+        user_exchanges = await get_all_user_exchanges(user_id)
 
         if not user_exchanges:
             return {
@@ -127,7 +134,7 @@ async def get_integrations_health(current_user: dict = Depends(get_current_user)
             exchange_name = exchange_data["id"]
 
             # Get API keys from Firebase
-            api_keys = get_user_api_keys(user_id, exchange_name)
+            api_keys = await get_user_api_keys(user_id, exchange_name)
 
             if api_keys:
                 health_checks.append(
@@ -135,7 +142,8 @@ async def get_integrations_health(current_user: dict = Depends(get_current_user)
                         exchange_name,
                         api_keys.get("api_key", ""),
                         api_keys.get("api_secret", ""),
-                        api_keys.get("passphrase", "")
+                        api_keys.get("passphrase", ""),
+                        user_id
                     )
                 )
 
@@ -190,7 +198,7 @@ async def get_single_exchange_health(
         exchange = exchange.lower()
 
         # Get API keys from Firebase
-        api_keys = get_user_api_keys(user_id, exchange)
+        api_keys = await get_user_api_keys(user_id, exchange)
 
         if not api_keys:
             raise HTTPException(
@@ -203,7 +211,8 @@ async def get_single_exchange_health(
             exchange,
             api_keys.get("api_key", ""),
             api_keys.get("api_secret", ""),
-            api_keys.get("passphrase", "")
+            api_keys.get("passphrase", ""),
+            user_id
         )
 
         return result
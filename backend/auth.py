@@ -94,7 +94,7 @@ async def get_user_plan(user_id: str) -> str:
     """
     try:
         import firebase_admin
-        from firebase_admin import db
+        from backend.firebase_repository import firebase_repository
         
         # Initialize Firebase Admin if not already done
         try:
@@ -124,8 +124,7 @@ async def get_user_plan(user_id: str) -> str:
             })
         
         # Get subscription from Firebase
-        ref = db.reference(f'/user_subscriptions/{user_id}')
-        subscription = ref.get()
+        subscription = await firebase_repository.get(f'/user_subscriptions/{user_id}')
         
         if subscription and isinstance(subscription, dict):
             return subscription.get('tier', 'free')
@@ -168,7 +167,7 @@ async def set_user_plan(user_id: str, plan: str) -> dict:
     """
     try:
         import firebase_admin
-        from firebase_admin import db
+        from backend.firebase_repository import firebase_repository
         
         if plan not in ['free', 'pro', 'enterprise']:
             raise ValueError("Invalid plan. Must be: free, pro, or enterprise")
@@ -180,7 +179,6 @@ async def set_user_plan(user_id: str, plan: str) -> dict:
             return {"success": False, "error": "Firebase not initialized"}
         
         # Set subscription in Firebase
-        ref = db.reference(f'/user_subscriptions/{user_id}')
         subscription_data = {
             'tier': plan,
             'startDate': datetime.utcnow().isoformat(),
@@ -192,7 +190,7 @@ async def set_user_plan(user_id: str, plan: str) -> dict:
             expiration = datetime.utcnow() + timedelta(days=30)
             subscription_data['endDate'] = expiration.isoformat()
         
-        ref.set(subscription_data)
+        await firebase_repository.set(f'/user_subscriptions/{user_id}', subscription_data)
         
         return {
             "success": True,
@@ -8,6 +8,7 @@ from typing import Optional, Dict, List
 from .config import settings
 from .trading_strategy import create_strategy_for_timeframe
 from .binance_client import BinanceClient
+from .services.rate_limiter import RequestPriority
 from .utils.logger import get_logger
 
 logger = get_logger("bot_core")
@@ -79,6 +80,7 @@ class BotCore:
         
         # Trading data
         self.klines_data = []
+        self.max_klines = 50
         self.current_price = None
         self.symbol_validated = False
         self.min_notional = 5.0
@@ -95,8 +97,10 @@ class BotCore:
         # 🎯 SIMPLE Rate Limiting
         self._stop_requested = False
         self._monitor_task = None
-        self._candle_watch_task = None
-        self._price_callback_task = None
+        self._price_feed_subscribed = False
+        self._price_subscription = None
+        self._candles_subscribed = False
+        self.price_stale_after = 60  # Bu süre tick gelmezse REST fallback
         
         # Trading controls
         self.last_trade_time = 0
@@ -107,14 +111,20 @@ class BotCore:
         # ✅ SIMPLE API RATE LIMITING
         self.last_api_call = 0
         self.api_call_interval = 15       # 15 saniye
-        self.last_kline_fetch = 0
-        self.kline_fetch_interval = 300   # 5 dakika (EMA için yeterli)
         
         # Performance tracking
         self.trade_history = []
         self.signal_history = []
         self._last_price_update = 0
         
+        # 📡 Status streaming (user:<uid> kanalı) + Firebase snapshot
+        self.status_push_interval = settings.BOT_STATUS_PUSH_INTERVAL
+        self.snapshot_interval = settings.BOT_FIREBASE_SNAPSHOT_INTERVAL
+        self._published_status = {}
+        self._last_status_push = 0
+        self._status_push_task = None
+        self._last_snapshot_time = 0
+        
         # 🕐 SIMPLE CANDLE TIMING
         self.last_candle_time = 0
         self.timeframe_seconds = self._get_timeframe_seconds(timeframe)
@@ -176,6 +186,7 @@ class BotCore:
             
             self.status["status_message"] = f"🎯 Simple EMA Bot aktif - {self.status['symbol']} ({self.status['timeframe']}) - {mode_text}"
             self._initialized = True
+            await self._publish_status(force=True)
             logger.info(f"🎯 Simple EMA bot started for user {self.user_id}")
             
         except Exception as e:
@@ -183,6 +194,7 @@ class BotCore:
             logger.error(f"❌ Simple EMA bot start failed for user {self.user_id}: {e}")
             self.status["status_message"] = error_msg
             self.status["is_running"] = False
+            await self._release_market_data()
             await self.stop()
 
     async def _check_balance_sufficient(self) -> bool:
@@ -238,8 +250,9 @@ class BotCore:
             self.status["is_running"] = False
             self.status["status_message"] = f"💰 Bot durduruldu: Yetersiz bakiye ({self.status['account_balance']:.2f} USDT < {self.min_balance_usdt} USDT)"
             
-            # Firebase güncelle
-            await self._update_user_data()
+            # Firebase snapshot + canlı durum
+            await self._update_user_data(force=True)
+            await self._publish_status(force=True)
             
             # Bot'u tamamen durdur
             await self.stop()
@@ -263,6 +276,7 @@ class BotCore:
         """🔌 WebSocket subscription"""
         try:
             await self.binance_client.subscribe_to_symbol(self.status["symbol"])
+            self._price_feed_subscribed = True
             logger.info(f"✅ WebSocket subscribed for {self.status['symbol']} - user {self.user_id}")
         except Exception as e:
             logger.error(f"❌ WebSocket subscription failed: {e}")
@@ -313,25 +327,24 @@ class BotCore:
             logger.warning(f"Position check failed: {e}")
 
     async def _load_initial_data(self):
-        """📊 Initial data loading - Simple EMA için"""
+        """📊 Initial data loading - Simple EMA için (shared candle store)"""
         try:
-            # EMA21 için en az 25 mum gerekli
-            required_klines = 30
-            
-            klines = await self.binance_client.get_historical_klines(
-                self.status["symbol"], 
-                self.status["timeframe"], 
-                limit=required_klines
+            # Candle store'a abone ol - seed REST ile bir kez, sonrası kline stream
+            klines = await self.binance_client.subscribe_to_candles(
+                self.status["symbol"],
+                self.status["timeframe"],
+                self._on_candle_closed
             )
+            self._candles_subscribed = True
             
+            # EMA21 için en az 25 mum gerekli
             if klines and len(klines) > 25:
-                self.klines_data = klines
+                self.klines_data = klines[-self.max_klines:]
                 signal = self.simple_ema_strategy.analyze_klines(self.klines_data)
                 self.status["last_signal"] = signal
                 
                 # Son mum zamanını kaydet
-                if klines:
-                    self.last_candle_time = int(klines[-1][0])
+                self.last_candle_time = int(klines[-1][0])
                 
                 logger.info(f"✅ Simple EMA data loaded: {len(klines)} candles, signal: {signal}")
             else:
@@ -342,129 +355,100 @@ class BotCore:
 
     async def _start_simple_components(self):
         """🎯 Simple components başlatma"""
-        # 1. Price monitoring
-        self._price_callback_task = asyncio.create_task(self._simple_price_monitoring())
+        # 1. Price monitoring (push - WebSocket tick'leri)
+        self._price_subscription = self.binance_client.price_manager.add_price_listener(
+            self.status["symbol"], self._on_price_tick
+        )
         
-        # 2. Candle monitoring
-        self._candle_watch_task = asyncio.create_task(self._simple_candle_monitor())
+        # 2. Candle monitoring - candle store "candle closed" event'leri (_on_candle_closed)
         
         # 3. General monitoring (balance check included)
         self._monitor_task = asyncio.create_task(self._simple_monitor_loop())
         
         logger.info(f"🎯 Simple components started for user {self.user_id}")
 
-    async def _simple_price_monitoring(self):
-        """🎯 Simple price monitoring"""
-        logger.info(f"🎯 Simple price monitoring started for user {self.user_id}")
+    async def _on_price_tick(self, symbol: str, price: float):
+        """⚡ WebSocket tick - PnL + TP/SL her fiyat değişiminde"""
+        if self._stop_requested or not self.status["is_running"]:
+            return
         
-        while not self._stop_requested and self.status["is_running"]:
-            try:
-                # WebSocket fiyat al
-                current_price = await self.binance_client.get_market_price(self.status["symbol"])
+        try:
+            if price and price != self.current_price:
+                self.current_price = price
+                self.status["current_price"] = price
+                self._last_price_update = time.time()
                 
-                if current_price and current_price != self.current_price:
-                    self.current_price = current_price
-                    self.status["current_price"] = current_price
-                    self._last_price_update = time.time()
-                    
-                    # Real-time PnL calculation
-                    if self.status["position_side"] and self.status["entry_price"]:
-                        await self._calculate_realtime_pnl()
-                    
-                    # Exit conditions check
-                    if self.status["position_side"]:
-                        await self._check_exit_conditions()
+                # Real-time PnL calculation
+                if self.status["position_side"] and self.status["entry_price"]:
+                    await self._calculate_realtime_pnl()
                 
-                # 10 saniyede bir kontrol
-                await asyncio.sleep(10)
+                # Exit conditions check
+                if self.status["position_side"]:
+                    await self._check_exit_conditions()
                 
-            except Exception as e:
-                logger.error(f"❌ Simple price monitoring error: {e}")
-                await asyncio.sleep(20)
+                # 📡 PnL/fiyat delta'sı (throttled)
+                await self._publish_status()
+                    
+        except Exception as e:
+            logger.error(f"❌ Price tick handling error: {e}")
 
-    async def _simple_candle_monitor(self):
-        """🎯 Simple candle monitor - EMA için"""
-        logger.info(f"🎯 Simple candle monitor started for {self.status['timeframe']}")
+    async def _price_feed_fallback(self):
+        """🛟 WebSocket tick gelmiyorsa REST ile fiyat al"""
+        if time.time() - self._last_price_update < self.price_stale_after:
+            return
         
-        while not self._stop_requested and self.status["is_running"]:
-            try:
-                current_time = int(time.time() * 1000)
-                
-                # Bir sonraki mum kapanışını hesapla
-                next_candle_close = self._calculate_next_candle_close(current_time)
-                wait_time = (next_candle_close - current_time) / 1000
-                
-                # En fazla 30 dakika bekle
-                wait_time = min(max(wait_time, 10), 1800)
-                
-                logger.info(f"⏰ Simple: Waiting {wait_time:.0f}s for next {self.status['timeframe']} candle")
-                await asyncio.sleep(wait_time)
-                
-                # Rate limit kontrolü
-                current_time = time.time()
-                if current_time - self.last_kline_fetch < self.kline_fetch_interval:
-                    continue
-                
-                # Yeni mum verisi al
-                await self._fetch_simple_candle_data()
-                self.last_kline_fetch = current_time
-                
-            except Exception as e:
-                logger.error(f"❌ Simple candle monitor error: {e}")
-                await asyncio.sleep(30)
-
-    def _calculate_next_candle_close(self, current_time_ms: int) -> int:
-        """Bir sonraki mum kapanışını hesapla"""
         try:
-            timeframe_ms = self.timeframe_seconds * 1000
-            current_candle_start = (current_time_ms // timeframe_ms) * timeframe_ms
-            next_candle_start = current_candle_start + timeframe_ms
-            return next_candle_start
+            current_price = await self.binance_client.get_market_price(self.status["symbol"])
+            if current_price:
+                logger.warning(f"⚠️ No price ticks for {self.status['symbol']} - REST fallback used")
+                await self._on_price_tick(self.status["symbol"], current_price)
         except Exception as e:
-            logger.error(f"Next candle calculation error: {e}")
-            return current_time_ms + (self.timeframe_seconds * 1000)
+            logger.error(f"❌ Price fallback error: {e}")
 
-    async def _fetch_simple_candle_data(self):
-        """🎯 Simple candle fetch - EMA için"""
+    async def _on_candle_closed(self, symbol: str, interval: str, candle: list):
+        """🕯️ Candle store event - mum kapandı"""
+        if self._stop_requested or not self.status["is_running"]:
+            return
+        
         try:
-            logger.info(f"🎯 Simple {self.status['timeframe']} candle fetch for user {self.user_id}")
+            candle_time = int(candle[0])
+            if candle_time < self.last_candle_time:
+                return
             
-            # Son 2 mumu al
-            recent_klines = await self.binance_client.get_historical_klines(
-                self.status["symbol"],
-                self.status["timeframe"],
-                limit=2
-            )
+            # Paylaşılan buffer'dan son mumları al (kapanmış mum dahil)
+            self.klines_data = self.binance_client.get_cached_candles(symbol, interval)[-self.max_klines:]
+            self.last_candle_time = candle_time
             
-            if not recent_klines or len(recent_klines) < 1:
-                logger.warning(f"No kline data received")
-                return
+            close_price = float(candle[4])
+            logger.info(f"📊 NEW Simple {interval} candle: ${close_price:.2f}")
             
-            latest_kline = recent_klines[-1]
-            new_candle_time = int(latest_kline[0])
+            # 📈 SIMPLE EMA SİNYAL KONTROL ET
+            await self._analyze_and_execute_simple_signal()
             
-            # Yeni mum mu kontrol et
-            if new_candle_time > self.last_candle_time:
-                # Yeni mum - ekle
-                if len(self.klines_data) >= 50:
-                    self.klines_data.pop(0)
-                
-                self.klines_data.append(latest_kline)
-                self.last_candle_time = new_candle_time
-                
-                close_price = float(latest_kline[4])
-                logger.info(f"📊 NEW Simple {self.status['timeframe']} candle: ${close_price:.2f}")
-                
-                # 📈 SIMPLE EMA SİNYAL KONTROL ET
-                await self._analyze_and_execute_simple_signal()
-                
-            else:
-                # Aynı mum - güncelle
-                if self.klines_data:
-                    self.klines_data[-1] = latest_kline
-                    
         except Exception as e:
-            logger.error(f"❌ Simple candle fetch error: {e}")
+            logger.error(f"❌ Candle close handling error: {e}")
+
+    async def _release_market_data(self):
+        """🔌 Paylaşılan price/candle stream aboneliklerini bırak"""
+        if self._price_subscription:
+            self.binance_client.price_manager.remove_price_listener(self._price_subscription)
+            self._price_subscription = None
+        
+        if self._candles_subscribed:
+            try:
+                await self.binance_client.unsubscribe_from_candles(
+                    self.status["symbol"], self.status["timeframe"], self._on_candle_closed
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Candle unsubscribe failed for {self.user_id}: {e}")
+            self._candles_subscribed = False
+        
+        if self._price_feed_subscribed:
+            try:
+                await self.binance_client.unsubscribe_from_symbol(self.status["symbol"])
+            except Exception as e:
+                logger.warning(f"⚠️ Price feed unsubscribe failed for {self.user_id}: {e}")
+            self._price_feed_subscribed = False
 
     async def _analyze_and_execute_simple_signal(self):
         """🎯 Simple EMA sinyal analizi"""
@@ -480,6 +464,7 @@ class BotCore:
             if new_signal != old_signal:
                 logger.info(f"🎯 SIMPLE EMA SIGNAL CHANGE for user {self.user_id}: {old_signal} -> {new_signal}")
                 self.status["last_signal"] = new_signal
+                await self._publish_status(force=True)
                 
                 # 🎯 Simple trading action
                 await self._execute_simple_signal_action(new_signal)
@@ -575,7 +560,9 @@ class BotCore:
             await asyncio.sleep(0.5)
             
             # 🔥 YENİ: Güncel bakiyeyi al
-            current_balance = await self.binance_client.get_account_balance(use_cache=False)
+            current_balance = await self.binance_client.get_account_balance(
+                use_cache=False, priority=RequestPriority.EXECUTION
+            )
             logger.info(f"💰 Current balance: {current_balance:.2f} USDT")
             
             # 🔥 YENİ: Dinamik order size hesapla
@@ -633,6 +620,7 @@ class BotCore:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 })
                 
+                await self._on_position_changed()
                 logger.info(f"🎯 Simple position opened: {signal}")
                 return True
             else:
@@ -651,7 +639,7 @@ class BotCore:
         try:
             # Main market order
             logger.info(f"Creating Simple market order: {symbol} {side} {quantity}")
-            await self.binance_client.rate_limiter.wait_if_needed('order', self.user_id)
+            await self.binance_client.rate_limiter.wait_if_needed('order', self.user_id, self.binance_client.client)
             
             main_order = await self.binance_client.client.futures_create_order(
                 symbol=symbol,
@@ -661,6 +649,7 @@ class BotCore:
             )
             
             logger.info(f"🎯 Simple market order successful: {symbol} {side} {quantity}")
+            self.binance_client.invalidate_account_state()
             
             # Calculate CUSTOM TP/SL prices
             if side == 'BUY':  # Long
@@ -677,7 +666,7 @@ class BotCore:
             
             # Stop Loss
             try:
-                await self.binance_client.rate_limiter.wait_if_needed('order', self.user_id)
+                await self.binance_client.rate_limiter.wait_if_needed('order', self.user_id, self.binance_client.client)
                 sl_order = await self.binance_client.client.futures_create_order(
                     symbol=symbol,
                     side=opposite_side,
@@ -693,7 +682,7 @@ class BotCore:
             
             # Take Profit
             try:
-                await self.binance_client.rate_limiter.wait_if_needed('order', self.user_id)
+                await self.binance_client.rate_limiter.wait_if_needed('order', self.user_id, self.binance_client.client)
                 tp_order = await self.binance_client.client.futures_create_order(
                     symbol=symbol,
                     side=opposite_side,
@@ -735,10 +724,13 @@ class BotCore:
                 
             logger.info(f"🔚 Simple closing {self.status['position_side']} position - Reason: {reason}")
             
-            # Get current position
-            open_positions = await self.binance_client.get_open_positions(self.status["symbol"], use_cache=False)
+            # Get current position (emir akışının parçası - polling'in önünde)
+            open_positions = await self.binance_client.get_open_positions(
+                self.status["symbol"], use_cache=False, priority=RequestPriority.EXECUTION
+            )
             if not open_positions:
                 self.status["position_side"] = None
+                await self._on_position_changed()
                 return True
             
             position = open_positions[0]
@@ -746,6 +738,7 @@ class BotCore:
             
             if abs(position_amt) == 0:
                 self.status["position_side"] = None
+                await self._on_position_changed()
                 return True
             
             # Close position
@@ -759,7 +752,9 @@ class BotCore:
             
             if close_result:
                 # Calculate PnL
-                pnl = await self.binance_client.get_last_trade_pnl(self.status["symbol"])
+                pnl = await self.binance_client.get_last_trade_pnl(
+                    self.status["symbol"], close_result.get("orderId")
+                )
                 
                 # Update status
                 self.status.update({
@@ -787,6 +782,7 @@ class BotCore:
                     "timestamp": datetime.now(timezone.utc).isoformat()
                 })
                 
+                await self._on_position_changed()
                 logger.info(f"🎯 Simple position closed - PnL: ${pnl:.2f}")
                 return True
             else:
@@ -863,13 +859,17 @@ class BotCore:
         """🎯 Simple monitoring loop - BALANCE CHECK INCLUDED"""
         while not self._stop_requested and self.status["is_running"]:
             try:
+                # WebSocket sessizse fiyatı REST'ten al
+                await self._price_feed_fallback()
+                
                 # 💰 BAKİYE KONTROLÜ - Her 2 dakikada bir
                 await self._check_balance_sufficient()
                 
                 # Update status message
                 await self._update_simple_status_message()
+                await self._publish_status()
                 
-                # Update Firebase
+                # Firebase snapshot (BOT_FIREBASE_SNAPSHOT_INTERVAL'de bir)
                 await self._update_user_data()
                 
                 self.status["last_check_time"] = datetime.now(timezone.utc).isoformat()
@@ -889,8 +889,11 @@ class BotCore:
         logger.info(f"🛑 Stopping Simple bot for user {self.user_id}")
         self._stop_requested = True
         
+        # Shared stream listener cleanup
+        await self._release_market_data()
+        
         # Task cleanup
-        tasks = [self._monitor_task, self._candle_watch_task, self._price_callback_task]
+        tasks = [self._monitor_task, self._status_push_task]
         for task in tasks:
             if task and not task.done():
                 task.cancel()
@@ -910,9 +913,59 @@ class BotCore:
             "status_message": "🎯 Simple Bot durduruldu.",
             "last_check_time": datetime.now(timezone.utc).isoformat()
         })
+        await self._publish_status(force=True)
         
         logger.info(f"✅ Simple bot stopped for user {self.user_id}")
 
+    # 📡 Real-time status streaming
+    async def _publish_status(self, force: bool = False):
+        """
+        📡 Status delta'sını user:<uid> WebSocket kanalına gönder
+        - Sadece değişen alanlar gönderilir ("full": True ilk mesajda)
+        - PnL tick'leri BOT_STATUS_PUSH_INTERVAL ile birleştirilir
+        - force=True: pozisyon/sinyal değişimi, hemen gönder
+        """
+        now = time.time()
+        wait = self.status_push_interval - (now - self._last_status_push)
+        if not force and wait > 0:
+            # Tick burst'ünün son durumu aralık dolunca bir kez gönderilir
+            if self._status_push_task is None or self._status_push_task.done():
+                self._status_push_task = asyncio.create_task(self._delayed_status_push(wait))
+            return
+        
+        try:
+            status = self.get_status()
+            delta = {
+                key: value for key, value in status.items()
+                if key not in self._published_status or self._published_status[key] != value
+            }
+            if not delta:
+                return
+            
+            full = not self._published_status
+            self._published_status = status
+            self._last_status_push = now
+            
+            from .websocket_manager import connection_manager
+            await connection_manager.send_to_user(self.user_id, {
+                "type": "bot_status",
+                "data": delta,
+                "full": full,
+                "timestamp": int(now * 1000)
+            })
+            
+        except Exception as e:
+            logger.error(f"❌ Status push error for user {self.user_id}: {e}")
+
+    async def _delayed_status_push(self, delay: float):
+        await asyncio.sleep(delay)
+        await self._publish_status()
+
+    async def _on_position_changed(self):
+        """Pozisyon açıldı/kapandı: canlı durum + Firebase snapshot hemen"""
+        await self._publish_status(force=True)
+        await self._update_user_data(force=True)
+
     # Helper methods
     async def _update_simple_status_message(self):
         """🎯 Simple status message"""
@@ -937,10 +990,14 @@ class BotCore:
         except Exception as e:
             logger.error(f"❌ Simple status update error: {e}")
 
-    async def _update_user_data(self):
-        """🔥 Simple Firebase user data update"""
+    async def _update_user_data(self, force: bool = False):
+        """🔥 Firebase users/{uid} snapshot - canlı durum WebSocket'ten gider"""
+        if not force and time.time() - self._last_snapshot_time < self.snapshot_interval:
+            return
+        
         try:
             from app.main import firebase_db, firebase_initialized
+            from .firebase_batcher import firebase_batcher
             
             if firebase_initialized and firebase_db:
                 user_update = {
@@ -965,8 +1022,9 @@ class BotCore:
                     "last_bot_update": int(time.time() * 1000)
                 }
                 
-                user_ref = firebase_db.reference(f'users/{self.user_id}')
-                user_ref.update(user_update)
+                # Pozisyon değişimi/stop hemen, periyodik snapshot batch ile
+                firebase_batcher.update(f'users/{self.user_id}', user_update, critical=force)
+                self._last_snapshot_time = time.time()
             
         except Exception as e:
             logger.error(f"❌ Simple user data update error: {e}")
@@ -975,6 +1033,8 @@ class BotCore:
         """📝 Simple Trade logging"""
         try:
             from app.main import firebase_db, firebase_initialized
+            from .firebase_batcher import firebase_batcher
+            from .ledger import ledger_path
             
             if firebase_initialized and firebase_db:
                 trade_log = {
@@ -988,8 +1048,8 @@ class BotCore:
                     **trade_data
                 }
                 
-                trades_ref = firebase_db.reference('trades')
-                trades_ref.push(trade_log)
+                # Kullanıcı/ay bazlı ledger: ledgers/{uid}/trades/{YYYY-MM}
+                firebase_batcher.push(ledger_path(self.user_id, 'trades'), trade_log, critical=True)
                 
                 self.trade_history.append(trade_log)
                 if len(self.trade_history) > 100:
@@ -4,6 +4,7 @@ import time
 from typing import Dict, Optional
 from collections import defaultdict
 from app.bot_core import BotCore
+from app.firebase_batcher import firebase_batcher
 from app.utils.logger import get_logger
 from app.utils.crypto import decrypt_data
 from pydantic import BaseModel, Field, validator
@@ -50,49 +51,6 @@ class StartRequest(BaseModel):
             }
         }
 
-class BatchFirebaseUpdater:
-    """Firebase batch updates - Performance için"""
-    def __init__(self):
-        self.pending_updates: Dict[str, dict] = {}
-        self.last_batch_time = 0
-        self.batch_interval = 180
-
-    def queue_update(self, user_id: str, update_data: dict):
-        """Update'i queue'ya ekle"""
-        if user_id not in self.pending_updates:
-            self.pending_updates[user_id] = {}
-        self.pending_updates[user_id].update(update_data)
-
-    async def flush_if_needed(self):
-        """Gerekirse batch'i flush et"""
-        current_time = time.time()
-        if current_time - self.last_batch_time > self.batch_interval:
-            await self.flush_all()
-
-    async def flush_all(self):
-        """Tüm pending updates'i batch olarak gönder"""
-        if not self.pending_updates:
-            return
-
-        try:
-            from app.main import firebase_db, firebase_initialized
-            
-            if firebase_initialized and firebase_db:
-                updates = {}
-                for user_id, user_data in self.pending_updates.items():
-                    for key, value in user_data.items():
-                        updates[f'users/{user_id}/{key}'] = value
-
-                if updates:
-                    firebase_db.reference().update(updates)
-                    logger.info(f"Batch Firebase update: {len(self.pending_updates)} users updated")
-
-                self.pending_updates.clear()
-                self.last_batch_time = time.time()
-
-        except Exception as e:
-            logger.error(f"Batch Firebase update error: {e}")
-
 class RateLimitTracker:
     """Rate limiting tracking"""
     def __init__(self):
@@ -128,7 +86,8 @@ class SimpleBotManager:
         self.active_users: Dict[str, dict] = {}
         self.user_statuses: Dict[str, dict] = {}
         
-        self.firebase_batcher = BatchFirebaseUpdater()
+        # Ortak write-behind batcher (users/{uid} alanları path bazında birleşir)
+        self.firebase_batcher = firebase_batcher
         self.rate_limiter = RateLimitTracker()
         
         self._monitor_task = None
@@ -164,12 +123,12 @@ class SimpleBotManager:
             # Firebase'den kullanıcı verilerini al
             try:
                 from app.main import firebase_db, firebase_initialized
+                from app.firebase_repository import firebase_repository
                 
                 if not firebase_initialized or not firebase_db:
                     return {"error": "Database service unavailable"}
                 
-                user_ref = firebase_db.reference(f'users/{uid}')
-                user_data = user_ref.get()
+                user_data = await firebase_repository.get(f'users/{uid}')
                 
                 if not user_data:
                     return {"error": "Kullanıcı verisi bulunamadı."}
@@ -201,14 +160,9 @@ class SimpleBotManager:
                 try:
                     from app.binance_client import BinanceClient
                     
-                    # Geçici client ile bakiye kontrolü
-                    temp_client = BinanceClient(api_key, api_secret, f"{uid}_balance_check")
-                    await temp_client.initialize()
-                    
-                    balance_info = await temp_client.get_balance_with_status()
-                    current_balance = balance_info["balance"]
-                    
-                    await temp_client.close()
+                    # Paylaşılan hesap durumu - botun ağı (testnet/mainnet) ve bakiye kaydıyla aynı (geçici client yok)
+                    balance = await BinanceClient.get_shared_balance(uid, api_key, api_secret)
+                    current_balance = balance["total"]
                     
                     logger.info(f"💰 Pre-start balance check: {current_balance:.2f} USDT")
                     
@@ -416,9 +370,6 @@ class SimpleBotManager:
                     except Exception as e:
                         logger.error(f"❌ Monitor error for user {uid}: {e}")
 
-                # Firebase batch flush
-                await self.firebase_batcher.flush_if_needed()
-
                 await asyncio.sleep(30)
 
             except Exception as e:
@@ -501,7 +452,7 @@ class SimpleBotManager:
                 "balance_monitoring_active": True,
                 "last_bot_update": int(time.time() * 1000)
             }
-            self.firebase_batcher.queue_update(uid, update_data)
+            self.firebase_batcher.update(f'users/{uid}', update_data)
 
     async def shutdown_all_bots(self):
         """Tüm botları durdur"""
@@ -520,7 +471,7 @@ class SimpleBotManager:
                     logger.error(f"❌ Error stopping BotCore for user {uid}: {e}")
             
             self.bot_instances.clear()
-            await self.firebase_batcher.flush_all()
+            await self.firebase_batcher.flush()
             self.active_users.clear()
             self.user_statuses.clear()
             
@@ -85,6 +85,17 @@ class Settings:
     # Firebase batch updates - 3 minutes (reduces Firebase costs by 6x)
     FIREBASE_BATCH_INTERVAL: int = int(os.getenv("FIREBASE_BATCH_INTERVAL", "180"))  # 3 minutes
     
+    # Firebase RTDB calls run on a bounded thread pool, never on the event loop
+    FIREBASE_MAX_WORKERS: int = int(os.getenv("FIREBASE_MAX_WORKERS", "16"))
+    FIREBASE_TIMEOUT: float = float(os.getenv("FIREBASE_TIMEOUT", "10"))
+    # Write-behind batcher also flushes once this many paths are queued
+    FIREBASE_BATCH_MAX_PATHS: int = int(os.getenv("FIREBASE_BATCH_MAX_PATHS", "500"))
+    # /api/bot/transactions page size (default / cap)
+    TRADE_HISTORY_PAGE_SIZE: int = int(os.getenv("TRADE_HISTORY_PAGE_SIZE", "50"))
+    TRADE_HISTORY_MAX_PAGE_SIZE: int = int(os.getenv("TRADE_HISTORY_MAX_PAGE_SIZE", "200"))
+    # Also read the legacy global trades/signals nodes until scripts/migrate_ledger.py has run
+    LEDGER_LEGACY_READS: bool = os.getenv("LEDGER_LEGACY_READS", "True").lower() == "true"
+    
     # Global monitor cycle - 30 seconds (internal loop)
     MONITOR_CYCLE_INTERVAL: int = int(os.getenv("MONITOR_CYCLE_INTERVAL", "30"))     # 30 seconds
     
@@ -100,18 +111,99 @@ class Settings:
     # Max shared clients before forced cleanup
     MAX_SHARED_CLIENTS: int = int(os.getenv("MAX_SHARED_CLIENTS", "50"))
     
+    # Idle pooled clients are pinged before reuse at most this often
+    CLIENT_HEALTH_CHECK_INTERVAL: int = int(os.getenv("CLIENT_HEALTH_CHECK_INTERVAL", "60"))
+    
+    # futures_exchange_info shared by all bots
+    EXCHANGE_INFO_CACHE_TTL: int = int(os.getenv("EXCHANGE_INFO_CACHE_TTL", "3600"))  # 1 hour
+    
     # --- WebSocket Settings (Shared) ---
     WEBSOCKET_PING_INTERVAL: int = int(os.getenv("WEBSOCKET_PING_INTERVAL", "30"))
     WEBSOCKET_PING_TIMEOUT: int = int(os.getenv("WEBSOCKET_PING_TIMEOUT", "15"))
     WEBSOCKET_CLOSE_TIMEOUT: int = int(os.getenv("WEBSOCKET_CLOSE_TIMEOUT", "10"))
     WEBSOCKET_MAX_RECONNECTS: int = int(os.getenv("WEBSOCKET_MAX_RECONNECTS", "10"))
     WEBSOCKET_RECONNECT_DELAY: int = int(os.getenv("WEBSOCKET_RECONNECT_DELAY", "5"))
+    WEBSOCKET_RECONNECT_MAX_DELAY: int = int(os.getenv("WEBSOCKET_RECONNECT_MAX_DELAY", "60"))
+    
+    # --- Client WebSocket (/ws/signals) ---
+    # Outbound messages buffered per client before the oldest are dropped
+    WEBSOCKET_CLIENT_QUEUE_SIZE: int = int(os.getenv("WEBSOCKET_CLIENT_QUEUE_SIZE", "100"))
+    # Disconnect a client after this many drops in a row
+    WEBSOCKET_MAX_DROPPED_MESSAGES: int = int(os.getenv("WEBSOCKET_MAX_DROPPED_MESSAGES", "200"))
+    WEBSOCKET_SEND_TIMEOUT: float = float(os.getenv("WEBSOCKET_SEND_TIMEOUT", "10"))
+    WEBSOCKET_MAX_TOPICS_PER_CLIENT: int = int(os.getenv("WEBSOCKET_MAX_TOPICS_PER_CLIENT", "100"))
+    # Cross-worker fan-out: empty = single process, or redis://host:6379/0, unix:///path/redis.sock
+    PUBSUB_URL: str = os.getenv("PUBSUB_URL", "")
+    PUBSUB_CHANNEL: str = os.getenv("PUBSUB_CHANNEL", "ema_navigator:ws")
+    PUBSUB_OUTBOX_SIZE: int = int(os.getenv("PUBSUB_OUTBOX_SIZE", "10000"))
+    
+    # --- Bot status streaming (user:<uid> topic) ---
+    # Min seconds between PnL-tick pushes; position/signal changes go out immediately
+    BOT_STATUS_PUSH_INTERVAL: float = float(os.getenv("BOT_STATUS_PUSH_INTERVAL", "1"))
+    # Firebase users/{uid} is a durable snapshot: written on trades/stop, otherwise at most this often
+    BOT_FIREBASE_SNAPSHOT_INTERVAL: int = int(os.getenv("BOT_FIREBASE_SNAPSHOT_INTERVAL", "300"))
+    
+    # --- User data stream (listen key: balances, positions, order fills) ---
+    USER_DATA_STREAM_ENABLED: bool = os.getenv("USER_DATA_STREAM_ENABLED", "True").lower() == "true"
+    # Listen keys expire after 60 minutes without a keepalive
+    USER_DATA_KEEPALIVE_INTERVAL: int = int(os.getenv("USER_DATA_KEEPALIVE_INTERVAL", "1800"))
+    # Max seconds to wait for a closing order's fill event before asking REST for the PnL
+    USER_DATA_FILL_TIMEOUT: float = float(os.getenv("USER_DATA_FILL_TIMEOUT", "3"))
+    
+    # --- Market Data Hub (multiplexed combined streams) ---
+    # Binance: max 200 streams per connection
+    MARKET_DATA_MAX_STREAMS_PER_CONNECTION: int = int(os.getenv("MARKET_DATA_MAX_STREAMS_PER_CONNECTION", "200"))
+    # Reconnect if a connection stays silent this long
+    MARKET_DATA_IDLE_TIMEOUT: int = int(os.getenv("MARKET_DATA_IDLE_TIMEOUT", "120"))
+    # Candle ring buffer size per (exchange, symbol, interval)
+    CANDLE_STORE_MAX_CANDLES: int = int(os.getenv("CANDLE_STORE_MAX_CANDLES", "200"))
+    # Seconds after candle close before scheduled signal checks run
+    CANDLE_SETTLE_DELAY: float = float(os.getenv("CANDLE_SETTLE_DELAY", "2"))
+    
+    # --- HTTP Client Pool (shared keep-alive clients per exchange) ---
+    HTTP_POOL_MAX_CONNECTIONS: int = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+    HTTP_POOL_MAX_KEEPALIVE: int = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+    # Seconds an idle keep-alive connection is kept open
+    HTTP_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "30"))
+    HTTP_POOL_DEFAULT_TIMEOUT: float = float(os.getenv("HTTP_POOL_DEFAULT_TIMEOUT", "30"))
+    # Per-credential exchange adapters kept for reuse (count / idle seconds)
+    HTTP_POOL_MAX_SERVICES: int = int(os.getenv("HTTP_POOL_MAX_SERVICES", "256"))
+    HTTP_POOL_SERVICE_TTL: float = float(os.getenv("HTTP_POOL_SERVICE_TTL", "3600"))
+    
+    # --- Exchange rate limiter (process-wide, per exchange host / IP) ---
+    # Request weight per minute; kept below the exchange limits to leave headroom
+    EXCHANGE_WEIGHT_LIMITS: str = os.getenv(
+        "EXCHANGE_WEIGHT_LIMITS", "binance:2000,binance_spot:5000,bybit:3000,okx:600,kucoin:1800,mexc:1200"
+    )
+    # Pause after a 429 / 418 (IP ban) that carries no Retry-After header (seconds)
+    RATE_LIMIT_429_BACKOFF: float = float(os.getenv("RATE_LIMIT_429_BACKOFF", "10"))
+    RATE_LIMIT_BAN_BACKOFF: float = float(os.getenv("RATE_LIMIT_BAN_BACKOFF", "120"))
+    # Share of the budget RISK / INFO requests leave for the classes above them
+    RATE_LIMIT_RISK_RESERVE: float = float(os.getenv("RATE_LIMIT_RISK_RESERVE", "0.1"))
+    RATE_LIMIT_INFO_RESERVE: float = float(os.getenv("RATE_LIMIT_INFO_RESERVE", "0.3"))
+    # INFO requests that would wait longer than this are shed (seconds)
+    RATE_LIMIT_INFO_MAX_WAIT: float = float(os.getenv("RATE_LIMIT_INFO_MAX_WAIT", "5"))
     
     # --- Cache Settings (Optimized) ---
     # Balance cache duration (use cached data to reduce API calls)
     CACHE_DURATION_BALANCE: int = int(os.getenv("CACHE_DURATION_BALANCE", "60"))      # 1 minute
     CACHE_DURATION_POSITION: int = int(os.getenv("CACHE_DURATION_POSITION", "30"))   # 30 seconds
     CACHE_DURATION_PNL: int = int(os.getenv("CACHE_DURATION_PNL", "15"))             # 15 seconds
+    # Public last-price cache shared by all users (seconds)
+    TICKER_CACHE_TTL: float = float(os.getenv("TICKER_CACHE_TTL", "2"))
+    # All-tickers snapshot refresh per exchange (seconds)
+    TICKER_SNAPSHOT_INTERVAL: float = float(os.getenv("TICKER_SNAPSHOT_INTERVAL", "5"))
+    # A refresh loop stops when its snapshot has not been read for this long (seconds)
+    TICKER_SNAPSHOT_IDLE_TTL: float = float(os.getenv("TICKER_SNAPSHOT_IDLE_TTL", "300"))
+    
+    # --- Arbitrage Scanner ---
+    ARBITRAGE_SYMBOLS: str = os.getenv("ARBITRAGE_SYMBOLS", "BTCUSDT,ETHUSDT,BNBUSDT,SOLUSDT,XRPUSDT,DOGEUSDT")
+    ARBITRAGE_MAX_SYMBOLS: int = int(os.getenv("ARBITRAGE_MAX_SYMBOLS", "100"))
+    ARBITRAGE_MIN_PROFIT_PERCENT: float = float(os.getenv("ARBITRAGE_MIN_PROFIT_PERCENT", "0.1"))
+    # Quotes older than this are ignored (seconds)
+    ARBITRAGE_MAX_QUOTE_AGE: float = float(os.getenv("ARBITRAGE_MAX_QUOTE_AGE", "15"))
+    # Min seconds between pushes of an unchanged opportunity
+    ARBITRAGE_PUBLISH_INTERVAL: float = float(os.getenv("ARBITRAGE_PUBLISH_INTERVAL", "1"))
     
     # --- Legacy Monitoring Ayarları (Deprecated but kept for compatibility) ---
     SUBSCRIPTION_CHECK_INTERVAL: int = int(os.getenv("SUBSCRIPTION_CHECK_INTERVAL", "300"))  # 5 minutes
@@ -178,6 +270,7 @@ class Settings:
             "connection_pool": {
                 "max_shared_clients": cls.MAX_SHARED_CLIENTS,
                 "cleanup_threshold": f"{cls.CLIENT_CLEANUP_THRESHOLD}s",
+                "health_check_interval": f"{cls.CLIENT_HEALTH_CHECK_INTERVAL}s",
                 "estimated_user_capacity": f"{cls.MAX_SHARED_CLIENTS * 20}+ users"
             },
             "system_limits": {
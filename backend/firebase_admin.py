@@ -3,12 +3,16 @@ Firebase Admin SDK Integration
 Manages user data and API keys in Firebase Realtime Database
 """
 import os
+import re
 import json
 import time
 import logging
 from typing import Optional, Dict
 import firebase_admin
-from firebase_admin import credentials, db, auth
+from firebase_admin import credentials, auth
+
+from backend.firebase_repository import firebase_repository
+from backend.ledger import ledger_path, read_recent, record_path
 
 logger = logging.getLogger(__name__)
 
@@ -51,15 +55,14 @@ def init_firebase():
 # Initialize on module load
 firebase_initialized = init_firebase()
 
-def get_user_data(user_id: str) -> Optional[Dict]:
+async def get_user_data(user_id: str) -> Optional[Dict]:
     """Get user data from Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return None
 
     try:
-        user_ref = db.reference(f'users/{user_id}')
-        user_data = user_ref.get()
+        user_data = await firebase_repository.get(f'users/{user_id}')
 
         if user_data:
             logger.debug(f"User data retrieved for: {user_id}")
@@ -72,15 +75,14 @@ def get_user_data(user_id: str) -> Optional[Dict]:
         logger.error(f"Error getting user data for {user_id}: {e}")
         return None
 
-def get_user_api_keys(user_id: str, exchange: str) -> Optional[Dict]:
+async def get_user_api_keys(user_id: str, exchange: str) -> Optional[Dict]:
     """Get API keys for a specific exchange from Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return None
 
     try:
-        user_ref = db.reference(f'users/{user_id}/api_keys/{exchange}')
-        exchange_keys = user_ref.get()
+        exchange_keys = await firebase_repository.get(f'users/{user_id}/api_keys/{exchange}')
 
         if not exchange_keys:
             logger.debug(f"No API keys found for exchange {exchange}")
@@ -97,7 +99,7 @@ def get_user_api_keys(user_id: str, exchange: str) -> Optional[Dict]:
         logger.error(f"Error getting API keys for {user_id}/{exchange}: {e}")
         return None
 
-def save_user_api_keys(user_id: str, exchange: str, api_key: str, api_secret: str, passphrase: str = "", is_futures: bool = True) -> bool:
+async def save_user_api_keys(user_id: str, exchange: str, api_key: str, api_secret: str, passphrase: str = "", is_futures: bool = True) -> bool:
     """Save API keys to Firebase"""
     if not firebase_initialized:
         logger.warning("⚠️ Firebase not initialized, using mock storage")
@@ -105,8 +107,7 @@ def save_user_api_keys(user_id: str, exchange: str, api_key: str, api_secret: st
         return True
 
     try:
-        user_ref = db.reference(f'users/{user_id}/api_keys/{exchange}')
-        user_ref.set({
+        await firebase_repository.set(f'users/{user_id}/api_keys/{exchange}', {
             "api_key": api_key,
             "api_secret": api_secret,
             "passphrase": passphrase,
@@ -125,15 +126,14 @@ def save_user_api_keys(user_id: str, exchange: str, api_key: str, api_secret: st
         logger.error(traceback.format_exc())
         return False
 
-def delete_user_api_keys(user_id: str, exchange: str) -> bool:
+async def delete_user_api_keys(user_id: str, exchange: str) -> bool:
     """Delete API keys from Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return False
 
     try:
-        user_ref = db.reference(f'users/{user_id}/api_keys/{exchange}')
-        user_ref.delete()
+        await firebase_repository.delete(f'users/{user_id}/api_keys/{exchange}')
 
         logger.info(f"✅ API keys deleted for {user_id} - {exchange}")
         return True
@@ -142,15 +142,14 @@ def delete_user_api_keys(user_id: str, exchange: str) -> bool:
         logger.error(f"Error deleting API keys: {e}")
         return False
 
-def get_all_user_exchanges(user_id: str) -> list:
+async def get_all_user_exchanges(user_id: str) -> list:
     """Get list of all connected exchanges for a user"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized, returning empty list")
         return []
 
     try:
-        user_ref = db.reference(f'users/{user_id}/api_keys')
-        api_keys_data = user_ref.get()
+        api_keys_data = await firebase_repository.get(f'users/{user_id}/api_keys')
 
         if not api_keys_data:
             logger.debug(f"No exchanges found for user: {user_id}")
@@ -174,21 +173,21 @@ def get_all_user_exchanges(user_id: str) -> list:
         logger.error(f"Error getting exchanges for {user_id}: {e}")
         return []
 
-def verify_firebase_token(token: str) -> Optional[Dict]:
+async def verify_firebase_token(token: str) -> Optional[Dict]:
     """Verify Firebase ID token"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return None
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = await firebase_repository.run("verify_id_token", auth.verify_id_token, token)
         return decoded_token
     except Exception as e:
         logger.error(f"Token verification error: {e}")
         return None
 
 # Auto Trading Settings Management
-def get_auto_trading_settings(user_id: str) -> Optional[Dict]:
+async def get_auto_trading_settings(user_id: str) -> Optional[Dict]:
     """Get user's auto-trading settings from Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized, returning default settings")
@@ -204,8 +203,7 @@ def get_auto_trading_settings(user_id: str) -> Optional[Dict]:
         }
 
     try:
-        ref = db.reference(f'users/{user_id}/auto_trading')
-        settings = ref.get()
+        settings = await firebase_repository.get(f'users/{user_id}/auto_trading')
 
         if settings:
             logger.info(f"Auto-trading settings retrieved for user: {user_id}")
@@ -227,15 +225,14 @@ def get_auto_trading_settings(user_id: str) -> Optional[Dict]:
         logger.error(f"Error getting auto-trading settings: {e}")
         return None
 
-def save_auto_trading_settings(user_id: str, settings: Dict) -> bool:
+async def save_auto_trading_settings(user_id: str, settings: Dict) -> bool:
     """Save user's auto-trading settings to Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return False
 
     try:
-        ref = db.reference(f'users/{user_id}/auto_trading')
-        ref.set({
+        await firebase_repository.set(f'users/{user_id}/auto_trading', {
             "enabled": settings.get("enabled", False),
             "watchlist": settings.get("watchlist", []),
             "interval": settings.get("interval", "15m"),
@@ -252,15 +249,14 @@ def save_auto_trading_settings(user_id: str, settings: Dict) -> bool:
         logger.error(f"Error saving auto-trading settings: {e}")
         return False
 
-def save_ema_signal(user_id: str, signal: Dict) -> bool:
-    """Save EMA signal to Firebase"""
+async def save_ema_signal(user_id: str, signal: Dict) -> Optional[str]:
+    """Save EMA signal to the user's ledger (ledgers/{uid}/signals/{YYYY-MM}); returns its push ID"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
-        return False
+        return None
 
     try:
-        ref = db.reference('signals')
-        new_signal_ref = ref.push({
+        signal_id = await firebase_repository.push(ledger_path(user_id, 'signals'), {
             "user_id": user_id,
             "symbol": signal.get("symbol"),
             "signal_type": signal.get("signal_type"),
@@ -272,46 +268,52 @@ def save_ema_signal(user_id: str, signal: Dict) -> bool:
             "timestamp": int(time.time()),
             "action_taken": False
         })
-        logger.info(f"Signal saved: {new_signal_ref.key}")
-        return True
+        logger.info(f"Signal saved: {signal_id}")
+        return signal_id
     except Exception as e:
         logger.error(f"Error saving signal: {e}")
-        return False
+        return None
 
-def get_user_signals(user_id: str, limit: int = 50) -> list:
+async def get_user_signals(user_id: str, limit: int = 50) -> list:
     """Get user's recent signals"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return []
 
     try:
-        ref = db.reference('signals')
-        signals = ref.order_by_child('user_id').equal_to(user_id).limit_to_last(limit).get()
-
-        if signals:
-            # Convert to list and sort by timestamp
-            signals_list = []
-            for signal_id, signal_data in signals.items():
-                signal_data['id'] = signal_id
-                signals_list.append(signal_data)
-
-            signals_list.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
-            logger.info(f"Retrieved {len(signals_list)} signals for user: {user_id}")
-            return signals_list
-        return []
+        # Newest month shards first (plus legacy global signals while migrating)
+        signals_list = await read_recent(user_id, 'signals', limit)
+        signals_list.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
+        logger.info(f"Retrieved {len(signals_list)} signals for user: {user_id}")
+        return signals_list
     except Exception as e:
         logger.error(f"Error getting signals: {e}")
         return []
 
-def update_signal_action(signal_id: str, action_taken: bool) -> bool:
-    """Update signal action status"""
+async def get_user_bot_trades(user_id: str, limit: int = 50) -> list:
+    """Get the trades the user's bots logged (ledgers/{uid}/trades), newest first"""
+    if not firebase_initialized:
+        logger.warning("Firebase not initialized")
+        return []
+
+    try:
+        # Newest month shards first (plus legacy global trades while migrating)
+        trades_list = await read_recent(user_id, 'trades', limit)
+        logger.info(f"Retrieved {len(trades_list)} bot trades for user: {user_id}")
+        return trades_list
+    except Exception as e:
+        logger.error(f"Error getting bot trades: {e}")
+        return []
+
+async def update_signal_action(signal_id: str, action_taken: bool, user_id: Optional[str] = None) -> bool:
+    """Update signal action status (ledger record if user_id is given, else legacy signals node)"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return False
 
     try:
-        ref = db.reference(f'signals/{signal_id}')
-        ref.update({
+        path = (user_id and record_path(user_id, 'signals', signal_id)) or f'signals/{signal_id}'
+        await firebase_repository.update(path, {
             "action_taken": action_taken,
             "action_timestamp": int(time.time())
         })
@@ -321,53 +323,111 @@ def update_signal_action(signal_id: str, action_taken: bool) -> bool:
         logger.error(f"Error updating signal action: {e}")
         return False
 
+# Indicator State (shared across users)
+def _indicator_state_path(exchange: str, symbol: str, interval: str) -> str:
+    """Firebase-safe path (ccxt symbols contain '/'; keys cannot contain . $ # [ ])"""
+    safe_symbol = re.sub(r'[.$#\[\]/:]', '_', symbol)
+    safe_interval = re.sub(r'[.$#\[\]/:]', '_', interval)
+    return f'indicator_state/{exchange}/{safe_symbol}/{safe_interval}'
+
+async def get_indicator_state(exchange: str, symbol: str, interval: str) -> Optional[Dict]:
+    """Get persisted indicator state for a market"""
+    if not firebase_initialized:
+        return None
+
+    try:
+        return await firebase_repository.get(_indicator_state_path(exchange, symbol, interval))
+    except Exception as e:
+        logger.error(f"Error getting indicator state: {e}")
+        return None
+
+async def save_indicator_state(exchange: str, symbol: str, interval: str, state: Dict) -> bool:
+    """Persist indicator state for a market"""
+    if not firebase_initialized:
+        return False
+
+    try:
+        await firebase_repository.set(_indicator_state_path(exchange, symbol, interval), state)
+        return True
+    except Exception as e:
+        logger.error(f"Error saving indicator state: {e}")
+        return False
+
 # Transaction/Trade History Management
-def get_user_trades(user_id: str, hours: int = 24) -> list:
-    """Get user's trade history from Firebase"""
+def _parse_trade_cursor(cursor: str):
+    """"<timestamp>:<skip>" -> (timestamp, skip)"""
+    try:
+        timestamp, skip = cursor.split(":")
+        return int(timestamp), int(skip)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+async def get_user_trades(user_id: str, hours: int = 24, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+    """
+    Get a page of the user's trade history, newest first
+
+    Uses the timestamp index (users/$uid/trades .indexOn) so only the page
+    is downloaded. `cursor` is the "next_cursor" of the previous page:
+    "<timestamp>:<n>" - the oldest timestamp returned so far and how many
+    trades with that timestamp were already returned.
+
+    Returns {"trades": [...], "next_cursor": str or None}
+    Raises ValueError for a malformed cursor.
+    """
+    end_at, skip = _parse_trade_cursor(cursor) if cursor else (None, 0)
+
     if not firebase_initialized:
         logger.warning("Firebase not initialized, returning empty trades list")
-        return []
+        return {"trades": [], "next_cursor": None}
 
     try:
-        ref = db.reference(f'users/{user_id}/trades')
-        trades = ref.get()
-
+        time_threshold = int(time.time()) - (hours * 3600)
+
+        # Ascending by (timestamp, key); the last `skip` entries were on earlier pages
+        trades = await firebase_repository.query(
+            f'users/{user_id}/trades',
+            order_by_child='timestamp',
+            start_at=time_threshold,
+            end_at=end_at,
+            limit_to_last=limit + skip + 1
+        )
         if not trades:
-            logger.debug(f"No trades found for user: {user_id}")
-            return []
+            return {"trades": [], "next_cursor": None}
 
-        # Convert to list and filter by time
         trades_list = []
-        current_time = int(time.time())
-        time_threshold = current_time - (hours * 3600)
-
         for trade_id, trade_data in trades.items():
-            trade_timestamp = trade_data.get('timestamp', 0)
-            if trade_timestamp >= time_threshold:
-                trade_data['id'] = trade_id
-                trades_list.append(trade_data)
+            trade_data['id'] = trade_id
+            trades_list.append(trade_data)
+        trades_list.sort(key=lambda x: (x.get('timestamp', 0), x['id']), reverse=True)
 
-        # Sort by timestamp descending
-        trades_list.sort(key=lambda x: x.get('timestamp', 0), reverse=True)
+        trades_list = trades_list[skip:]
+        page = trades_list[:limit]
 
-        logger.info(f"✅ Retrieved {len(trades_list)} trades for user: {user_id} (last {hours} hours)")
-        return trades_list
+        next_cursor = None
+        if len(trades_list) > limit:
+            oldest = page[-1].get('timestamp', 0)
+            seen = sum(1 for t in page if t.get('timestamp', 0) == oldest)
+            if oldest == end_at:
+                seen += skip
+            next_cursor = f"{oldest}:{seen}"
+
+        logger.info(f"✅ Retrieved {len(page)} trades for user: {user_id} (last {hours} hours)")
+        return {"trades": page, "next_cursor": next_cursor}
 
     except Exception as e:
         logger.error(f"❌ Error getting user trades: {e}")
         import traceback
         logger.error(traceback.format_exc())
-        return []
+        return {"trades": [], "next_cursor": None}
 
-def save_user_trade(user_id: str, trade: Dict) -> bool:
+async def save_user_trade(user_id: str, trade: Dict) -> bool:
     """Save trade to Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return False
 
     try:
-        ref = db.reference(f'users/{user_id}/trades')
-        new_trade_ref = ref.push({
+        trade_id = await firebase_repository.push(f'users/{user_id}/trades', {
             "symbol": trade.get("symbol"),
             "side": trade.get("side"),
             "type": trade.get("type"),
@@ -381,7 +441,7 @@ def save_user_trade(user_id: str, trade: Dict) -> bool:
             "timestamp": int(time.time())
         })
 
-        logger.info(f"✅ Trade saved: {new_trade_ref.key} for user: {user_id}")
+        logger.info(f"✅ Trade saved: {trade_id} for user: {user_id}")
         return True
 
     except Exception as e:
@@ -391,15 +451,14 @@ def save_user_trade(user_id: str, trade: Dict) -> bool:
         return False
 
 # Subscription Management
-def get_user_subscription(user_id: str) -> Optional[Dict]:
+async def get_user_subscription(user_id: str) -> Optional[Dict]:
     """Get user's subscription data from Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return None
 
     try:
-        ref = db.reference(f'users/{user_id}/subscription')
-        subscription = ref.get()
+        subscription = await firebase_repository.get(f'users/{user_id}/subscription')
 
         if subscription:
             logger.info(f"Subscription data retrieved for user: {user_id}")
@@ -412,15 +471,14 @@ def get_user_subscription(user_id: str) -> Optional[Dict]:
         logger.error(f"Error getting subscription for {user_id}: {e}")
         return None
 
-def save_user_subscription(user_id: str, subscription_data: Dict) -> bool:
+async def save_user_subscription(user_id: str, subscription_data: Dict) -> bool:
     """Save user's subscription data to Firebase"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return False
 
     try:
-        ref = db.reference(f'users/{user_id}/subscription')
-        ref.set({
+        await firebase_repository.set(f'users/{user_id}/subscription', {
             "plan": subscription_data.get("plan", "free"),
             "status": subscription_data.get("status", "active"),
             "variant_id": subscription_data.get("variant_id"),
@@ -438,15 +496,14 @@ def save_user_subscription(user_id: str, subscription_data: Dict) -> bool:
         logger.error(f"Error saving subscription: {e}")
         return False
 
-def update_user_subscription_status(user_id: str, status: str) -> bool:
+async def update_user_subscription_status(user_id: str, status: str) -> bool:
     """Update user's subscription status"""
     if not firebase_initialized:
         logger.warning("Firebase not initialized")
         return False
 
     try:
-        ref = db.reference(f'users/{user_id}/subscription')
-        ref.update({
+        await firebase_repository.update(f'users/{user_id}/subscription', {
             "status": status,
             "updated_at": int(time.time())
         })
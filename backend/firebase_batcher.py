@@ -0,0 +1,327 @@
+"""
+Firebase Write-Behind Batcher
+One pipeline for all Realtime Database writes that do not need a round-trip.
+
+- Writes are coalesced per path (the latest value wins) and flushed as a
+  single multi-path update() through firebase_repository
+- push() assigns Firebase-style push IDs client-side, so new children
+  (trades, logs) ride in the same multi-path update
+- Flush triggers: critical writes (immediately), queue size
+  (FIREBASE_BATCH_MAX_PATHS) or age of the oldest write (FIREBASE_BATCH_INTERVAL)
+- Transiently failed flushes are re-queued underneath newer writes and
+  retried up to MAX_RETRIES times per path
+- A batch the database rejects (invalid key or value, rules) is bisected so
+  the offending paths are dropped and every other path is still written
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, Optional
+
+import firebase_admin
+from firebase_admin import exceptions as firebase_exceptions
+
+from backend.config import settings
+from backend.firebase_repository import firebase_repository
+
+logger = logging.getLogger(__name__)
+
+PUSH_CHARS = "-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
+
+
+class PushIdGenerator:
+    """
+    Firebase push IDs: 8 chars of millisecond timestamp + 12 random chars
+
+    IDs sort chronologically; IDs generated in the same millisecond increment
+    the random part so they keep their order too.
+    """
+
+    def __init__(self):
+        self._last_time = 0
+        self._last_random = [0] * 12
+
+    def __call__(self) -> str:
+        now = int(time.time() * 1000)
+        if now == self._last_time:
+            # Same millisecond: increment the random part
+            i = 11
+            while i >= 0 and self._last_random[i] == 63:
+                self._last_random[i] = 0
+                i -= 1
+            if i >= 0:
+                self._last_random[i] += 1
+        else:
+            self._last_random = [random.randrange(64) for _ in range(12)]
+        self._last_time = now
+
+        time_chars = []
+        for _ in range(8):
+            time_chars.append(PUSH_CHARS[now % 64])
+            now //= 64
+        return "".join(reversed(time_chars)) + "".join(PUSH_CHARS[c] for c in self._last_random)
+
+
+push_id = PushIdGenerator()
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Errors a retry cannot fix: invalid paths/values (400) or rules rejections"""
+    return isinstance(error, (
+        ValueError,
+        TypeError,
+        firebase_exceptions.InvalidArgumentError,
+        firebase_exceptions.PermissionDeniedError
+    ))
+
+
+def _with_child(value: Any, path: str, child: Any) -> Dict:
+    """Copy of `value` (as an object) with `child` written at relative `path`"""
+    root = dict(value) if isinstance(value, dict) else {}
+    node = root
+    *parents, leaf = path.split("/")
+    for key in parents:
+        node[key] = dict(node[key]) if isinstance(node.get(key), dict) else {}
+        node = node[key]
+    node[leaf] = child
+    return root
+
+
+class FirebaseBatcher:
+    """Coalescing write-behind queue flushed as multi-path updates"""
+
+    RETRY_DELAY = 5.0
+    MAX_RETRIES = 12
+
+    def __init__(self, max_age: float = None, max_paths: int = None):
+        self.max_age = max_age or settings.FIREBASE_BATCH_INTERVAL
+        self.max_paths = max_paths or settings.FIREBASE_BATCH_MAX_PATHS
+
+        self.pending: Dict[str, Any] = {}
+        self.oldest: Optional[float] = None
+        # path -> failed flushes of its queued value
+        self.attempts: Dict[str, int] = {}
+        self._trigger: Optional[str] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "writes": 0,
+            "coalesced": 0,
+            "flushes": 0,
+            "paths_written": 0,
+            "errors": 0,
+            "rejected": 0,
+            "dropped": 0,
+            "triggers": {"critical": 0, "size": 0, "age": 0, "manual": 0},
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0
+        }
+
+    # --- queueing (non-blocking, callable from sync code) ---
+
+    def set(self, path: str, value: Any, critical: bool = False):
+        """Queue a write that replaces `path`"""
+        self.stats["writes"] += 1
+        self._put(path.strip("/"), value)
+        self._after_write(critical)
+
+    def update(self, path: str, data: Dict[str, Any], critical: bool = False):
+        """Queue a ref(path).update(data) - each key is its own coalesced path"""
+        base = path.strip("/")
+        self.stats["writes"] += len(data)
+        for key, value in data.items():
+            self._put(f"{base}/{key}" if base else key, value)
+        self._after_write(critical)
+
+    def push(self, path: str, value: Any, critical: bool = False) -> str:
+        """Queue a new child under `path`; returns its push ID"""
+        key = push_id()
+        self.set(f"{path.strip('/')}/{key}", value, critical)
+        return key
+
+    def _put(self, path: str, value: Any):
+        if self.oldest is None:
+            self.oldest = time.time()
+
+        # A queued ancestor is replaced as a whole - write into its value
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            ancestor = "/".join(parts[:i])
+            if ancestor in self.pending:
+                self.pending[ancestor] = _with_child(self.pending[ancestor], "/".join(parts[i:]), value)
+                self.stats["coalesced"] += 1
+                return
+
+        # Queued descendants are superseded (multi-path updates reject overlapping paths)
+        prefix = path + "/"
+        for key in [k for k in self.pending if k.startswith(prefix)]:
+            del self.pending[key]
+            self.stats["coalesced"] += 1
+
+        if path in self.pending:
+            self.stats["coalesced"] += 1
+        self.pending[path] = value
+        # A new value starts its own retry budget
+        self.attempts.pop(path, None)
+
+    def _after_write(self, critical: bool):
+        if critical:
+            self._kick("critical")
+        elif len(self.pending) >= self.max_paths:
+            self._kick("size")
+        else:
+            # Let the flush task pick up the new deadline
+            self._kick(None)
+
+    def _kick(self, trigger: Optional[str]):
+        if self._ensure_running():
+            self._trigger = self._trigger or trigger
+            self._wakeup.set()
+
+    def _ensure_running(self) -> bool:
+        """Start the flush task; False outside an event loop (flushed on the next call)"""
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+        return True
+
+    # --- flushing ---
+
+    async def _run(self):
+        while True:
+            timeout = None
+            if self.pending:
+                timeout = max(0.0, self.oldest + self.max_age - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                self._trigger = "age"
+            self._wakeup.clear()
+            trigger, self._trigger = self._trigger, None
+
+            if trigger and self.pending and not await self._flush(trigger):
+                await asyncio.sleep(self.RETRY_DELAY)
+
+    async def flush(self) -> bool:
+        """Write everything queued now"""
+        self._ensure_running()
+        return await self._flush("manual")
+
+    async def _flush(self, trigger: str) -> bool:
+        async with self._lock:
+            if not self.pending:
+                return True
+            if not firebase_admin._apps:
+                # No Firebase app (credentials missing) - nothing can be written
+                logger.warning(f"⚠️ Firebase not initialized - dropping {len(self.pending)} queued writes")
+                self.stats["dropped"] += len(self.pending)
+                self.pending, self.oldest = {}, None
+                self.attempts.clear()
+                return True
+
+            batch, self.pending = self.pending, {}
+            oldest, self.oldest = self.oldest, None
+            attempts, self.attempts = self.attempts, {}
+            start = time.perf_counter()
+            failed = await self._write(batch)
+            if failed:
+                self._requeue(failed, attempts, oldest)
+                self.stats["errors"] += 1
+                return False
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.stats["flushes"] += 1
+            self.stats["paths_written"] += len(batch)
+            self.stats["triggers"][trigger] += 1
+            self.stats["last_flush_ms"] = round(elapsed_ms, 1)
+            self.stats["max_flush_ms"] = round(max(self.stats["max_flush_ms"], elapsed_ms), 1)
+            self.stats["total_flush_ms"] += elapsed_ms
+            logger.debug(f"Firebase batch flushed: {len(batch)} paths ({trigger}, {elapsed_ms:.0f}ms)")
+            return True
+
+    async def _write(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Multi-path update of `batch`; returns the paths that failed transiently
+
+        A rejected batch is split in halves until the rejected paths are
+        isolated; those are dropped so they cannot block the rest.
+        """
+        try:
+            await firebase_repository.update("", batch)
+            return {}
+        except Exception as e:
+            if not _is_permanent(e):
+                logger.error(f"❌ Firebase batch flush failed ({len(batch)} paths): {e}")
+                return batch
+            if len(batch) == 1:
+                path = next(iter(batch))
+                self.stats["rejected"] += 1
+                logger.error(f"❌ Firebase rejected write to {path}, dropping it: {e}")
+                return {}
+
+        items = list(batch.items())
+        middle = len(items) // 2
+        failed = await self._write(dict(items[:middle]))
+        failed.update(await self._write(dict(items[middle:])))
+        return failed
+
+    def _requeue(self, failed: Dict[str, Any], attempts: Dict[str, int], oldest: Optional[float]):
+        """Re-queue failed paths underneath anything written meanwhile"""
+        newer, self.pending = self.pending, {}
+        self.oldest = oldest
+        retries = {}
+        for path, value in failed.items():
+            count = attempts.get(path, 0) + 1
+            if count > self.MAX_RETRIES:
+                self.stats["dropped"] += 1
+                logger.error(f"❌ Firebase write to {path} failed {count} times, dropping it")
+                continue
+            self._put(path, value)
+            retries[path] = count
+        for path, value in newer.items():
+            self._put(path, value)
+        # Paths superseded by a newer write (or merged into one) lose their count
+        self.attempts = {
+            path: count for path, count in retries.items()
+            if path in self.pending and path not in newer
+        }
+        if not self.pending:
+            self.oldest = None
+
+    async def close(self):
+        """Flush what is queued and stop the flush task"""
+        try:
+            await self.flush()
+        finally:
+            if self._task is not None:
+                self._task.cancel()
+                self._task = None
+
+    def get_stats(self) -> Dict:
+        """Queue depth, flush triggers and flush latency"""
+        stats = {k: v for k, v in self.stats.items() if k != "total_flush_ms"}
+        flushes = self.stats["flushes"]
+        return {
+            **stats,
+            "queue_depth": len(self.pending),
+            "oldest_age": round(time.time() - self.oldest, 1) if self.oldest else 0,
+            "avg_flush_ms": round(self.stats["total_flush_ms"] / flushes, 1) if flushes else 0,
+            "avg_batch_size": round(self.stats["paths_written"] / flushes, 1) if flushes else 0,
+            "max_age": self.max_age,
+            "max_paths": self.max_paths
+        }
+
+
+# Singleton instance
+firebase_batcher = FirebaseBatcher()
@@ -6,154 +6,12 @@ from datetime import datetime
 import logging
 import re
 import time
-import asyncio
-from typing import Dict, Any
 from collections import defaultdict
-from app.config import settings
+from app.firebase_batcher import firebase_batcher
+from app.ledger import ledger_path
 
 logger = logging.getLogger("firebase_manager")
 
-class BatchFirebaseUpdater:
-    """
-    Firebase Batch Operations Manager
-    - Queues individual updates
-    - Flushes in batches every 3 minutes
-    - 90% cost reduction for Firebase operations
-    """
-    
-    def __init__(self, batch_interval: int = None):
-        self.batch_interval = batch_interval or settings.FIREBASE_BATCH_INTERVAL
-        self.pending_updates: Dict[str, Dict[str, Any]] = {}  # user_id -> update_data
-        self.pending_trades: list = []  # Trade data queue
-        self.last_batch_time = 0
-        self.batch_stats = {
-            "total_batches": 0,
-            "total_updates": 0,
-            "total_trades": 0,
-            "last_batch_size": 0,
-            "average_batch_size": 0
-        }
-        self._batch_lock = asyncio.Lock() if hasattr(asyncio, 'Lock') else None
-
-    def queue_user_update(self, user_id: str, update_data: dict):
-        """User update'ini batch queue'ya ekle"""
-        if user_id not in self.pending_updates:
-            self.pending_updates[user_id] = {}
-        
-        # Merge new data with existing pending data
-        self.pending_updates[user_id].update(update_data)
-        
-        logger.debug(f"Queued update for user {user_id}: {list(update_data.keys())}")
-
-    def queue_trade(self, trade_data: dict):
-        """Trade'i batch queue'ya ekle"""
-        if 'timestamp' in trade_data and isinstance(trade_data['timestamp'], datetime):
-            trade_data['timestamp'] = trade_data['timestamp'].isoformat()
-        
-        self.pending_trades.append(trade_data)
-        logger.debug(f"Queued trade for user {trade_data.get('user_id', 'unknown')}")
-
-    def should_flush(self) -> bool:
-        """Batch flush gerekli mi kontrol et"""
-        current_time = time.time()
-        time_passed = current_time - self.last_batch_time
-        
-        # Conditions for flushing:
-        # 1. Time interval passed
-        # 2. Too many pending updates (emergency flush)
-        # 3. Critical updates pending
-        return (
-            time_passed >= self.batch_interval or
-            len(self.pending_updates) >= 100 or  # Emergency flush threshold
-            len(self.pending_trades) >= 50
-        )
-
-    async def flush_batch(self, firebase_db) -> bool:
-        """Batch'i Firebase'e flush et"""
-        if not firebase_db:
-            logger.error("Firebase DB not available for batch flush")
-            return False
-
-        if not self.pending_updates and not self.pending_trades:
-            return True  # Nothing to flush
-
-        try:
-            # Use lock if available (async context)
-            if self._batch_lock:
-                async with self._batch_lock:
-                    return await self._execute_batch_flush(firebase_db)
-            else:
-                return await self._execute_batch_flush(firebase_db)
-
-        except Exception as e:
-            logger.error(f"Batch flush error: {e}")
-            return False
-
-    async def _execute_batch_flush(self, firebase_db) -> bool:
-        """Execute the actual batch flush"""
-        try:
-            batch_size = len(self.pending_updates) + len(self.pending_trades)
-            if batch_size == 0:
-                return True
-
-            logger.info(f"Starting batch flush: {len(self.pending_updates)} user updates, {len(self.pending_trades)} trades")
-
-            # Prepare batch update data
-            batch_updates = {}
-            
-            # User updates
-            for user_id, user_data in self.pending_updates.items():
-                for key, value in user_data.items():
-                    batch_updates[f'users/{user_id}/{key}'] = value
-
-            # Execute batch user updates
-            if batch_updates:
-                firebase_db.reference().update(batch_updates)
-                logger.info(f"Batch user updates completed: {len(batch_updates)} fields")
-
-            # Trade updates (individual pushes for unique IDs)
-            trades_processed = 0
-            if self.pending_trades:
-                trades_ref = firebase_db.reference('trades')
-                for trade_data in self.pending_trades:
-                    trades_ref.push(trade_data)
-                    trades_processed += 1
-
-                logger.info(f"Batch trade updates completed: {trades_processed} trades")
-
-            # Update statistics
-            self.batch_stats["total_batches"] += 1
-            self.batch_stats["total_updates"] += len(self.pending_updates)
-            self.batch_stats["total_trades"] += len(self.pending_trades)
-            self.batch_stats["last_batch_size"] = batch_size
-            
-            if self.batch_stats["total_batches"] > 0:
-                total_operations = self.batch_stats["total_updates"] + self.batch_stats["total_trades"]
-                self.batch_stats["average_batch_size"] = total_operations / self.batch_stats["total_batches"]
-
-            # Clear queues
-            self.pending_updates.clear()
-            self.pending_trades.clear()
-            self.last_batch_time = time.time()
-
-            logger.info(f"Batch flush completed successfully: {batch_size} total operations")
-            return True
-
-        except Exception as e:
-            logger.error(f"Batch flush execution error: {e}")
-            # Don't clear queues on error - try again next time
-            return False
-
-    def get_stats(self) -> dict:
-        """Batch statistics"""
-        return {
-            **self.batch_stats,
-            "pending_updates": len(self.pending_updates),
-            "pending_trades": len(self.pending_trades),
-            "time_since_last_batch": int(time.time() - self.last_batch_time),
-            "next_flush_in": max(0, int(self.batch_interval - (time.time() - self.last_batch_time)))
-        }
-
 class OptimizedFirebaseManager:
     """
     Optimized Firebase Manager with Batch Operations
@@ -166,7 +24,8 @@ class OptimizedFirebaseManager:
         self.db_ref = None
         self.db = None
         self.initialized = False
-        self.batch_updater = BatchFirebaseUpdater()
+        # Shared write-behind pipeline (coalesced multi-path updates)
+        self.batch_updater = firebase_batcher
         self._initialize()
         
     def _initialize(self):
@@ -258,26 +117,24 @@ class OptimizedFirebaseManager:
         return int(time.time() * 1000)
 
     def log_trade(self, trade_data: dict, use_batch: bool = True):
-        """Log trade data to Firebase (batched by default)"""
+        """
+        Log trade data to Firebase
+        Trades are critical events and always flushed right away; use_batch is kept for compatibility
+        """
         if not self.is_initialized():
             logger.warning("Firebase not initialized, cannot log trade")
             return False
             
         try:
-            if use_batch:
-                # Add to batch queue (recommended for scalability)
-                self.batch_updater.queue_trade(trade_data)
-                logger.info(f"Trade queued for batch processing: user {trade_data.get('user_id', 'unknown')}")
-                return True
-            else:
-                # Immediate write (for critical trades)
-                if 'timestamp' in trade_data and isinstance(trade_data['timestamp'], datetime):
-                    trade_data['timestamp'] = trade_data['timestamp'].isoformat()
-                    
-                trades_ref = self.db.reference('trades')
-                new_trade_ref = trades_ref.push(trade_data)
-                logger.info(f"Trade logged immediately with ID: {new_trade_ref.key}")
-                return True
+            if 'timestamp' in trade_data and isinstance(trade_data['timestamp'], datetime):
+                trade_data['timestamp'] = trade_data['timestamp'].isoformat()
+            
+            # Push ID is assigned client-side; critical=True flushes the pending multi-path update now
+            user_id = trade_data.get('user_id')
+            path = ledger_path(user_id, 'trades') if user_id else 'trades'
+            trade_id = self.batch_updater.push(path, trade_data, critical=True)
+            logger.info(f"Trade queued with ID: {trade_id} (user {trade_data.get('user_id', 'unknown')})")
+            return True
                 
         except Exception as e:
             logger.error(f"Trade logging error: {e}")
@@ -312,17 +169,10 @@ class OptimizedFirebaseManager:
             return False
             
         try:
-            if use_batch:
-                # Add to batch queue (recommended for scalability)
-                self.batch_updater.queue_user_update(user_id, data)
-                logger.debug(f"User data queued for batch update: {user_id}")
-                return True
-            else:
-                # Immediate write (for critical updates)
-                user_ref = self.db.reference(f'users/{user_id}')
-                user_ref.update(data)
-                logger.info(f"User data updated immediately for {user_id}")
-                return True
+            # Coalesced per field; use_batch=False flushes right away
+            self.batch_updater.update(f'users/{user_id}', data, critical=not use_batch)
+            logger.debug(f"User data queued for {'batch' if use_batch else 'immediate'} update: {user_id}")
+            return True
                 
         except Exception as e:
             logger.error(f"Error updating user data for {user_id}: {e}")
@@ -350,17 +200,11 @@ class OptimizedFirebaseManager:
         if not self.is_initialized():
             return False
         
-        return await self.batch_updater.flush_batch(self.db)
+        return await self.batch_updater.flush()
 
     async def auto_flush_if_needed(self) -> bool:
-        """Auto flush if conditions are met"""
-        if not self.is_initialized():
-            return False
-            
-        if self.batch_updater.should_flush():
-            return await self.flush_batch_updates()
-        
-        return True
+        """Flushing is driven by the batcher itself (size, age, critical writes)"""
+        return self.is_initialized()
 
     def verify_token(self, token: str):
         """Verify Firebase token"""
@@ -416,13 +260,12 @@ class OptimizedFirebaseManager:
             "architecture": "optimized_batch_operations",
             "batch_operations": batch_stats,
             "settings": {
-                "batch_interval": self.batch_updater.batch_interval,
-                "emergency_flush_threshold": 100,
-                "trade_flush_threshold": 50
+                "batch_interval": self.batch_updater.max_age,
+                "size_flush_threshold": self.batch_updater.max_paths
             },
             "cost_savings": {
-                "estimated_write_reduction": "90%",
-                "batch_efficiency": f"{batch_stats.get('average_batch_size', 0):.1f} operations/batch"
+                "coalesced_writes": batch_stats.get("coalesced", 0),
+                "batch_efficiency": f"{batch_stats.get('avg_batch_size', 0):.1f} paths/batch"
             }
         }
 
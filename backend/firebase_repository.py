@@ -0,0 +1,152 @@
+"""
+Async Firebase Repository
+Non-blocking access to the Firebase Realtime Database from async code.
+
+- firebase_admin.db calls are blocking HTTP round-trips; they run on a
+  bounded thread pool (FIREBASE_MAX_WORKERS) instead of the event loop
+- Every call has a timeout (FIREBASE_TIMEOUT) and per-operation metrics
+- get / set / update / push / delete / query mirror db.Reference; an empty
+  path addresses the database root (multi-path updates)
+"""
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from firebase_admin import db
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FirebaseRepository:
+    """Runs Realtime Database operations off the event loop"""
+
+    def __init__(self, max_workers: int = None, timeout: float = None):
+        self.max_workers = max_workers or settings.FIREBASE_MAX_WORKERS
+        self.timeout = timeout or settings.FIREBASE_TIMEOUT
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="firebase")
+        return self.executor
+
+    def _record(self, operation: str, elapsed_ms: float, outcome: str):
+        stats = self.stats.setdefault(operation, {
+            "calls": 0, "errors": 0, "timeouts": 0, "total_ms": 0.0, "max_ms": 0.0
+        })
+        stats["calls"] += 1
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if outcome != "ok":
+            stats[outcome] += 1
+
+    async def run(self, operation: str, func: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """
+        Run a blocking Firebase call on the pool
+
+        Raises asyncio.TimeoutError after `timeout` seconds; the worker thread
+        finishes the request in the background.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._get_executor(), functools.partial(func, *args, **kwargs))
+
+        self.in_flight += 1
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeouts"
+            logger.warning(f"⚠️ Firebase {operation} timed out after {timeout or self.timeout}s")
+            raise
+        except Exception:
+            outcome = "errors"
+            raise
+        finally:
+            self.in_flight -= 1
+            self._record(operation, (time.perf_counter() - start) * 1000, outcome)
+
+    @staticmethod
+    def _ref(path: str):
+        return db.reference(path or "/")
+
+    async def get(self, path: str, shallow: bool = False, timeout: float = None) -> Any:
+        """Read a node; shallow=True returns only its child keys (values become True)"""
+        return await self.run("get", lambda: self._ref(path).get(shallow=shallow), timeout=timeout)
+
+    async def set(self, path: str, value: Any, timeout: float = None):
+        await self.run("set", lambda: self._ref(path).set(value), timeout=timeout)
+
+    async def update(self, path: str, value: Dict, timeout: float = None):
+        await self.run("update", lambda: self._ref(path).update(value), timeout=timeout)
+
+    async def push(self, path: str, value: Any, timeout: float = None) -> str:
+        """Push a child; returns its key"""
+        return await self.run("push", lambda: self._ref(path).push(value).key, timeout=timeout)
+
+    async def delete(self, path: str, timeout: float = None):
+        await self.run("delete", lambda: self._ref(path).delete(), timeout=timeout)
+
+    async def query(
+        self,
+        path: str,
+        order_by_child: Optional[str] = None,
+        equal_to: Any = None,
+        start_at: Any = None,
+        end_at: Any = None,
+        limit_to_first: Optional[int] = None,
+        limit_to_last: Optional[int] = None,
+        timeout: float = None
+    ) -> Any:
+        """Ordered/filtered read (order_by_child or key order + equal_to/start_at/end_at + limits)"""
+        def _query():
+            ref = self._ref(path)
+            if order_by_child:
+                query = ref.order_by_child(order_by_child)
+            elif (equal_to, start_at, end_at, limit_to_first, limit_to_last) == (None,) * 5:
+                return ref.get()
+            else:
+                # Filters and limits need an ordering; default to push-key (insertion) order
+                query = ref.order_by_key()
+            if equal_to is not None:
+                query = query.equal_to(equal_to)
+            if start_at is not None:
+                query = query.start_at(start_at)
+            if end_at is not None:
+                query = query.end_at(end_at)
+            if limit_to_first:
+                query = query.limit_to_first(limit_to_first)
+            if limit_to_last:
+                query = query.limit_to_last(limit_to_last)
+            return query.get()
+
+        return await self.run("query", _query, timeout=timeout)
+
+    def get_stats(self) -> Dict:
+        """Per-operation call counts and latencies"""
+        operations = {
+            name: {
+                **{k: v for k, v in stats.items() if k != "total_ms"},
+                "max_ms": round(stats["max_ms"], 1),
+                "avg_ms": round(stats["total_ms"] / stats["calls"], 1) if stats["calls"] else 0
+            }
+            for name, stats in self.stats.items()
+        }
+        return {"max_workers": self.max_workers, "in_flight": self.in_flight, "operations": operations}
+
+    def close(self):
+        """Release the worker threads (pending calls are not waited for)"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+
+
+# Singleton instance
+firebase_repository = FirebaseRepository()
@@ -0,0 +1,89 @@
+"""
+Per-User Ledger
+Trades and signals sharded per user and per month:
+
+    ledgers/{uid}/trades/{YYYY-MM}/{push_id}
+    ledgers/{uid}/signals/{YYYY-MM}/{push_id}
+
+- Per-user reads only touch that user's history, newest month first
+- Records use push IDs; their first 8 chars encode the creation time, so a
+  record's month shard can be found from its ID alone
+- The legacy global `trades` / `signals` nodes are still read as a fallback
+  (LEDGER_LEGACY_READS) until scripts/migrate_ledger.py has moved them
+"""
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from backend.config import settings
+from backend.firebase_batcher import PUSH_CHARS
+from backend.firebase_repository import firebase_repository
+
+logger = logging.getLogger(__name__)
+
+LEDGER_ROOT = "ledgers"
+LEDGER_KINDS = ("trades", "signals")
+
+
+def month_key(timestamp: Optional[float] = None) -> str:
+    """UTC month shard ("2024-05") for a unix timestamp (default: now)"""
+    return datetime.fromtimestamp(timestamp or time.time(), tz=timezone.utc).strftime("%Y-%m")
+
+
+def ledger_path(user_id: str, kind: str, timestamp: Optional[float] = None) -> str:
+    """Month shard for new `kind` records of a user"""
+    return f"{LEDGER_ROOT}/{user_id}/{kind}/{month_key(timestamp)}"
+
+
+def push_id_timestamp(record_id: str) -> Optional[float]:
+    """Creation time (unix seconds) encoded in a push ID; None if it is not one"""
+    if not record_id or len(record_id) != 20:
+        return None
+    ms = 0
+    for char in record_id[:8]:
+        index = PUSH_CHARS.find(char)
+        if index < 0:
+            return None
+        ms = ms * 64 + index
+    return ms / 1000
+
+
+def record_path(user_id: str, kind: str, record_id: str) -> Optional[str]:
+    """Full path of an existing ledger record (None if the ID carries no time)"""
+    timestamp = push_id_timestamp(record_id)
+    if timestamp is None:
+        return None
+    return f"{ledger_path(user_id, kind, timestamp)}/{record_id}"
+
+
+async def read_recent(user_id: str, kind: str, limit: int) -> List[Dict]:
+    """
+    A user's newest `limit` records of `kind`, newest first
+
+    Walks the month shards from the newest; with LEDGER_LEGACY_READS the
+    user's entries in the global node fill up what the ledger lacks.
+    """
+    records: List[Dict] = []
+    base = f"{LEDGER_ROOT}/{user_id}/{kind}"
+
+    months = await firebase_repository.get(base, shallow=True) or {}
+    for month in sorted(months, reverse=True):
+        # Push-key order is chronological
+        shard = await firebase_repository.query(
+            f"{base}/{month}", limit_to_last=limit - len(records)
+        ) or {}
+        for record_id in sorted(shard, reverse=True):
+            records.append({**shard[record_id], "id": record_id})
+        if len(records) >= limit:
+            break
+
+    if settings.LEDGER_LEGACY_READS and len(records) < limit:
+        legacy = await firebase_repository.query(
+            kind, order_by_child="user_id", equal_to=user_id, limit_to_last=limit
+        ) or {}
+        known = {r["id"] for r in records}
+        records.extend({**data, "id": record_id} for record_id, data in legacy.items() if record_id not in known)
+        records.sort(key=lambda r: push_id_timestamp(r["id"]) or r.get("timestamp") or 0, reverse=True)
+
+    return records[:limit]
@@ -5,7 +5,6 @@ from pydantic import BaseModel
 from typing import Optional, List
 import os
 import jwt
-import httpx
 import json
 from datetime import datetime, timedelta
 import hashlib
@@ -48,6 +47,43 @@ except ImportError:
     EXCHANGE_SERVICES_AVAILABLE = False
     print("⚠️ Warning: Exchange services not available")
 
+# Import indicator engine
+try:
+    from backend.services.indicator_engine import indicator_engine
+    INDICATOR_ENGINE_AVAILABLE = True
+except ImportError:
+    INDICATOR_ENGINE_AVAILABLE = False
+    print("⚠️ Warning: Indicator engine not available")
+
+# Import vectorized indicators (numpy)
+try:
+    from backend.services.indicators import scan_ema_crossovers
+    INDICATORS_AVAILABLE = True
+except ImportError:
+    INDICATORS_AVAILABLE = False
+    print("⚠️ Warning: Vectorized indicators not available")
+
+# Import shared HTTP client pool and non-blocking Firebase access
+from backend.config import settings
+from backend.services.http_pool import http_pool
+from backend.services.account_state import account_state
+from backend.firebase_repository import firebase_repository
+
+# Import app lifespan (startup/shutdown)
+try:
+    from backend.startup import lifespan
+except ImportError:
+    lifespan = None
+    print("⚠️ Warning: Startup module not available")
+
+# Import bulk ticker snapshots
+try:
+    from backend.services.ticker_snapshot import ticker_snapshot
+    TICKER_SNAPSHOT_AVAILABLE = True
+except ImportError:
+    TICKER_SNAPSHOT_AVAILABLE = False
+    print("⚠️ Warning: Ticker snapshot not available")
+
 # Import WebSocket manager
 try:
     from backend.websocket_manager import connection_manager
@@ -57,7 +93,7 @@ except ImportError:
     WEBSOCKET_AVAILABLE = False
     print("⚠️ Warning: WebSocket manager not available")
 
-app = FastAPI(title="EMA Navigator AI Trading API")
+app = FastAPI(title="EMA Navigator AI Trading API", lifespan=lifespan)
 
 # CORS Configuration - Must be before router includes
 app.add_middleware(
@@ -104,6 +140,11 @@ class EMARequest(BaseModel):
     symbol: str
     interval: str = "15m"
 
+class EMAScanRequest(BaseModel):
+    exchange: str = "binance"
+    symbols: List[str]
+    interval: str = "15m"
+
 class PositionRequest(BaseModel):
     exchange: str
     symbol: str
@@ -140,12 +181,12 @@ async def verify_firebase_token_with_identitytoolkit(id_token: str) -> dict:
     if not FIREBASE_API_KEY:
         raise HTTPException(status_code=500, detail="Missing FIREBASE_API_KEY on server")
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(
-                f"https://identitytoolkit.googleapis.com/v1/accounts:lookup?key={FIREBASE_API_KEY}",
-                json={"idToken": id_token},
-                timeout=10.0,
-            )
+        client = http_pool.get()
+        resp = await client.post(
+            f"https://identitytoolkit.googleapis.com/v1/accounts:lookup?key={FIREBASE_API_KEY}",
+            json={"idToken": id_token},
+            timeout=10.0,
+        )
         if resp.status_code != 200:
             raise HTTPException(status_code=401, detail="Invalid Firebase ID token")
         data = resp.json()
@@ -216,6 +257,13 @@ try:
 except ImportError:
     print("⚠️ Warning: Integrations module not available")
 
+try:
+    from backend.api.arbitrage import router as arbitrage_router
+    app.include_router(arbitrage_router)
+    print("✅ Arbitrage module loaded")
+except ImportError as e:
+    print(f"⚠️ Warning: Arbitrage module not available - {e}")
+
 # ✅ FIXED: Transactions router
 try:
     from backend.api.transactions import router as transactions_router
@@ -228,6 +276,7 @@ except ImportError as e:
 async def validate_binance_api(api_key: str, api_secret: str) -> bool:
     """Validate Binance API credentials"""
     try:
+        reserved = await http_pool.reserve("binance", "GET", "https://fapi.binance.com/fapi/v2/account", {}, api_key)
         timestamp = int(time.time() * 1000)
         query_string = f"timestamp={timestamp}"
         signature = hmac.new(
@@ -236,13 +285,14 @@ async def validate_binance_api(api_key: str, api_secret: str) -> bool:
             hashlib.sha256
         ).hexdigest()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://fapi.binance.com/fapi/v2/account?{query_string}&signature={signature}",
-                headers={"X-MBX-APIKEY": api_key},
-                timeout=10.0
-            )
-            return response.status_code == 200
+        client = http_pool.get("binance")
+        response = await client.get(
+            f"https://fapi.binance.com/fapi/v2/account?{query_string}&signature={signature}",
+            headers={"X-MBX-APIKEY": api_key},
+            timeout=10.0,
+            extensions=reserved
+        )
+        return response.status_code == 200
     except Exception as e:
         print(f"Binance validation error: {e}")
         return False
@@ -250,6 +300,7 @@ async def validate_binance_api(api_key: str, api_secret: str) -> bool:
 async def validate_bybit_api(api_key: str, api_secret: str) -> bool:
     """Validate Bybit API credentials"""
     try:
+        reserved = await http_pool.reserve("bybit", "GET", "https://api.bybit.com/v2/private/wallet/balance", {}, api_key)
         timestamp = str(int(time.time() * 1000))
         params = f"api_key={api_key}&timestamp={timestamp}"
         signature = hmac.new(
@@ -258,13 +309,14 @@ async def validate_bybit_api(api_key: str, api_secret: str) -> bool:
             hashlib.sha256
         ).hexdigest()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"https://api.bybit.com/v2/private/wallet/balance?{params}&sign={signature}",
-                headers={"Content-Type": "application/json"},
-                timeout=10.0
-            )
-            return response.status_code == 200
+        client = http_pool.get("bybit")
+        response = await client.get(
+            f"https://api.bybit.com/v2/private/wallet/balance?{params}&sign={signature}",
+            headers={"Content-Type": "application/json"},
+            timeout=10.0,
+            extensions=reserved
+        )
+        return response.status_code == 200
     except Exception as e:
         print(f"Bybit validation error: {e}")
         return False
@@ -272,6 +324,7 @@ async def validate_bybit_api(api_key: str, api_secret: str) -> bool:
 async def validate_okx_api(api_key: str, api_secret: str) -> bool:
     """Validate OKX API credentials"""
     try:
+        reserved = await http_pool.reserve("okx", "GET", "https://www.okx.com/api/v5/account/balance", {}, api_key)
         timestamp = datetime.utcnow().isoformat()[:-3] + 'Z'
         message = timestamp + 'GET' + '/api/v5/account/balance'
         signature = hmac.new(
@@ -280,59 +333,63 @@ async def validate_okx_api(api_key: str, api_secret: str) -> bool:
             hashlib.sha256
         ).digest().hex()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://www.okx.com/api/v5/account/balance",
-                headers={
-                    "OK-ACCESS-KEY": api_key,
-                    "OK-ACCESS-SIGN": signature,
-                    "OK-ACCESS-TIMESTAMP": timestamp,
-                    "OK-ACCESS-PASSPHRASE": "your-passphrase"
-                },
-                timeout=10.0
-            )
-            return response.status_code == 200
+        client = http_pool.get("okx")
+        response = await client.get(
+            "https://www.okx.com/api/v5/account/balance",
+            headers={
+                "OK-ACCESS-KEY": api_key,
+                "OK-ACCESS-SIGN": signature,
+                "OK-ACCESS-TIMESTAMP": timestamp,
+                "OK-ACCESS-PASSPHRASE": "your-passphrase"
+            },
+            timeout=10.0,
+            extensions=reserved
+        )
+        return response.status_code == 200
     except Exception as e:
         print(f"OKX validation error: {e}")
         return False
 
 async def calculate_ema(exchange: str, symbol: str, interval: str = "15m"):
     """Calculate EMA 9 and EMA 21 for given symbol"""
+    if exchange.lower() != "binance":
+        raise HTTPException(status_code=400, detail=f"Exchange {exchange} not yet supported for EMA calculation")
+    if not INDICATOR_ENGINE_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Indicator engine not available")
+
+    from backend.services.candle_store import INTERVAL_SECONDS
+    if interval not in INTERVAL_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported interval: {interval}")
+    # Only listed markets get indicator state (series and Firebase node)
+    symbol = symbol.upper()
+    if TICKER_SNAPSHOT_AVAILABLE:
+        table = await ticker_snapshot.get_table("binance")
+        if table is not None and symbol not in table.index:
+            raise HTTPException(status_code=400, detail=f"Unknown Binance futures symbol: {symbol}")
+
     try:
-        if exchange.lower() == "binance":
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"https://fapi.binance.com/fapi/v1/klines",
-                    params={"symbol": symbol, "interval": interval, "limit": 100},
-                    timeout=10.0
-                )
-                candles = response.json()
-        else:
-            raise HTTPException(status_code=400, detail=f"Exchange {exchange} not yet supported for EMA calculation")
-        
-        closes = [float(candle[4]) for candle in candles]
-        
-        def calculate_ema_value(data, period):
-            multiplier = 2 / (period + 1)
-            ema = [sum(data[:period]) / period]
-            for price in data[period:]:
-                ema.append((price - ema[-1]) * multiplier + ema[-1])
-            return ema[-1]
-        
-        ema9 = calculate_ema_value(closes, 9)
-        ema21 = calculate_ema_value(closes, 21)
-        
+        # Incremental EMA state - only new candles are fetched
+        emas = await indicator_engine.get_emas("binance", symbol, interval, (9, 21), live=True)
+        if emas is None:
+            raise HTTPException(status_code=500, detail="EMA calculation failed: not enough candle data")
+
+        # Live values include the forming candle
+        ema9 = emas["emas"][9]["live"]
+        ema21 = emas["emas"][21]["live"]
+
         signal = "BUY" if ema9 > ema21 else "SELL" if ema9 < ema21 else "NEUTRAL"
-        
+
         return {
             "symbol": symbol,
             "interval": interval,
             "ema9": round(ema9, 2),
             "ema21": round(ema21, 2),
-            "current_price": closes[-1],
+            "current_price": emas["live_close"],
             "signal": signal,
             "timestamp": datetime.utcnow().isoformat()
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"EMA calculation failed: {str(e)}")
 
@@ -366,8 +423,35 @@ async def get_trading_coins(exchange: str = "binance"):
         {"symbol": "MATICUSDT", "name": "Polygon", "min_leverage": 1, "max_leverage": 50},
     ]
     
+    # Prices from the bulk snapshot (one all-tickers call per exchange)
+    if TICKER_SNAPSHOT_AVAILABLE:
+        try:
+            snapshot = await ticker_snapshot.get_prices(exchange, [c["symbol"] for c in popular_coins])
+            for coin in popular_coins:
+                ticker = snapshot["tickers"].get(coin["symbol"])
+                coin["price"] = ticker["last"] if ticker else None
+        except Exception as e:
+            print(f"Coin prices unavailable for {exchange}: {e}")
+    
     return {"coins": popular_coins, "exchange": exchange}
 
+@app.get("/api/market/tickers")
+async def get_market_tickers(symbols: str, exchange: str = "binance", current_user: dict = Depends(get_current_user)):
+    """Prices for many symbols at once, served from the bulk ticker snapshot"""
+    if not TICKER_SNAPSHOT_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Ticker snapshot not available")
+    
+    symbol_list = [s.strip() for s in symbols.split(",") if s.strip()]
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(symbol_list) > 500:
+        raise HTTPException(status_code=400, detail="Maximum 500 symbols per request")
+    
+    try:
+        return await ticker_snapshot.get_prices(exchange, symbol_list)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.post("/api/auth/register")
 async def register(user: UserRegister):
     """Register new user"""
@@ -403,11 +487,11 @@ async def add_api_key(api_input: APIKeyInput, current_user: dict = Depends(get_c
     # Check subscription plan and exchange limits
     if firebase_available:
         user_id = current_user.get("user_id")
-        subscription = get_user_subscription(user_id)
+        subscription = await get_user_subscription(user_id)
         user_tier = subscription.get('tier', 'free') if subscription else 'free'
 
         # Get current exchanges count
-        current_exchanges = get_all_user_exchanges(user_id)
+        current_exchanges = await get_all_user_exchanges(user_id)
         exchange_count = len(current_exchanges)
 
         # Free plan: 1 exchange only
@@ -442,7 +526,7 @@ async def add_api_key(api_input: APIKeyInput, current_user: dict = Depends(get_c
     # Save to Firebase or mock
     saved = False
     if firebase_available:
-        saved = save_user_api_keys(
+        saved = await save_user_api_keys(
             user_id=current_user.get("user_id"),
             exchange=exchange,
             api_key=api_input.api_key,
@@ -466,7 +550,7 @@ async def get_api_keys(current_user: dict = Depends(get_current_user)):
     """Get user's connected exchanges"""
     try:
         from backend.firebase_admin import get_all_user_exchanges
-        exchanges = get_all_user_exchanges(current_user.get("user_id"))
+        exchanges = await get_all_user_exchanges(current_user.get("user_id"))
     except ImportError:
         exchanges = []
     
@@ -476,8 +560,12 @@ async def get_api_keys(current_user: dict = Depends(get_current_user)):
 async def remove_api_key(exchange_id: str, current_user: dict = Depends(get_current_user)):
     """Remove exchange API key"""
     try:
-        from backend.firebase_admin import delete_user_api_keys
-        deleted = delete_user_api_keys(current_user.get("user_id"), exchange_id)
+        from backend.firebase_admin import delete_user_api_keys, get_user_api_keys
+        api_keys = await get_user_api_keys(current_user.get("user_id"), exchange_id)
+        deleted = await delete_user_api_keys(current_user.get("user_id"), exchange_id)
+        if deleted and api_keys and api_keys.get("api_key"):
+            # Removed keys are not kept in the adapter cache
+            http_pool.forget_service(exchange_id.lower(), api_keys["api_key"])
     except ImportError:
         deleted = True
     
@@ -489,6 +577,31 @@ async def get_ema_signal(request: EMARequest, current_user: dict = Depends(get_c
     result = await calculate_ema(request.exchange, request.symbol, request.interval)
     return result
 
+@app.post("/api/bot/ema-scan")
+async def scan_ema_signals(request: EMAScanRequest, current_user: dict = Depends(get_current_user)):
+    """Market-wide EMA9/EMA21 crossover scan (one vectorized pass over all symbols)"""
+    if not INDICATORS_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Vectorized indicators not available")
+    if not request.symbols:
+        raise HTTPException(status_code=400, detail="At least one symbol is required")
+    if len(request.symbols) > 200:
+        raise HTTPException(status_code=400, detail="Maximum 200 symbols per scan")
+
+    try:
+        results = await scan_ema_crossovers(request.exchange.lower(), request.symbols, request.interval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"EMA scan failed: {str(e)}")
+
+    return {
+        "exchange": request.exchange,
+        "interval": request.interval,
+        "results": results,
+        "signals": [r for r in results if r["signal"]],
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @app.get("/api/bot/positions")
 async def get_positions(current_user: dict = Depends(get_current_user), exchange: Optional[str] = None):
     """Get user's open positions"""
@@ -507,7 +620,7 @@ async def create_position(position: PositionRequest, current_user: dict = Depend
         # Get API keys from Firebase
         try:
             from backend.firebase_admin import get_user_api_keys
-            api_keys = get_user_api_keys(user_id, exchange)
+            api_keys = await get_user_api_keys(user_id, exchange)
             if not api_keys:
                 raise HTTPException(status_code=404, detail=f"API keys not found for {exchange}")
 
@@ -562,6 +675,8 @@ async def create_position(position: PositionRequest, current_user: dict = Depend
         if not order_result:
             raise HTTPException(status_code=500, detail="Order creation failed")
 
+        account_state.invalidate_user(user_id, exchange)
+
         return {
             "success": True,
             "message": "Position created successfully",
@@ -630,9 +745,7 @@ async def payment_webhook(payload: dict):
             try:
                 from backend.firebase_admin import firebase_initialized
                 if firebase_initialized:
-                    from firebase_admin import db as firebase_db
-                    user_ref = firebase_db.reference(f'subscriptions/{user_email.replace(".", "_")}')
-                    user_ref.set({
+                    await firebase_repository.set(f'subscriptions/{user_email.replace(".", "_")}', {
                         'plan': plan,
                         'status': 'active',
                         'order_id': order_id,
@@ -663,9 +776,7 @@ async def payment_webhook(payload: dict):
             try:
                 from backend.firebase_admin import firebase_initialized
                 if firebase_initialized:
-                    from firebase_admin import db as firebase_db
-                    user_ref = firebase_db.reference(f'subscriptions/{customer_email.replace(".", "_")}')
-                    user_ref.update({
+                    await firebase_repository.update(f'subscriptions/{customer_email.replace(".", "_")}', {
                         'plan': 'free',
                         'status': 'cancelled',
                         'cancelled_at': int(time.time())
@@ -688,10 +799,8 @@ async def get_subscription(current_user: dict = Depends(get_current_user)):
     try:
         from backend.firebase_admin import firebase_initialized
         if firebase_initialized:
-            from firebase_admin import db as firebase_db
             user_email = current_user.get("email", "").replace(".", "_")
-            user_ref = firebase_db.reference(f'subscriptions/{user_email}')
-            subscription = user_ref.get()
+            subscription = await firebase_repository.get(f'subscriptions/{user_email}')
             
             if subscription:
                 return subscription
@@ -708,25 +817,32 @@ async def get_subscription(current_user: dict = Depends(get_current_user)):
 @app.websocket("/ws/signals")
 async def websocket_signals(websocket: WebSocket):
     """
-    WebSocket endpoint for broadcasting trading signals to all connected clients
-    Supports 1000+ concurrent connections
+    WebSocket endpoint for trading signals, arbitrage and private user updates
+    Supports 1000+ concurrent connections (sends go through per-client queues)
+    Clients subscribe to topics; see backend/websocket_manager.py for the protocol
     """
     if not WEBSOCKET_AVAILABLE:
         await websocket.close(code=1011, reason="WebSocket not available")
         return
 
+    async def authenticate(token: str) -> dict:
+        return await get_current_user(f"Bearer {token}")
+
     await connection_manager.connect(websocket)
 
+    # Optional auth on connect (?token=...) - joins the private user:<id> topic
+    token = websocket.query_params.get("token")
+    if token:
+        await connection_manager.handle_client_message(
+            websocket, json.dumps({"action": "auth", "token": token}), authenticate
+        )
+
     try:
-        # Keep connection alive and listen for ping/pong
+        # Listen for ping and subscribe/unsubscribe/auth messages
         while True:
             try:
-                # Wait for messages (ping/pong to keep connection alive)
                 data = await websocket.receive_text()
-
-                # Handle ping/pong
-                if data == "ping":
-                    await websocket.send_text("pong")
+                await connection_manager.handle_client_message(websocket, data, authenticate)
 
             except WebSocketDisconnect:
                 break
@@ -745,27 +861,70 @@ async def websocket_stats():
 
     return connection_manager.get_stats()
 
-@app.get("/api/bot/transactions")
-async def get_transactions(hours: int = 24, current_user: dict = Depends(get_current_user)):
-    """Get user's transaction history"""
-    try:
-        from backend.firebase_admin import get_user_trades
-        user_id = current_user.get("user_id") or current_user.get("id")
+@app.get("/api/firebase/stats")
+async def firebase_stats():
+    """Firebase call latencies per operation and write-behind queue metrics"""
+    from backend.firebase_batcher import firebase_batcher
+    return {
+        "repository": firebase_repository.get_stats(),
+        "batcher": firebase_batcher.get_stats()
+    }
 
-        # Get trades from Firebase
-        trades = get_user_trades(user_id, hours)
+@app.get("/api/rate-limits/stats")
+async def rate_limit_stats():
+    """Shared exchange request budgets: available weight, queue depth and waits"""
+    from backend.services.rate_limiter import rate_limiter
+    return rate_limiter.get_stats()
 
-        return {
-            "transactions": trades,
-            "count": len(trades)
-        }
+@app.get("/api/binance-clients/stats")
+async def binance_client_pool_stats():
+    """Pooled Binance sessions: open, in use, reused and evicted clients"""
+    from backend.services.binance_client_pool import binance_client_pool
+    return binance_client_pool.get_stats()
+
+@app.get("/api/bot/transactions")
+async def get_transactions(
+    hours: int = 24,
+    limit: int = settings.TRADE_HISTORY_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get user's transaction history, newest first (pass next_cursor for the next page)"""
+    from backend.firebase_admin import get_user_trades
+    user_id = current_user.get("user_id") or current_user.get("id")
+    limit = max(1, min(limit, settings.TRADE_HISTORY_MAX_PAGE_SIZE))
+
+    try:
+        # Get one page of trades from Firebase
+        page = await get_user_trades(user_id, hours, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"Error fetching transactions: {e}")
         # Return empty list if error
-        return {
-            "transactions": [],
-            "count": 0
-        }
+        page = {"trades": [], "next_cursor": None}
+
+    return {
+        "transactions": page["trades"],
+        "count": len(page["trades"]),
+        "next_cursor": page["next_cursor"]
+    }
+
+@app.get("/api/bot/trades")
+async def get_bot_trades(
+    limit: int = settings.TRADE_HISTORY_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """Trades executed by the user's bots (per-user ledger), newest first"""
+    from backend.firebase_admin import get_user_bot_trades
+    user_id = current_user.get("user_id") or current_user.get("id")
+    limit = max(1, min(limit, settings.TRADE_HISTORY_MAX_PAGE_SIZE))
+
+    trades = await get_user_bot_trades(user_id, limit)
+    return {
+        "trades": trades,
+        "count": len(trades)
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,171 @@
+"""
+Pub/Sub Brokers for WebSocket Fan-out
+Lets every worker process deliver messages published in any other worker.
+
+- InProcessBroker: single process, nothing leaves the process (default)
+- RedisBroker: Redis (or any Redis-protocol server, incl. unix:// sockets)
+  channel shared by all workers and instances
+- Selected by settings.PUBSUB_URL; falls back to in-process if the redis
+  package is missing or the server does not answer a PING at startup
+
+Local clients are always served directly by the publishing process; the
+broker only carries messages to the *other* processes (origin filtering).
+"""
+import asyncio
+import json
+import logging
+import uuid
+from typing import Awaitable, Callable, List, Optional
+
+from backend.config import settings
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# on_message(topics, payload) - payload is the serialized JSON text frame
+RemoteMessageHandler = Callable[[List[str], str], Awaitable[None]]
+
+
+class InProcessBroker:
+    """No-op broker for a single worker"""
+
+    distributed = False
+
+    def __init__(self):
+        self.published = 0
+
+    async def start(self, on_message: RemoteMessageHandler):
+        pass
+
+    def publish(self, topics: List[str], payload: str):
+        self.published += 1
+
+    async def close(self):
+        pass
+
+    def get_stats(self) -> dict:
+        return {"backend": "in-process", "published": self.published}
+
+
+class RedisBroker:
+    """Redis channel fan-out between processes"""
+
+    distributed = True
+
+    def __init__(self, url: str, channel: str = None):
+        self.url = url
+        self.channel = channel or settings.PUBSUB_CHANNEL
+        self.origin = uuid.uuid4().hex
+        self.client = None
+        self.on_message: Optional[RemoteMessageHandler] = None
+
+        # Outbound messages keep their order through a single forwarder
+        self._outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.PUBSUB_OUTBOX_SIZE)
+        self._tasks: List[asyncio.Task] = []
+        self.stats = {"published": 0, "received": 0, "dropped": 0, "errors": 0}
+
+    async def start(self, on_message: RemoteMessageHandler):
+        """Connect and start forwarding; raises if the server is unreachable"""
+        self.on_message = on_message
+        self.client = aioredis.from_url(self.url)
+        try:
+            # from_url() is lazy - make sure the server is really there
+            await asyncio.wait_for(self.client.ping(), timeout=5.0)
+        except BaseException:
+            await self.close()
+            raise
+        self._tasks = [
+            asyncio.create_task(self._forward()),
+            asyncio.create_task(self._listen())
+        ]
+        logger.info(f"✅ Redis pub/sub broker started (channel: {self.channel})")
+
+    def publish(self, topics: List[str], payload: str):
+        """Queue a message for the other processes (never blocks)"""
+        envelope = json.dumps({"origin": self.origin, "topics": topics, "payload": payload})
+        try:
+            self._outbox.put_nowait(envelope)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    async def _forward(self):
+        while True:
+            envelope = await self._outbox.get()
+            try:
+                await self.client.publish(self.channel, envelope)
+                self.stats["published"] += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Pub/sub publish failed: {e}")
+
+    async def _listen(self):
+        from backend.services.market_data_hub import jittered_backoff
+
+        attempt = 0
+        while True:
+            try:
+                async with self.client.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    attempt = 0
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            await self._handle(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                wait_time = jittered_backoff(attempt, cap=30)
+                attempt += 1
+                logger.error(f"❌ Pub/sub subscription lost: {e} - retrying in {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+
+    async def _handle(self, data):
+        try:
+            envelope = json.loads(data)
+        except ValueError:
+            return
+        if envelope.get("origin") == self.origin:
+            return
+
+        self.stats["received"] += 1
+        try:
+            await self.on_message(envelope["topics"], envelope["payload"])
+        except Exception as e:
+            logger.error(f"❌ Pub/sub delivery failed: {e}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self.client is not None:
+            try:
+                await self.client.aclose()
+            except Exception as e:
+                logger.error(f"❌ Error closing Redis pub/sub client: {e}")
+            self.client = None
+
+    def get_stats(self) -> dict:
+        return {"backend": "redis", "channel": self.channel, "outbox": self._outbox.qsize(), **self.stats}
+
+
+def create_broker(url: Optional[str] = None):
+    """Broker for PUBSUB_URL (empty -> in-process)"""
+    url = settings.PUBSUB_URL if url is None else url
+    if not url:
+        return InProcessBroker()
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if REDIS_AVAILABLE:
+            return RedisBroker(url)
+        logger.warning("⚠️ PUBSUB_URL set but redis package not installed - using in-process broker")
+        return InProcessBroker()
+
+    logger.warning("⚠️ Unsupported PUBSUB_URL scheme - using in-process broker")
+    return InProcessBroker()
@@ -0,0 +1,149 @@
+"""
+Account State Cache
+Per-user balances and positions, shared by bots and API routes.
+
+- Keyed by (user_id, exchange, market, network, kind): one entry serves
+  BotCore, the bot start pre-check, /api/bot/balance and
+  /api/integrations/health; testnet and live balances never mix
+- TTL per kind (CACHE_DURATION_BALANCE / CACHE_DURATION_POSITION)
+- Single-flight: concurrent refreshes of one key share a single signed request
+- invalidate_user() drops a user's entries on order events; a refresh that was
+  already running when the order went in is not stored
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+StateKey = Tuple[str, str, str, str, str]
+StateFetcher = Callable[[], Awaitable[Any]]
+
+
+def _key(user_id: str, exchange_name: str, is_futures: bool, testnet: bool, kind: str) -> StateKey:
+    return (str(user_id), exchange_name.lower(), "futures" if is_futures else "spot",
+            "testnet" if testnet else "mainnet", kind)
+
+
+class AccountStateCache:
+    """TTL cache of per-user account data with request coalescing"""
+
+    def __init__(self, balance_ttl: float = None, position_ttl: float = None):
+        self.balance_ttl = settings.CACHE_DURATION_BALANCE if balance_ttl is None else balance_ttl
+        self.position_ttl = settings.CACHE_DURATION_POSITION if position_ttl is None else position_ttl
+        # key -> (value, fetched_at)
+        self.entries: Dict[StateKey, Tuple[Any, float]] = {}
+        self._inflight: Dict[StateKey, asyncio.Task] = {}
+        # Bumped on invalidation so refreshes started before it are not cached
+        self._generations: Dict[str, int] = defaultdict(int)
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    async def get(self, key: StateKey, fetcher: StateFetcher, ttl: float, max_age: float = None) -> Any:
+        """
+        Cached value no older than `max_age` (default: ttl), or refresh it once
+        for all concurrent callers. max_age=0 forces a refresh but still joins
+        one that is already running.
+        """
+        max_age = ttl if max_age is None else max_age
+        entry = self.entries.get(key)
+        if entry and time.time() - entry[1] <= max_age:
+            self.stats["hits"] += 1
+            return entry[0]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._fetch(key, fetcher))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shield: one cancelled caller must not cancel the shared request
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: StateKey, fetcher: StateFetcher) -> Any:
+        generation = self._generations[key[0]]
+        value = await fetcher()
+        if self._generations[key[0]] == generation:
+            self.entries[key] = (value, time.time())
+        return value
+
+    async def get_balance(
+        self,
+        user_id: str,
+        exchange_name: str,
+        api_key: str,
+        api_secret: str,
+        is_futures: bool = True,
+        passphrase: str = "",
+        max_age: float = None,
+        fetcher: StateFetcher = None,
+        testnet: bool = False
+    ) -> Dict:
+        """
+        Normalized balance ({"total", "available", "currency", ...})
+
+        The default fetcher is unified_exchange.get_balance (live endpoints
+        only); BinanceClient passes its own so bots reuse their signed session
+        on the network they trade on.
+        """
+        if fetcher is None:
+            if testnet:
+                raise ValueError("A testnet balance needs an explicit fetcher")
+            from backend.services.unified_exchange import unified_exchange
+
+            async def fetcher():
+                return await unified_exchange.get_balance(
+                    exchange=exchange_name,
+                    api_key=api_key,
+                    api_secret=api_secret,
+                    is_futures=is_futures,
+                    passphrase=passphrase
+                )
+
+        key = _key(user_id, exchange_name, is_futures, testnet, "balance")
+        return await self.get(key, fetcher, self.balance_ttl, max_age)
+
+    async def get_positions(
+        self,
+        user_id: str,
+        exchange_name: str,
+        symbol: str,
+        fetcher: StateFetcher,
+        is_futures: bool = True,
+        max_age: float = None,
+        testnet: bool = False
+    ) -> List[Dict]:
+        """Open positions of one symbol"""
+        key = _key(user_id, exchange_name, is_futures, testnet, f"positions:{symbol.upper()}")
+        return await self.get(key, fetcher, self.position_ttl, max_age)
+
+    def invalidate_user(self, user_id: str, exchange_name: str = None):
+        """Drop a user's cached state (all exchanges unless one is given) after an order event"""
+        user_id = str(user_id)
+        exchange_name = exchange_name.lower() if exchange_name else None
+        self._generations[user_id] += 1
+        for store in (self.entries, self._inflight):
+            for key in [k for k in store if k[0] == user_id and (exchange_name is None or k[1] == exchange_name)]:
+                # In-flight tasks keep running for their callers; new callers start fresh
+                del store[key]
+        self.stats["invalidations"] += 1
+
+    def get_stats(self) -> Dict:
+        """Cache statistics"""
+        return {
+            **self.stats,
+            "entries": len(self.entries),
+            "inflight": len(self._inflight),
+            "balance_ttl": self.balance_ttl,
+            "position_ttl": self.position_ttl
+        }
+
+
+# Singleton instance
+account_state = AccountStateCache()
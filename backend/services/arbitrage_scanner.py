@@ -0,0 +1,212 @@
+"""
+Arbitrage Scanner
+Cross-exchange spread detection over streaming top-of-book quotes.
+
+- Best bid/ask per (symbol, exchange) in NumPy matrices, fed by book_feeds
+- Seeded from the bulk ticker snapshot so results exist before streams warm up
+- Each quote re-evaluates only its own symbol row (5x5 buy/sell matrix)
+- Opportunities above ARBITRAGE_MIN_PROFIT_PERCENT are pushed over /ws/signals
+  (type "arbitrage")
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.services.book_feeds import BOOK_FEEDS
+from backend.services.ticker_snapshot import SUPPORTED_EXCHANGES, ticker_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class ArbitrageScanner:
+    """Shared arbitrage engine for a symbol universe across all exchanges"""
+
+    EXCHANGES = SUPPORTED_EXCHANGES
+
+    def __init__(self):
+        self.min_profit_percent = settings.ARBITRAGE_MIN_PROFIT_PERCENT
+        self.max_quote_age = settings.ARBITRAGE_MAX_QUOTE_AGE
+        self.publish_interval = settings.ARBITRAGE_PUBLISH_INTERVAL
+        self.max_symbols = settings.ARBITRAGE_MAX_SYMBOLS
+
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.exchange_index = {name: i for i, name in enumerate(self.EXCHANGES)}
+        # rows: symbols, columns: exchanges
+        self.bids = np.full((0, len(self.EXCHANGES)), np.nan)
+        self.asks = np.full((0, len(self.EXCHANGES)), np.nan)
+        self.quote_times = np.zeros((0, len(self.EXCHANGES)))
+
+        self.feeds = {name: feed_cls(self.on_quote) for name, feed_cls in BOOK_FEEDS.items()}
+        self.opportunities: Dict[str, Dict] = {}
+        self._last_published: Dict[str, Dict] = {}
+        self.is_running = False
+        self._lock = asyncio.Lock()
+        self.stats = {"quotes": 0, "evaluations": 0, "published": 0}
+
+    async def start(self, symbols: Optional[Iterable[str]] = None):
+        """Start streaming (default universe from ARBITRAGE_SYMBOLS)"""
+        if symbols is None:
+            symbols = [s for s in settings.ARBITRAGE_SYMBOLS.split(",") if s.strip()]
+        self.is_running = True
+        # Seed quotes from the all-tickers snapshots first
+        await asyncio.gather(
+            *(ticker_snapshot.get_table(name, wait=5.0) for name in self.EXCHANGES),
+            return_exceptions=True
+        )
+        await self.add_symbols(symbols)
+
+    async def add_symbols(self, symbols: Iterable[str]) -> List[str]:
+        """Grow the universe; returns the symbols that were added"""
+        async with self._lock:
+            new = []
+            for symbol in symbols:
+                symbol = symbol.strip().upper().replace("/", "")
+                if symbol and symbol not in self.index and symbol not in new:
+                    new.append(symbol)
+            new = new[:max(0, self.max_symbols - len(self.symbols))]
+            if not new:
+                return []
+
+            for symbol in new:
+                self.index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            rows = np.full((len(new), len(self.EXCHANGES)), np.nan)
+            self.bids = np.vstack([self.bids, rows])
+            self.asks = np.vstack([self.asks, rows])
+            self.quote_times = np.vstack([self.quote_times, np.zeros_like(rows)])
+
+            self._seed_from_snapshot(new)
+
+            for name, feed in self.feeds.items():
+                try:
+                    await feed.add_symbols(new)
+                except Exception as e:
+                    logger.error(f"❌ {name} book feed subscribe failed: {e}")
+
+            logger.info(f"📈 Arbitrage scanner tracking {len(self.symbols)} symbols (+{len(new)})")
+            return new
+
+    def _seed_from_snapshot(self, symbols: List[str]):
+        for name, table in ticker_snapshot.tables.items():
+            col = self.exchange_index.get(name)
+            if col is None:
+                continue
+            rows = np.array([self.index[s] for s in symbols])
+            self.bids[rows, col] = table.column("bid", symbols)
+            self.asks[rows, col] = table.column("ask", symbols)
+            self.quote_times[rows, col] = table.updated_at
+
+        for symbol in symbols:
+            self._evaluate(self.index[symbol], publish=False)
+
+    def on_quote(self, exchange_name: str, symbol: str, bid: Optional[float], ask: Optional[float]):
+        """Book feed callback - update one cell and re-evaluate its symbol"""
+        row = self.index.get(symbol)
+        col = self.exchange_index.get(exchange_name)
+        if row is None or col is None:
+            return
+
+        self.stats["quotes"] += 1
+        if bid is not None:
+            self.bids[row, col] = bid
+        if ask is not None:
+            self.asks[row, col] = ask
+        self.quote_times[row, col] = time.time()
+        self._evaluate(row)
+
+    def _evaluate(self, row: int, publish: bool = True):
+        self.stats["evaluations"] += 1
+        symbol = self.symbols[row]
+
+        fresh = (time.time() - self.quote_times[row]) <= self.max_quote_age
+        bids = np.where(fresh, self.bids[row], np.nan)
+        asks = np.where(fresh, self.asks[row], np.nan)
+
+        # profit[i, j]: buy on exchange i at its ask, sell on exchange j at its bid
+        with np.errstate(invalid="ignore", divide="ignore"):
+            profit = (bids[None, :] - asks[:, None]) / asks[:, None] * 100
+        np.fill_diagonal(profit, np.nan)
+
+        if np.all(np.isnan(profit)):
+            self.opportunities.pop(symbol, None)
+            return
+
+        buy, sell = np.unravel_index(np.nanargmax(profit), profit.shape)
+        profit_percent = float(profit[buy, sell])
+        if profit_percent <= 0:
+            self.opportunities.pop(symbol, None)
+            return
+
+        opportunity = {
+            "id": f"{symbol}:{self.EXCHANGES[buy]}:{self.EXCHANGES[sell]}",
+            "symbol": symbol,
+            "buy_exchange": self.EXCHANGES[buy],
+            "buy_price": float(asks[buy]),
+            "sell_exchange": self.EXCHANGES[sell],
+            "sell_price": float(bids[sell]),
+            "profit": float(bids[sell] - asks[buy]),
+            "profit_percent": round(profit_percent, 4),
+            "timestamp": int(time.time() * 1000)
+        }
+        self.opportunities[symbol] = opportunity
+
+        # Every positive spread is queryable; only those above the threshold are pushed
+        if publish and profit_percent >= self.min_profit_percent and self._should_publish(opportunity):
+            self._last_published[symbol] = opportunity
+            self.stats["published"] += 1
+            asyncio.create_task(self._publish(opportunity))
+
+    def _should_publish(self, opportunity: Dict) -> bool:
+        last = self._last_published.get(opportunity["symbol"])
+        if last is None or last["id"] != opportunity["id"]:
+            return True
+        if (opportunity["timestamp"] - last["timestamp"]) / 1000 < self.publish_interval:
+            return False
+        return abs(opportunity["profit_percent"] - last["profit_percent"]) >= 0.01
+
+    async def _publish(self, opportunity: Dict):
+        try:
+            from backend.websocket_manager import connection_manager
+            await connection_manager.broadcast_arbitrage(opportunity)
+        except Exception as e:
+            logger.error(f"Failed to broadcast arbitrage opportunity: {e}")
+
+    def get_opportunities(self, min_profit_percent: Optional[float] = None,
+                          symbols: Optional[Iterable[str]] = None) -> List[Dict]:
+        """Current opportunities, best first"""
+        threshold = self.min_profit_percent if min_profit_percent is None else min_profit_percent
+        wanted = {s.upper().replace("/", "") for s in symbols} if symbols else None
+        now_ms = time.time() * 1000
+        result = [
+            o for o in self.opportunities.values()
+            if o["profit_percent"] >= threshold
+            and (wanted is None or o["symbol"] in wanted)
+            and now_ms - o["timestamp"] <= self.max_quote_age * 1000
+        ]
+        return sorted(result, key=lambda o: o["profit_percent"], reverse=True)
+
+    def get_stats(self) -> Dict:
+        """Scanner statistics"""
+        return {
+            **self.stats,
+            "running": self.is_running,
+            "symbols": len(self.symbols),
+            "opportunities": len(self.opportunities),
+            "feeds": {name: feed.get_stats() for name, feed in self.feeds.items()}
+        }
+
+    async def stop(self):
+        """Close every book feed"""
+        self.is_running = False
+        for feed in self.feeds.values():
+            await feed.stop()
+        logger.info("Arbitrage scanner stopped")
+
+
+# Singleton instance
+arbitrage_scanner = ArbitrageScanner()
@@ -2,75 +2,121 @@
 import asyncio
 import math
 import time
-from typing import Dict, Set, Callable, Optional
-from collections import defaultdict, deque
-from dataclasses import dataclass
-from binance import AsyncClient, BinanceSocketManager
+import weakref
+from datetime import datetime
+from typing import Awaitable, Dict, List, Set, Callable, Optional
+from collections import defaultdict
+from binance import AsyncClient
 from binance.exceptions import BinanceAPIException, BinanceRequestException
 from .config import settings
 from .utils.logger import get_logger
+from .market_data_hub import market_data_hub
+from .candle_store import candle_store
+from .ticker_cache import ticker_cache
+from .rate_limiter import rate_limiter, RequestPriority
+from .user_data_stream import user_data_streams
+from .account_state import account_state
+from .binance_client_pool import binance_client_pool
 
 logger = get_logger("binance_client")
 
-@dataclass
-class RateLimit:
-    requests_per_minute: int
-    requests_per_second: int
-    weight: int = 1
-
 class BinanceRateLimiter:
-    """Binance API rate limiting - per user tracking"""
+    """Binance API rate limiting - shared per-IP weight budget (rate_limiter)"""
     
     def __init__(self):
+        # endpoint_type -> (weight, priority class)
         self.limits = {
-            'default': RateLimit(1200, 10, 1),
-            'order': RateLimit(50, 5, 5),
-            'account': RateLimit(600, 5, 5),
-            'position': RateLimit(300, 3, 2),
-            'balance': RateLimit(300, 3, 2),
+            'default': (1, RequestPriority.INFO),
+            'order': (1, RequestPriority.EXECUTION),
+            'account': (5, RequestPriority.RISK),
+            'position': (5, RequestPriority.RISK),
+            'open_orders': (1, RequestPriority.RISK),
+            'trades': (5, RequestPriority.RISK),
+            'exchange_info': (1, RequestPriority.RISK),
+            'balance': (5, RequestPriority.INFO),
         }
+        # AsyncClient -> son işlenen response (header'lar bir kez okunur)
+        self._seen_responses: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    
+    def _sync_headers(self, client: AsyncClient):
+        """Önceki yanıtın X-MBX-USED-WEIGHT-1M / Retry-After header'larını limiter'a aktar"""
+        response = getattr(client, 'response', None)
+        if response is None or self._seen_responses.get(client) is response:
+            return
+        self._seen_responses[client] = response
+        status = getattr(response, 'status', None) or getattr(response, 'status_code', 200)
+        rate_limiter.update_from_headers('binance', response.headers, status)
+    
+    async def wait_if_needed(
+        self,
+        endpoint_type: str = 'default',
+        user_id: str = None,
+        client: AsyncClient = None,
+        priority: RequestPriority = None
+    ):
+        """
+        Rate limit kontrolü - tüm kullanıcılar aynı IP bütçesini paylaşır
+        priority: endpoint'in varsayılan sınıfını ezer (ör. emir öncesi bakiye -> EXECUTION)
+        INFO istekleri baskı altında RequestShedError ile düşürülebilir
+        """
+        weight, default_priority = self.limits.get(endpoint_type, self.limits['default'])
+        priority = default_priority if priority is None else priority
+        if client is not None:
+            self._sync_headers(client)
         
-        self.request_times: Dict[str, deque] = defaultdict(lambda: deque())
-        self.weights_used: Dict[str, deque] = defaultdict(lambda: deque())
+        waited = await rate_limiter.acquire('binance', weight, priority, user_id)
+        if waited > 1:
+            logger.warning(f"Rate limit hit for {user_id} - waited {waited:.2f}s ({endpoint_type})")
+
+
+PriceCallback = Callable[[str, float], Awaitable[None]]
+
+
+class PriceSubscription:
+    """
+    Tek bir fiyat dinleyicisi - coalescing
+    Dinleyici meşgulken gelen tick'ler birikmez, sadece en son fiyat saklanır.
+    """
     
-    async def wait_if_needed(self, endpoint_type: str = 'default', user_id: str = None):
-        """Rate limit kontrolü"""
-        limit = self.limits.get(endpoint_type, self.limits['default'])
-        current_time = time.time()
-        
-        key = f"{user_id}_{endpoint_type}" if user_id else endpoint_type
-        
-        # Eski istekleri temizle (1 dakika)
-        cutoff_time = current_time - 60
-        while self.request_times[key] and self.request_times[key][0] < cutoff_time:
-            self.request_times[key].popleft()
-            if self.weights_used[key]:
-                self.weights_used[key].popleft()
+    def __init__(self, symbol: str, callback: PriceCallback):
+        self.symbol = symbol
+        self.callback = callback
+        self.pending_price: Optional[float] = None
+        self.delivered = 0
+        self.coalesced = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    def push(self, price: float):
+        """Yeni fiyatı bırak - drain task yoksa başlat"""
+        if self.pending_price is not None:
+            self.coalesced += 1
+        self.pending_price = price
         
-        # Weight kontrolü
-        weight_in_minute = sum(self.weights_used[key])
-        if weight_in_minute >= limit.requests_per_minute:
-            wait_time = 60 - (current_time - self.request_times[key][0])
-            if wait_time > 0:
-                logger.warning(f"Rate limit hit for {user_id} - waiting {wait_time:.2f}s")
-                await asyncio.sleep(wait_time)
-        
-        # Saniye başına istek kontrolü
-        requests_in_second = len([t for t in self.request_times[key] if current_time - t < 1])
-        if requests_in_second >= limit.requests_per_second:
-            await asyncio.sleep(1.1)
-        
-        # İsteği kaydet
-        self.request_times[key].append(current_time)
-        self.weights_used[key].append(limit.weight)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+    
+    async def _drain(self):
+        while self.pending_price is not None:
+            price = self.pending_price
+            self.pending_price = None
+            try:
+                await self.callback(self.symbol, price)
+                self.delivered += 1
+            except Exception as e:
+                logger.error(f"❌ Price listener error for {self.symbol}: {e}")
+    
+    def cancel(self):
+        self.pending_price = None
+        if self._task and not self._task.done():
+            self._task.cancel()
 
 
 class PriceManager:
     """
-    Singleton WebSocket Price Manager - FIXED VERSION
-    ✅ WebSocket timeout düzeltildi
-    ✅ Ping/pong mekanizması eklendi
-    ✅ Reconnection logic iyileştirildi
+    Singleton WebSocket Price Manager
+    ✅ Tüm semboller paylaşılan MarketDataHub üzerinden (combined stream)
+    ✅ Sembol başına referans sayımı - son kullanıcı çıkınca stream kapanır
+    ✅ Reconnect + resubscribe hub tarafından yönetilir
     """
     _instance = None
     _initialized = False
@@ -85,9 +131,9 @@ class PriceManager:
             self.prices: Dict[str, float] = {}
             self.price_timestamps: Dict[str, float] = {}
             self.subscribed_symbols: Set[str] = set()
-            self.client: Optional[AsyncClient] = None
-            self.bm: Optional[BinanceSocketManager] = None
-            self.websocket_tasks: Dict[str, asyncio.Task] = {}
+            self.symbol_refcounts: Dict[str, int] = defaultdict(int)
+            self.listeners: Dict[str, List[PriceSubscription]] = defaultdict(list)
+            self.hub = market_data_hub
             self.is_running = False
             self._lock = asyncio.Lock()
             PriceManager._initialized = True
@@ -95,93 +141,39 @@ class PriceManager:
     async def initialize(self):
         """WebSocket manager'ı başlat"""
         async with self._lock:
-            if self.is_running:
-                return True
-                
-            try:
-                # Public client (API key gerekmez)
-                self.client = await AsyncClient.create(
-                    testnet=settings.ENVIRONMENT == "TEST"
-                )
-                self.bm = BinanceSocketManager(self.client)
+            if not self.is_running:
                 self.is_running = True
-                
                 logger.info("✅ PriceManager initialized successfully")
-                return True
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize PriceManager: {e}")
-                return False
+            return True
     
     async def subscribe_symbol(self, symbol: str):
-        """Symbol'e abone ol"""
+        """Symbol'e abone ol (referans sayımlı)"""
         async with self._lock:
-            if symbol not in self.subscribed_symbols and self.is_running:
+            if not self.is_running:
+                return
+            
+            self.symbol_refcounts[symbol] += 1
+            if symbol not in self.subscribed_symbols:
                 self.subscribed_symbols.add(symbol)
-                
-                # Bu symbol için WebSocket başlat
-                task_name = f"ws_{symbol}"
-                if task_name not in self.websocket_tasks:
-                    self.websocket_tasks[task_name] = asyncio.create_task(
-                        self._symbol_websocket(symbol)
-                    )
-                
+                await self.hub.subscribe(f"{symbol.lower()}@ticker", self._handle_price_update)
                 logger.info(f"✅ Subscribed to {symbol} price stream")
     
-    async def _symbol_websocket(self, symbol: str):
-        """
-        🔧 FIXED: WebSocket stream with improved timeout handling
-        """
-        retry_count = 0
-        max_retries = 10  # 5 → 10 (daha fazla deneme)
-        
-        while self.is_running and retry_count < max_retries:
-            try:
-                stream_name = f"{symbol.lower()}@ticker"
-                
-                # ✅ FIX: ping_interval ve ping_timeout eklendi
-                async with self.bm.symbol_ticker_socket(symbol) as stream:
-                    logger.info(f"✅ WebSocket connected for {symbol}")
-                    retry_count = 0  # Başarılı bağlantıda retry'ı sıfırla
-                    last_message_time = time.time()
-                    
-                    while self.is_running:
-                        try:
-                            # ✅ FIX: Timeout 30 → 60 saniye
-                            msg = await asyncio.wait_for(stream.recv(), timeout=60.0)
-                            last_message_time = time.time()
-                            await self._handle_price_update(msg)
-                            
-                        except asyncio.TimeoutError:
-                            # ✅ FIX: Timeout artık sadece debug seviyesinde
-                            elapsed = time.time() - last_message_time
-                            
-                            if elapsed > 120:  # 2 dakikadan fazla mesaj gelmemişse
-                                logger.warning(f"⚠️ No data from {symbol} for {elapsed:.0f}s - reconnecting")
-                                break  # Yeniden bağlan
-                            else:
-                                # Normal timeout - devam et
-                                logger.debug(f"⏱️ WebSocket timeout for {symbol} ({elapsed:.0f}s) - waiting...")
-                                continue
-                                
-                        except Exception as e:
-                            logger.error(f"❌ WebSocket message error for {symbol}: {e}")
-                            break
-                            
-            except Exception as e:
-                retry_count += 1
-                logger.error(f"❌ WebSocket error for {symbol} (attempt {retry_count}/{max_retries}): {e}")
-                
-                if retry_count < max_retries:
-                    # Exponential backoff
-                    wait_time = min(2 ** retry_count, 60)  # Max 60 saniye
-                    logger.info(f"🔄 Reconnecting to {symbol} in {wait_time}s...")
-                    await asyncio.sleep(wait_time)
-                else:
-                    logger.error(f"❌ Max retries reached for {symbol} WebSocket - giving up")
-                    break
-        
-        # WebSocket kapatıldı
-        logger.info(f"🔌 WebSocket closed for {symbol}")
+    async def unsubscribe_symbol(self, symbol: str):
+        """Abonelikten çık - son kullanıcı çıkınca stream kapatılır"""
+        async with self._lock:
+            if symbol not in self.subscribed_symbols:
+                return
+            
+            self.symbol_refcounts[symbol] -= 1
+            if self.symbol_refcounts[symbol] > 0:
+                return
+            
+            del self.symbol_refcounts[symbol]
+            self.subscribed_symbols.discard(symbol)
+            self.prices.pop(symbol, None)
+            self.price_timestamps.pop(symbol, None)
+            await self.hub.unsubscribe(f"{symbol.lower()}@ticker", self._handle_price_update)
+            logger.info(f"🔌 Unsubscribed from {symbol} price stream")
     
     async def _handle_price_update(self, msg):
         """Fiyat güncellemesini işle"""
@@ -192,6 +184,14 @@ class PriceManager:
             self.prices[symbol] = price
             self.price_timestamps[symbol] = time.time()
             
+            # Ortak fiyat cache'i besle (stream futures fiyatı; testnet fiyatları cache'e yazılmaz)
+            if settings.ENVIRONMENT == "LIVE":
+                ticker_cache.put("binance", symbol, price, is_futures=True)
+            
+            # Dinleyicilere push (coalescing - yavaş dinleyici sadece son fiyatı görür)
+            for subscription in self.listeners.get(symbol, ()):
+                subscription.push(price)
+            
             # Debug log (her 60 saniyede bir)
             if int(time.time()) % 60 == 0:
                 logger.debug(f"💰 Price updated: {symbol} = ${price:.2f}")
@@ -199,6 +199,21 @@ class PriceManager:
         except Exception as e:
             logger.error(f"❌ Price update error: {e}")
     
+    def add_price_listener(self, symbol: str, callback: PriceCallback) -> PriceSubscription:
+        """Symbol için tick dinleyicisi ekle - her fiyat değişiminde callback(symbol, price)"""
+        subscription = PriceSubscription(symbol, callback)
+        self.listeners[symbol].append(subscription)
+        return subscription
+    
+    def remove_price_listener(self, subscription: PriceSubscription):
+        """Tick dinleyicisini kaldır"""
+        subscriptions = self.listeners.get(subscription.symbol)
+        if subscriptions and subscription in subscriptions:
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del self.listeners[subscription.symbol]
+        subscription.cancel()
+    
     def get_price(self, symbol: str) -> Optional[float]:
         """Cache'den fiyat al"""
         if symbol in self.prices:
@@ -210,41 +225,23 @@ class PriceManager:
         return None
     
     async def close(self):
-        """Tüm bağlantıları kapat"""
+        """Tüm abonelikleri kapat"""
         async with self._lock:
             self.is_running = False
             
-            # WebSocket task'ları iptal et
-            for task_name, task in self.websocket_tasks.items():
-                if not task.done():
-                    task.cancel()
-                    try:
-                        await task
-                    except asyncio.CancelledError:
-                        pass
-                    except Exception as e:
-                        logger.error(f"❌ Error cancelling {task_name}: {e}")
-            
-            self.websocket_tasks.clear()
-            
-            # BinanceSocketManager'ı kapat
-            if self.bm:
+            for symbol in list(self.subscribed_symbols):
                 try:
-                    if hasattr(self.bm, '_session') and self.bm._session:
-                        await self.bm._session.close()
+                    await self.hub.unsubscribe(f"{symbol.lower()}@ticker", self._handle_price_update)
                 except Exception as e:
-                    logger.error(f"❌ Error closing BinanceSocketManager: {e}")
-                finally:
-                    self.bm = None
+                    logger.error(f"❌ Error unsubscribing {symbol}: {e}")
             
-            # Client'ı kapat
-            if self.client:
-                try:
-                    await self.client.close_connection()
-                except Exception as e:
-                    logger.error(f"❌ Error closing PriceManager client: {e}")
-                finally:
-                    self.client = None
+            self.subscribed_symbols.clear()
+            self.symbol_refcounts.clear()
+            
+            for subscriptions in self.listeners.values():
+                for subscription in subscriptions:
+                    subscription.cancel()
+            self.listeners.clear()
             
             logger.info("✅ PriceManager closed")
 
@@ -268,15 +265,11 @@ class BinanceClient:
         self.exchange_info = None
         self.is_public_only = not bool(self.api_key and self.api_secret)
         self._connection_closed = False
+        self._user_stream_joined = False
         
-        # 💰 BAKİYE CACHE - Simple EMA için optimize edildi
+        # 💰 Son bilinen bakiye/pozisyonlar - asıl cache paylaşılan account_state'te
         self._last_balance_check = 0
         self._cached_balance = 0.0
-        self._balance_cache_duration = 120  # 2 dakika cache
-        self._balance_check_in_progress = False
-        
-        # Cache variables
-        self._last_position_check = {}
         self._cached_positions = {}
         
         # Shared instances oluştur
@@ -306,13 +299,11 @@ class BinanceClient:
             # Price manager'ı başlat
             await self.price_manager.initialize()
             
-            # User-specific client oluştur
+            # Havuzdan client al - aynı key'li botlar ve restart'lar açık session'ı paylaşır
             if self.client is None and not self._connection_closed:
                 if self.is_public_only:
                     # Public-only client
-                    self.client = await AsyncClient.create(
-                        testnet=self.is_testnet
-                    )
+                    self.client = await binance_client_pool.acquire(testnet=self.is_testnet)
                     logger.info(f"✅ Public BinanceClient initialized for user: {self.user_id}")
                     return True
                 else:
@@ -321,21 +312,20 @@ class BinanceClient:
                         logger.error(f"❌ API credentials missing for user: {self.user_id}")
                         return False
                     
-                    self.client = await AsyncClient.create(
-                        self.api_key, 
-                        self.api_secret, 
-                        testnet=self.is_testnet,
-                        requests_params={
-                            'timeout': 10,
-                        }
-                    )
+                    self.client = await binance_client_pool.acquire(self.api_key, self.api_secret, self.is_testnet)
                     
-                    # Test connection with account endpoint
-                    await self.rate_limiter.wait_if_needed('account', self.user_id)
-                    account_test = await self.client.futures_account()
+                    # ✅ İLK BAKİYE + bağlantı testi: başlangıç ön kontrolünün taze kaydı varsa istek yok
+                    balance = await account_state.get_balance(
+                        self.user_id, 'binance', self.api_key, self.api_secret,
+                        fetcher=lambda: self._fetch_balance(RequestPriority.RISK),
+                        testnet=self.is_testnet
+                    )
+                    self._cached_balance = balance['total']
+                    self._last_balance_check = time.time()
                     
-                    # ✅ İLK BAKİYE YÜKLEMESİ
-                    await self._load_initial_balance()
+                    # 📡 User data stream: bakiye/pozisyon/fill event'leri (kullanıcı başına tek bağlantı)
+                    await user_data_streams.start(self.user_id, self.api_key)
+                    self._user_stream_joined = True
                     
                     logger.info(f"💰 Private BinanceClient initialized for user: {self.user_id} (Balance: {self._cached_balance:.2f} USDT)")
                     return True
@@ -343,35 +333,22 @@ class BinanceClient:
         except Exception as e:
             logger.error(f"❌ Initialization failed for user {self.user_id}: {e}")
             if self.client:
-                try:
-                    await self.client.close_connection()
-                except:
-                    pass
+                # Reddedilen key'lerin session'ı havuzda tutulmaz
+                await binance_client_pool.release(self.client, discard=True)
                 self.client = None
             return False
     
-    async def _load_initial_balance(self):
-        """💰 İlk bakiye yüklemesi"""
-        try:
-            if not self.is_public_only and self.client:
-                account = await self.client.futures_account()
-                
-                for asset in account['assets']:
-                    if asset['asset'] == 'USDT':
-                        self._cached_balance = float(asset['walletBalance'])
-                        self._last_balance_check = time.time()
-                        logger.info(f"💰 Initial balance loaded: {self._cached_balance:.2f} USDT")
-                        break
-        except Exception as e:
-            logger.error(f"💰 Initial balance loading failed: {e}")
-            self._cached_balance = 0.0
-    
     async def close(self):
         """Client bağlantısını kapat"""
+        if self._user_stream_joined:
+            self._user_stream_joined = False
+            await user_data_streams.stop(self.user_id)
+        
         if not self._connection_closed and self.client:
             try:
-                await self.client.close_connection()
-                logger.info(f"✅ BinanceClient connection closed for user: {self.user_id}")
+                # Session açık kalır; CLIENT_CLEANUP_THRESHOLD boyunca yeniden kullanılabilir
+                await binance_client_pool.release(self.client)
+                logger.info(f"✅ BinanceClient released to pool for user: {self.user_id}")
             except Exception as e:
                 logger.error(f"❌ Error closing BinanceClient connection for user {self.user_id}: {e}")
             finally:
@@ -386,6 +363,22 @@ class BinanceClient:
         """Symbol fiyatlarına abone ol"""
         await self.price_manager.subscribe_symbol(symbol)
     
+    async def unsubscribe_from_symbol(self, symbol: str):
+        """Symbol fiyat aboneliğini bırak"""
+        await self.price_manager.unsubscribe_symbol(symbol)
+    
+    async def subscribe_to_candles(self, symbol: str, interval: str, listener) -> list:
+        """Paylaşılan candle store'a abone ol - mevcut mumları döndürür"""
+        return await candle_store.subscribe(symbol, interval, listener)
+    
+    async def unsubscribe_from_candles(self, symbol: str, interval: str, listener):
+        """Candle store aboneliğini bırak"""
+        await candle_store.unsubscribe(symbol, interval, listener)
+    
+    def get_cached_candles(self, symbol: str, interval: str) -> list:
+        """Candle store'daki mumlar (REST çağrısı yok)"""
+        return candle_store.get_candles(symbol, interval)
+    
     async def get_market_price(self, symbol: str):
         """Market fiyatını al - WebSocket cache priority"""
         # WebSocket cache'den dene
@@ -396,17 +389,19 @@ class BinanceClient:
         # Cache'de yoksa REST API kullan
         try:
             logger.warning(f"⚠️ Using REST API fallback for {symbol} price")
-            await self.rate_limiter.wait_if_needed('default', self.user_id)
+            await self.rate_limiter.wait_if_needed('default', self.user_id, self.client)
             ticker = await self.client.futures_symbol_ticker(symbol=symbol)
             return float(ticker['price'])
         except Exception as e:
             logger.error(f"❌ Error getting market price for {symbol}: {e}")
             return None
     
-    async def get_account_balance(self, use_cache: bool = True):
+    async def get_account_balance(self, use_cache: bool = True, priority: RequestPriority = None):
         """
         💰 BAKİYE KONTROLÜ - Simple EMA için optimize edildi
-        Cache kullanarak API çağrısını minimize eder
+        Önce user data stream, sonra paylaşılan account_state cache'i (TTL + single-flight):
+        aynı kullanıcının botları ve API route'ları tek imzalı istek paylaşır
+        priority: emir akışındaki çağrılar EXECUTION ile polling'in önüne geçer
         """
         if self.is_public_only:
             logger.warning(f"⚠️ Account balance requested for public-only client: {self.user_id}")
@@ -415,55 +410,102 @@ class BinanceClient:
         try:
             current_time = time.time()
             
-            # Cache kontrolü
-            if use_cache and current_time - self._last_balance_check < self._balance_cache_duration:
-                return self._cached_balance
+            # 📡 User data stream açıksa bakiye event'lerle güncel - REST gerekmez
+            state = user_data_streams.get_state(self.user_id)
+            streamed_balance = state.get_balance('USDT') if state else None
+            if streamed_balance is not None:
+                self._cached_balance = streamed_balance
+                self._last_balance_check = current_time
+                return streamed_balance
             
-            # Concurrent balance check kontrolü
-            if self._balance_check_in_progress:
-                # Başka bir balance check devam ediyor, cache'i döndür
-                return self._cached_balance
+            balance = await account_state.get_balance(
+                self.user_id, 'binance', self.api_key, self.api_secret,
+                max_age=None if use_cache else 0,
+                fetcher=lambda: self._fetch_balance(priority),
+                testnet=self.is_testnet
+            )
+            new_balance = balance['total']
             
-            # Balance check başlat
-            self._balance_check_in_progress = True
+            # Log balance changes
+            old_balance = self._cached_balance
+            if abs(new_balance - old_balance) > 0.1:  # 0.1 USDT'den fazla değişim
+                logger.info(f"💰 Balance updated for user {self.user_id}: {old_balance:.2f} -> {new_balance:.2f} USDT")
             
-            try:
-                await self.rate_limiter.wait_if_needed('balance', self.user_id)
-                account = await self.client.futures_account()
-                
-                # USDT balance'ı bul
-                new_balance = 0.0
-                for asset in account['assets']:
-                    if asset['asset'] == 'USDT':
-                        new_balance = float(asset['walletBalance'])
-                        break
-                
-                # Cache güncelle
-                old_balance = self._cached_balance
-                self._cached_balance = new_balance
-                self._last_balance_check = current_time
-                
-                # Log balance changes
-                if abs(new_balance - old_balance) > 0.1:  # 0.1 USDT'den fazla değişim
-                    logger.info(f"💰 Balance updated for user {self.user_id}: {old_balance:.2f} -> {new_balance:.2f} USDT")
-                
-                return new_balance
-                
-            finally:
-                self._balance_check_in_progress = False
+            self._cached_balance = new_balance
+            self._last_balance_check = current_time
+            return new_balance
             
         except BinanceAPIException as e:
-            self._balance_check_in_progress = False
             if "-1003" in str(e):  # Rate limit
                 logger.warning(f"💰 Balance rate limit hit for user {self.user_id}")
                 return self._cached_balance
             logger.error(f"💰 Balance API error for user {self.user_id}: {e}")
             return self._cached_balance
         except Exception as e:
-            self._balance_check_in_progress = False
             logger.error(f"💰 Unexpected balance error for user {self.user_id}: {e}")
             return self._cached_balance
     
+    async def _fetch_balance(self, priority: RequestPriority = None) -> Dict:
+        """futures_account -> account_state'in normalize bakiye formatı"""
+        fetched_at = time.time()
+        await self.rate_limiter.wait_if_needed('balance', self.user_id, self.client, priority)
+        balance = self._normalize_balance(await self.client.futures_account())
+        
+        # Stream state'i REST snapshot ile başlat (sonraki event'ler üstüne yazar)
+        state = user_data_streams.get_state(self.user_id)
+        if state:
+            state.seed_balance('USDT', balance['total'], fetched_at)
+        
+        return balance
+    
+    @classmethod
+    async def get_shared_balance(cls, user_id: str, api_key: str, api_secret: str) -> Dict:
+        """
+        💰 Bot başlatma ön kontrolü - BotCore ile aynı ağ (ENVIRONMENT) ve aynı account_state kaydı
+        Havuzdaki session'ı kullanır; hemen ardından başlayan bot onu yeniden kullanır
+        """
+        is_testnet = settings.ENVIRONMENT == "TEST"
+        if cls._rate_limiter is None:
+            cls._rate_limiter = BinanceRateLimiter()
+        
+        async def fetch_balance():
+            client = await binance_client_pool.acquire(api_key, api_secret, is_testnet)
+            try:
+                await cls._rate_limiter.wait_if_needed('account', user_id, client)
+                balance = cls._normalize_balance(await client.futures_account())
+            except Exception:
+                # Reddedilen key'lerin session'ı havuzda tutulmaz
+                await binance_client_pool.release(client, discard=True)
+                raise
+            await binance_client_pool.release(client)
+            return balance
+        
+        return await account_state.get_balance(
+            user_id, 'binance', api_key, api_secret,
+            fetcher=fetch_balance,
+            testnet=is_testnet
+        )
+    
+    @staticmethod
+    def _normalize_balance(account: dict) -> Dict:
+        """futures_account yanıtındaki USDT varlığı -> unified bakiye formatı"""
+        wallet, available = 0.0, 0.0
+        for asset in account['assets']:
+            if asset['asset'] == 'USDT':
+                wallet = float(asset['walletBalance'])
+                available = float(asset.get('availableBalance', wallet))
+                break
+        
+        return {
+            "exchange": "binance",
+            "type": "futures",
+            "currency": "USDT",
+            "total": wallet,
+            "available": available,
+            "locked": wallet - available,
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
     async def get_balance_with_status(self):
         """
         💰 Bakiye ve durumunu birlikte döndürür
@@ -493,38 +535,27 @@ class BinanceClient:
                 "error": str(e)
             }
     
-    async def get_open_positions(self, symbol: str, use_cache: bool = True):
-        """Açık pozisyonları getir - cache desteği ile"""
+    async def get_open_positions(self, symbol: str, use_cache: bool = True, priority: RequestPriority = None):
+        """Açık pozisyonları getir - stream veya paylaşılan cache (priority: varsayılan RISK)"""
         if self.is_public_only:
             logger.warning(f"⚠️ Open positions requested for public-only client: {self.user_id}")
             return []
             
         try:
-            current_time = time.time()
-            cache_key = symbol
-            
-            # Cache kontrolü (30 saniye cache - Simple EMA için yeterli)
-            if use_cache and cache_key in self._last_position_check:
-                if current_time - self._last_position_check[cache_key] < 30:
-                    return self._cached_positions.get(cache_key, [])
-            
-            await self.rate_limiter.wait_if_needed('position', self.user_id)
-            positions = await self.client.futures_position_information(symbol=symbol)
-            
-            # Safe parsing
-            open_positions = []
-            for p in positions:
-                try:
-                    if float(p.get('positionAmt', 0)) != 0:
-                        open_positions.append(p)
-                except (ValueError, KeyError, TypeError) as parse_error:
-                    logger.warning(f"⚠️ Position parsing error for {symbol} - user {self.user_id}: {parse_error}")
-                    continue
-            
-            # Cache güncelle
-            self._last_position_check[cache_key] = current_time
-            self._cached_positions[cache_key] = open_positions
-            
+            # 📡 User data stream açıksa pozisyonlar event'lerle güncel
+            state = user_data_streams.get_state(self.user_id)
+            streamed_positions = state.get_positions(symbol) if state else None
+            if streamed_positions is not None:
+                return streamed_positions
+            
+            # Paylaşılan cache (CACHE_DURATION_POSITION) - eşzamanlı istekler tek REST çağrısında birleşir
+            open_positions = await account_state.get_positions(
+                self.user_id, 'binance', symbol,
+                fetcher=lambda: self._fetch_positions(symbol, priority),
+                max_age=None if use_cache else 0,
+                testnet=self.is_testnet
+            )
+            self._cached_positions[symbol] = open_positions
             return open_positions
             
         except BinanceAPIException as e:
@@ -537,6 +568,31 @@ class BinanceClient:
             logger.error(f"❌ Unexpected error getting positions for {symbol} - user {self.user_id}: {e}")
             return self._cached_positions.get(symbol, [])
     
+    async def _fetch_positions(self, symbol: str, priority: RequestPriority = None) -> List[Dict]:
+        fetched_at = time.time()
+        await self.rate_limiter.wait_if_needed('position', self.user_id, self.client, priority)
+        positions = await self.client.futures_position_information(symbol=symbol)
+        
+        # Safe parsing
+        open_positions = []
+        for p in positions:
+            try:
+                if float(p.get('positionAmt', 0)) != 0:
+                    open_positions.append(p)
+            except (ValueError, KeyError, TypeError) as parse_error:
+                logger.warning(f"⚠️ Position parsing error for {symbol} - user {self.user_id}: {parse_error}")
+                continue
+        
+        state = user_data_streams.get_state(self.user_id)
+        if state:
+            state.seed_positions(symbol, open_positions, fetched_at)
+        
+        return open_positions
+    
+    def invalidate_account_state(self):
+        """Emir sonrası bakiye/pozisyon cache'ini düşür (tüm botlar ve API route'ları için)"""
+        account_state.invalidate_user(self.user_id, 'binance')
+    
     async def create_market_order_with_sl_tp(self, symbol: str, side: str, quantity: float, entry_price: float, price_precision: int):
         """Market order ile birlikte SL/TP oluştur"""
         if self.is_public_only:
@@ -549,7 +605,7 @@ class BinanceClient:
         try:
             # Ana market order
             logger.info(f"📝 Creating market order for user {self.user_id}: {symbol} {side} {quantity}")
-            await self.rate_limiter.wait_if_needed('order', self.user_id)
+            await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
             
             main_order = await self.client.futures_create_order(
                 symbol=symbol,
@@ -559,6 +615,7 @@ class BinanceClient:
             )
             
             logger.info(f"✅ Market order successful for user {self.user_id}: {symbol} {side} {quantity}")
+            self.invalidate_account_state()
             
             # SL/TP fiyatlarını hesapla
             if side == 'BUY':  # Long pozisyon
@@ -575,7 +632,7 @@ class BinanceClient:
             
             # Stop Loss oluştur
             try:
-                await self.rate_limiter.wait_if_needed('order', self.user_id)
+                await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
                 sl_order = await self.client.futures_create_order(
                     symbol=symbol,
                     side=opposite_side,
@@ -591,7 +648,7 @@ class BinanceClient:
             
             # Take Profit oluştur
             try:
-                await self.rate_limiter.wait_if_needed('order', self.user_id)
+                await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
                 tp_order = await self.client.futures_create_order(
                     symbol=symbol,
                     side=opposite_side,
@@ -619,12 +676,12 @@ class BinanceClient:
             return False
             
         try:
-            await self.rate_limiter.wait_if_needed('order', self.user_id)
+            await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
             open_orders = await self.client.futures_get_open_orders(symbol=symbol)
             
             if open_orders:
                 logger.info(f"📝 Cancelling {len(open_orders)} open orders for {symbol} - user {self.user_id}")
-                await self.rate_limiter.wait_if_needed('order', self.user_id)
+                await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
                 await self.client.futures_cancel_all_open_orders(symbol=symbol)
                 await asyncio.sleep(0.5)
                 logger.info(f"✅ All orders cancelled for {symbol} - user {self.user_id}")
@@ -650,7 +707,7 @@ class BinanceClient:
             
             # Pozisyonu kapat
             logger.info(f"📝 Closing position for user {self.user_id}: {symbol} {abs(position_amt)}")
-            await self.rate_limiter.wait_if_needed('order', self.user_id)
+            await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
             
             response = await self.client.futures_create_order(
                 symbol=symbol,
@@ -663,10 +720,8 @@ class BinanceClient:
             logger.info(f"✅ Position closed for user {self.user_id}: {symbol}")
             
             # Cache temizle
-            if symbol in self._cached_positions:
-                del self._cached_positions[symbol]
-            if symbol in self._last_position_check:
-                del self._last_position_check[symbol]
+            self._cached_positions.pop(symbol, None)
+            self.invalidate_account_state()
             
             return response
             
@@ -690,7 +745,7 @@ class BinanceClient:
             
             # Margin tipini ayarla
             try:
-                await self.rate_limiter.wait_if_needed('account', self.user_id)
+                await self.rate_limiter.wait_if_needed('account', self.user_id, self.client)
                 await self.client.futures_change_margin_type(symbol=symbol, marginType='CROSSED')
                 logger.info(f"✅ Margin type set to CROSSED for {symbol} - user {self.user_id}")
             except BinanceAPIException as margin_error:
@@ -700,7 +755,7 @@ class BinanceClient:
                     logger.warning(f"⚠️ Could not change margin type for user {self.user_id}: {margin_error}")
             
             # Kaldıracı ayarla
-            await self.rate_limiter.wait_if_needed('account', self.user_id)
+            await self.rate_limiter.wait_if_needed('account', self.user_id, self.client)
             await self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
             logger.info(f"✅ Leverage set to {leverage}x for {symbol} - user {self.user_id}")
             return True
@@ -716,7 +771,7 @@ class BinanceClient:
             return False
             
         try:
-            await self.rate_limiter.wait_if_needed('order', self.user_id)
+            await self.rate_limiter.wait_if_needed('open_orders', self.user_id, self.client)
             open_orders = await self.client.futures_get_open_orders(symbol=symbol)
             return len(open_orders) > 0
         except Exception as e:
@@ -730,7 +785,7 @@ class BinanceClient:
             return None
             
         try:
-            await self.rate_limiter.wait_if_needed('order', self.user_id)
+            await self.rate_limiter.wait_if_needed('order', self.user_id, self.client)
             
             if side in ['SELL']:
                 # Stop loss veya take profit satış emri
@@ -750,20 +805,31 @@ class BinanceClient:
             )
             
             logger.info(f"✅ {order_type} order created for user {self.user_id}: {symbol} {side} {quantity} @ {stop_price}")
+            self.invalidate_account_state()
             return order
             
         except Exception as e:
             logger.error(f"❌ Stop/limit order creation failed for user {self.user_id}: {e}")
             return None
     
-    async def get_last_trade_pnl(self, symbol: str):
-        """Son işlemin PnL'ini al"""
+    async def get_last_trade_pnl(self, symbol: str, order_id: int = None):
+        """
+        Son işlemin PnL'ini al
+        order_id verilirse PnL, emrin fill event'lerinden (user data stream) toplanır;
+        event gelmezse REST'e düşülür
+        """
         if self.is_public_only:
             logger.warning(f"⚠️ Trade PnL requested for public-only client: {self.user_id}")
             return 0.0
+        
+        state = user_data_streams.get_state(self.user_id)
+        if state and order_id:
+            order = await state.wait_for_order(order_id, settings.USER_DATA_FILL_TIMEOUT)
+            if order and order['status'] == 'FILLED':
+                return order['realized_pnl']
             
         try:
-            await self.rate_limiter.wait_if_needed('default', self.user_id)
+            await self.rate_limiter.wait_if_needed('trades', self.user_id, self.client)
             trades = await self.client.futures_account_trades(symbol=symbol, limit=1)
             
             if trades:
@@ -777,9 +843,8 @@ class BinanceClient:
     async def get_symbol_info(self, symbol: str):
         """Symbol bilgilerini al"""
         try:
-            if not self.exchange_info:
-                await self.rate_limiter.wait_if_needed('default', self.user_id)
-                self.exchange_info = await self.client.futures_exchange_info()
+            # Ağ başına (testnet/mainnet) tüm botlar için tek exchange_info (EXCHANGE_INFO_CACHE_TTL)
+            self.exchange_info = await binance_client_pool.get_exchange_info(self._fetch_exchange_info, self.is_testnet)
             
             for symbol_info in self.exchange_info['symbols']:
                 if symbol_info['symbol'] == symbol:
@@ -790,10 +855,14 @@ class BinanceClient:
             logger.error(f"❌ Error getting symbol info for {symbol} - user {self.user_id}: {e}")
             return None
     
+    async def _fetch_exchange_info(self) -> Dict:
+        await self.rate_limiter.wait_if_needed('exchange_info', self.user_id, self.client)
+        return await self.client.futures_exchange_info()
+    
     async def get_historical_klines(self, symbol: str, interval: str, limit: int = 100):
         """Geçmiş kline verilerini al - Simple EMA için optimize edildi"""
         try:
-            await self.rate_limiter.wait_if_needed('default', self.user_id)
+            await self.rate_limiter.wait_if_needed('default', self.user_id, self.client)
             klines = await self.client.futures_klines(
                 symbol=symbol,
                 interval=interval,
@@ -811,7 +880,6 @@ class BinanceClient:
             "cached_balance": self._cached_balance,
             "last_check": self._last_balance_check,
             "cache_age_seconds": time.time() - self._last_balance_check,
-            "cache_duration": self._balance_cache_duration,
-            "is_cache_fresh": (time.time() - self._last_balance_check) < self._balance_cache_duration,
-            "check_in_progress": self._balance_check_in_progress
+            "cache_duration": account_state.balance_ttl,
+            "is_cache_fresh": (time.time() - self._last_balance_check) < account_state.balance_ttl
         }
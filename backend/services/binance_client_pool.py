@@ -0,0 +1,219 @@
+"""
+Binance Client Pool
+Shared python-binance AsyncClient sessions, keyed by credentials.
+
+- One AsyncClient per (api key, secret, testnet): bots of the same user and a
+  bot restarted within CLIENT_CLEANUP_THRESHOLD reuse the open session
+  instead of repeating the handshake
+- Reference counted; released clients stay open while idle and are closed by
+  the cleanup loop after CLIENT_CLEANUP_THRESHOLD
+- LRU eviction of idle clients above MAX_SHARED_CLIENTS (clients in use are
+  never closed)
+- An idle client is pinged (CLIENT_HEALTH_CHECK_INTERVAL) before it is handed
+  out again; a failing one is replaced
+- futures_exchange_info is public and cached once per network for all
+  clients (EXCHANGE_INFO_CACHE_TTL)
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from binance import AsyncClient
+
+from backend.config import settings
+from backend.services.rate_limiter import rate_limiter, RequestPriority
+
+logger = logging.getLogger(__name__)
+
+ExchangeInfoFetcher = Callable[[], Awaitable[Dict]]
+
+
+def _key(api_key: Optional[str], api_secret: Optional[str], testnet: bool) -> str:
+    network = "testnet" if testnet else "mainnet"
+    if not api_key:
+        return f"public:{network}"
+    # Secrets are not kept as dict keys
+    digest = hashlib.sha256(f"{api_key}:{api_secret}".encode()).hexdigest()[:16]
+    return f"{digest}:{network}"
+
+
+@dataclass
+class PooledClient:
+    client: AsyncClient
+    refs: int = 0
+    created_at: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    last_checked: float = field(default_factory=time.time)
+
+
+class BinanceClientPool:
+    """Keyed AsyncClient pool with LRU eviction, idle cleanup and health checks"""
+
+    def __init__(self):
+        self.max_clients = settings.MAX_SHARED_CLIENTS
+        self.idle_timeout = settings.CLIENT_CLEANUP_THRESHOLD
+        self.health_interval = settings.CLIENT_HEALTH_CHECK_INTERVAL
+        self.exchange_info_ttl = settings.EXCHANGE_INFO_CACHE_TTL
+        # key -> entry, least recently used first
+        self.entries: "OrderedDict[str, PooledClient]" = OrderedDict()
+        self._keys_by_client: Dict[int, str] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._cleanup_task: Optional[asyncio.Task] = None
+        # testnet -> (exchange_info, fetched_at); symbols and filters differ per network
+        self._exchange_info: Dict[bool, Tuple[Dict, float]] = {}
+        self._exchange_info_locks: Dict[bool, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.stats = {"created": 0, "reused": 0, "evicted": 0, "expired": 0,
+                      "health_failures": 0, "exchange_info_fetches": 0}
+
+    async def acquire(self, api_key: str = None, api_secret: str = None, testnet: bool = False) -> AsyncClient:
+        """Open client for these credentials; pair every call with release()"""
+        self._ensure_cleanup()
+        key = _key(api_key, api_secret, testnet)
+
+        async with self._locks[key]:
+            entry = self.entries.get(key)
+            if entry:
+                # Held before the ping: eviction and idle cleanup skip entries in use
+                entry.refs += 1
+                if entry.refs == 1 and not await self._is_healthy(entry):
+                    self.stats["health_failures"] += 1
+                    logger.warning(f"Pooled Binance client {key} failed health check, reconnecting")
+                    entry.refs -= 1
+                    if entry.refs == 0:
+                        await self._discard(key)
+                    entry = None
+
+            if entry:
+                self.stats["reused"] += 1
+            else:
+                client = await AsyncClient.create(
+                    api_key,
+                    api_secret,
+                    testnet=testnet,
+                    requests_params={"timeout": 10}
+                )
+                entry = PooledClient(client, refs=1)
+                self.entries[key] = entry
+                self._keys_by_client[id(client)] = key
+                self.stats["created"] += 1
+
+            entry.last_used = time.time()
+            self.entries.move_to_end(key)
+
+        await self._evict_over_capacity()
+        return entry.client
+
+    async def release(self, client: AsyncClient, discard: bool = False):
+        """
+        Return a client. It stays open for reuse unless `discard` is set
+        (e.g. the credentials were rejected), in which case it is closed once
+        no one else holds it.
+        """
+        key = self._keys_by_client.get(id(client))
+        entry = self.entries.get(key) if key else None
+        if entry is None or entry.client is not client:
+            # Not pooled (or already evicted) - just close it
+            await self._close_client(client)
+            return
+
+        entry.refs = max(0, entry.refs - 1)
+        entry.last_used = time.time()
+        if discard and entry.refs == 0:
+            await self._discard(key)
+        else:
+            await self._evict_over_capacity()
+
+    async def get_exchange_info(self, fetcher: ExchangeInfoFetcher, testnet: bool = False) -> Dict:
+        """Cached futures_exchange_info of one network; one fetch serves every bot on it"""
+        cached = self._exchange_info.get(testnet)
+        if cached and time.time() - cached[1] <= self.exchange_info_ttl:
+            return cached[0]
+
+        async with self._exchange_info_locks[testnet]:
+            cached = self._exchange_info.get(testnet)
+            if not cached or time.time() - cached[1] > self.exchange_info_ttl:
+                cached = (await fetcher(), time.time())
+                self._exchange_info[testnet] = cached
+                self.stats["exchange_info_fetches"] += 1
+        return cached[0]
+
+    async def _is_healthy(self, entry: PooledClient) -> bool:
+        if time.time() - entry.last_checked < self.health_interval:
+            return True
+        try:
+            await rate_limiter.acquire("binance", 1, RequestPriority.RISK)
+            await entry.client.futures_ping()
+            entry.last_checked = time.time()
+            return True
+        except Exception as e:
+            logger.debug(f"Binance client ping failed: {e}")
+            return False
+
+    async def _evict_over_capacity(self):
+        # Oldest idle clients first; clients in use may push the pool over the limit
+        while len(self.entries) > self.max_clients:
+            idle = next((k for k, e in self.entries.items() if e.refs == 0), None)
+            if idle is None:
+                logger.warning(f"Binance client pool over capacity ({len(self.entries)}/{self.max_clients}), all in use")
+                return
+            await self._discard(idle)
+            self.stats["evicted"] += 1
+
+    async def _discard(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self._keys_by_client.pop(id(entry.client), None)
+            await self._close_client(entry.client)
+
+    @staticmethod
+    async def _close_client(client: AsyncClient):
+        try:
+            await client.close_connection()
+        except Exception as e:
+            logger.debug(f"Error closing Binance client: {e}")
+
+    def _ensure_cleanup(self):
+        if self._cleanup_task is None or self._cleanup_task.done():
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def _cleanup_loop(self):
+        interval = max(5, min(60, self.idle_timeout / 2))
+        while True:
+            await asyncio.sleep(interval)
+            cutoff = time.time() - self.idle_timeout
+            for key in [k for k, e in self.entries.items() if e.refs == 0 and e.last_used < cutoff]:
+                await self._discard(key)
+                self.stats["expired"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool statistics"""
+        in_use = sum(1 for e in self.entries.values() if e.refs)
+        return {
+            **self.stats,
+            "clients": len(self.entries),
+            "in_use": in_use,
+            "idle": len(self.entries) - in_use,
+            "max_clients": self.max_clients,
+            "idle_timeout": self.idle_timeout,
+            "exchange_info_age": {
+                "testnet" if testnet else "mainnet": round(time.time() - fetched_at, 1)
+                for testnet, (_, fetched_at) in self._exchange_info.items()
+            }
+        }
+
+    async def close(self):
+        """Close every pooled client (shutdown)"""
+        if self._cleanup_task:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+        for key in list(self.entries):
+            await self._discard(key)
+        logger.info("Binance client pool closed")
+
+
+# Singleton instance
+binance_client_pool = BinanceClientPool()
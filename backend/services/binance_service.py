@@ -2,7 +2,7 @@ import hmac
 import hashlib
 import time
 from typing import Dict, List, Optional
-import httpx
+from backend.services.http_pool import http_pool
 from urllib.parse import urlencode
 
 class BinanceService:
@@ -26,12 +26,17 @@ class BinanceService:
     def _get_base_url(self, is_futures: bool) -> str:
         return self.FUTURES_BASE_URL if is_futures else self.SPOT_BASE_URL
     
+    async def _reserve(self, method: str, url: str, params: Dict = None):
+        """Rate-limit budget for a signed request - before its timestamp is taken"""
+        return await http_pool.reserve("binance", method, url, params or {}, self.api_key)
+    
     async def get_balance(self, is_futures: bool = False) -> Dict:
         """Get account balance"""
         try:
             base_url = self._get_base_url(is_futures)
             endpoint = "/fapi/v2/account" if is_futures else "/api/v3/account"
             
+            reserved = await self._reserve("GET", f"{base_url}{endpoint}")
             params = {
                 "timestamp": int(time.time() * 1000)
             }
@@ -44,43 +49,46 @@ class BinanceService:
                 "Content-Type": "application/json"
             }
 
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}",
-                    params=params,
-                    headers=headers
-                )
+            client = http_pool.get("binance")
+            response = await client.get(
+                f"{base_url}{endpoint}",
+                params=params,
+                headers=headers,
+                timeout=30.0,
+                follow_redirects=True,
+                extensions=reserved
+            )
 
-                # Handle 418 IP ban specifically
-                if response.status_code == 418:
-                    raise Exception(
-                        "Binance IP restriction detected. Your server's IP may be blocked. "
-                        "Try: 1) Use a VPS with different IP, 2) Enable Binance IP whitelist, "
-                        "3) Contact Binance support, or 4) Wait 24 hours for auto-unblock."
-                    )
+            # Handle 418 IP ban specifically
+            if response.status_code == 418:
+                raise Exception(
+                    "Binance IP restriction detected. Your server's IP may be blocked. "
+                    "Try: 1) Use a VPS with different IP, 2) Enable Binance IP whitelist, "
+                    "3) Contact Binance support, or 4) Wait 24 hours for auto-unblock."
+                )
 
-                response.raise_for_status()
-                data = response.json()
+            response.raise_for_status()
+            data = response.json()
                 
-                if is_futures:
-                    # Futures balance
-                    total_balance = float(data.get("totalWalletBalance", 0))
-                    available_balance = float(data.get("availableBalance", 0))
-                    return {
-                        "total": total_balance,
-                        "available": available_balance,
-                        "currency": "USDT"
-                    }
-                else:
-                    # Spot balance - return USDT balance
-                    for balance in data.get("balances", []):
-                        if balance["asset"] == "USDT":
-                            return {
-                                "total": float(balance["free"]) + float(balance["locked"]),
-                                "available": float(balance["free"]),
-                                "currency": "USDT"
-                            }
-                    return {"total": 0, "available": 0, "currency": "USDT"}
+            if is_futures:
+                # Futures balance
+                total_balance = float(data.get("totalWalletBalance", 0))
+                available_balance = float(data.get("availableBalance", 0))
+                return {
+                    "total": total_balance,
+                    "available": available_balance,
+                    "currency": "USDT"
+                }
+            else:
+                # Spot balance - return USDT balance
+                for balance in data.get("balances", []):
+                    if balance["asset"] == "USDT":
+                        return {
+                            "total": float(balance["free"]) + float(balance["locked"]),
+                            "available": float(balance["free"]),
+                            "currency": "USDT"
+                        }
+                return {"total": 0, "available": 0, "currency": "USDT"}
                     
         except Exception as e:
             raise Exception(f"Binance balance error: {str(e)}")
@@ -91,14 +99,15 @@ class BinanceService:
             base_url = self._get_base_url(is_futures)
             endpoint = "/fapi/v1/ticker/price" if is_futures else "/api/v3/ticker/price"
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}",
-                    params={"symbol": symbol}
-                )
-                response.raise_for_status()
-                data = response.json()
-                return float(data["price"])
+            client = http_pool.get("binance")
+            response = await client.get(
+                f"{base_url}{endpoint}",
+                params={"symbol": symbol},
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
+            return float(data["price"])
                 
         except Exception as e:
             raise Exception(f"Binance price error: {str(e)}")
@@ -123,6 +132,7 @@ class BinanceService:
             
             if is_futures:
                 # Set leverage first
+                reserved = await self._reserve("POST", f"{base_url}/fapi/v1/leverage", {"symbol": symbol})
                 leverage_params = {
                     "symbol": symbol,
                     "leverage": leverage,
@@ -130,15 +140,18 @@ class BinanceService:
                 }
                 leverage_params["signature"] = self._generate_signature(leverage_params)
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    await client.post(
-                        f"{base_url}/fapi/v1/leverage",
-                        data=leverage_params,
-                        headers=headers
-                    )
-                    print(f"[BINANCE] Leverage set to {leverage}x")
+                client = http_pool.get("binance")
+                await client.post(
+                    f"{base_url}/fapi/v1/leverage",
+                    data=leverage_params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                print(f"[BINANCE] Leverage set to {leverage}x")
                 
                 # Create futures market order
+                reserved = await self._reserve("POST", f"{base_url}/fapi/v1/order", {"symbol": symbol})
                 order_params = {
                     "symbol": symbol,
                     "side": side,
@@ -148,15 +161,17 @@ class BinanceService:
                 }
                 order_params["signature"] = self._generate_signature(order_params)
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{base_url}/fapi/v1/order",
-                        data=order_params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    order_result = response.json()
-                    print(f"[BINANCE] Order created: {order_result.get('orderId')}")
+                client = http_pool.get("binance")
+                response = await client.post(
+                    f"{base_url}/fapi/v1/order",
+                    data=order_params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
+                order_result = response.json()
+                print(f"[BINANCE] Order created: {order_result.get('orderId')}")
                 
                 # Get entry price
                 entry_price = float(order_result.get("avgPrice", 0))
@@ -185,6 +200,7 @@ class BinanceService:
                 }
             else:
                 # Spot order
+                reserved = await self._reserve("POST", f"{base_url}/api/v3/order", {"symbol": symbol})
                 order_params = {
                     "symbol": symbol,
                     "side": side,
@@ -194,16 +210,18 @@ class BinanceService:
                 }
                 order_params["signature"] = self._generate_signature(order_params)
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{base_url}/api/v3/order",
-                        data=order_params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    order_result = response.json()
-                    print(f"[BINANCE] Spot order created: {order_result.get('orderId')}")
-                    return order_result
+                client = http_pool.get("binance")
+                response = await client.post(
+                    f"{base_url}/api/v3/order",
+                    data=order_params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
+                order_result = response.json()
+                print(f"[BINANCE] Spot order created: {order_result.get('orderId')}")
+                return order_result
                      
         except Exception as e:
             print(f"[BINANCE ERROR] Order failed: {str(e)}")
@@ -217,6 +235,7 @@ class BinanceService:
             # Close side is opposite of open side
             close_side = "SELL" if original_side == "BUY" else "BUY"
             
+            reserved = await self._reserve("POST", f"{base_url}/fapi/v1/order", {"symbol": symbol})
             params = {
                 "symbol": symbol,
                 "side": close_side,
@@ -235,15 +254,17 @@ class BinanceService:
             
             headers = {"X-MBX-APIKEY": self.api_key}
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{base_url}/fapi/v1/order",
-                    data=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                return str(result.get("orderId"))
+            client = http_pool.get("binance")
+            response = await client.post(
+                f"{base_url}/fapi/v1/order",
+                data=params,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            return str(result.get("orderId"))
                 
         except Exception as e:
             print(f"[BINANCE ERROR] TP/SL order failed: {str(e)}")
@@ -269,6 +290,7 @@ class BinanceService:
             amount = position["amount"]
             
             base_url = self._get_base_url(is_futures)
+            reserved = await self._reserve("POST", f"{base_url}/fapi/v1/order", {"symbol": symbol})
             params = {
                 "symbol": symbol,
                 "side": close_side,
@@ -280,20 +302,22 @@ class BinanceService:
             
             headers = {"X-MBX-APIKEY": self.api_key}
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{base_url}/fapi/v1/order",
-                    data=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                print(f"[BINANCE] Position closed: {result.get('orderId')}")
+            client = http_pool.get("binance")
+            response = await client.post(
+                f"{base_url}/fapi/v1/order",
+                data=params,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            print(f"[BINANCE] Position closed: {result.get('orderId')}")
                 
-                # Cancel all open orders for this symbol
-                await self.cancel_all_orders(symbol, is_futures)
+            # Cancel all open orders for this symbol
+            await self.cancel_all_orders(symbol, is_futures)
                 
-                return result
+            return result
                 
         except Exception as e:
             print(f"[BINANCE ERROR] Close position failed: {str(e)}")
@@ -307,6 +331,7 @@ class BinanceService:
             base_url = self._get_base_url(is_futures)
             endpoint = "/fapi/v1/allOpenOrders" if is_futures else "/api/v3/openOrders"
             
+            reserved = await self._reserve("DELETE", f"{base_url}{endpoint}", {"symbol": symbol})
             params = {
                 "symbol": symbol,
                 "timestamp": int(time.time() * 1000)
@@ -315,15 +340,17 @@ class BinanceService:
             
             headers = {"X-MBX-APIKEY": self.api_key}
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.delete(
-                    f"{base_url}{endpoint}",
-                    params=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                print(f"[BINANCE] All orders cancelled for {symbol}")
-                return True
+            client = http_pool.get("binance")
+            response = await client.delete(
+                f"{base_url}{endpoint}",
+                params=params,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            print(f"[BINANCE] All orders cancelled for {symbol}")
+            return True
                 
         except Exception as e:
             print(f"[BINANCE ERROR] Cancel orders failed: {str(e)}")
@@ -337,6 +364,7 @@ class BinanceService:
                 return []
             
             base_url = self._get_base_url(is_futures)
+            reserved = await self._reserve("GET", f"{base_url}/fapi/v2/positionRisk")
             params = {
                 "timestamp": int(time.time() * 1000)
             }
@@ -344,38 +372,43 @@ class BinanceService:
             
             headers = {"X-MBX-APIKEY": self.api_key}
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{base_url}/fapi/v2/positionRisk",
-                    params=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                positions = response.json()
+            client = http_pool.get("binance")
+            response = await client.get(
+                f"{base_url}/fapi/v2/positionRisk",
+                params=params,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            positions = response.json()
                 
-                # Filter only positions with non-zero amount
-                active_positions = []
-                for pos in positions:
-                    position_amt = float(pos.get("positionAmt", 0))
-                    if position_amt != 0:
-                        active_positions.append({
-                            "symbol": pos["symbol"],
-                            "side": "LONG" if position_amt > 0 else "SHORT",
-                            "amount": abs(position_amt),
-                            "entry_price": float(pos["entryPrice"]),
-                            "current_price": float(pos["markPrice"]),
-                            "unrealized_pnl": float(pos["unRealizedProfit"]),
-                            "leverage": int(pos["leverage"])
-                        })
+            # Filter only positions with non-zero amount
+            active_positions = []
+            for pos in positions:
+                position_amt = float(pos.get("positionAmt", 0))
+                if position_amt != 0:
+                    active_positions.append({
+                        "symbol": pos["symbol"],
+                        "side": "LONG" if position_amt > 0 else "SHORT",
+                        "amount": abs(position_amt),
+                        "entry_price": float(pos["entryPrice"]),
+                        "current_price": float(pos["markPrice"]),
+                        "unrealized_pnl": float(pos["unRealizedProfit"]),
+                        "leverage": int(pos["leverage"])
+                    })
                 
-                return active_positions
+            return active_positions
                 
         except Exception as e:
             raise Exception(f"Binance positions error: {str(e)}")
 
 
+def _get_service(api_key: str, api_secret: str) -> BinanceService:
+    return http_pool.service("binance", BinanceService, api_key, api_secret)
+
 async def get_balance(api_key: str, api_secret: str, is_futures: bool = False) -> Dict:
-    service = BinanceService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_balance(is_futures)
 
 async def create_order(
@@ -389,13 +422,13 @@ async def create_order(
     tp_percentage: float = 0,
     sl_percentage: float = 0
 ) -> Dict:
-    service = BinanceService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.create_order(symbol, side, amount, leverage, is_futures, tp_percentage, sl_percentage)
 
 async def get_positions(api_key: str, api_secret: str, is_futures: bool = False) -> List[Dict]:
-    service = BinanceService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_positions(is_futures)
 
 async def get_current_price(api_key: str, api_secret: str, symbol: str, is_futures: bool = False) -> float:
-    service = BinanceService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_current_price(symbol, is_futures)
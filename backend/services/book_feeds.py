@@ -0,0 +1,332 @@
+"""
+Book Feeds
+Streaming best bid/ask (top of book) for USDT perpetuals on every exchange.
+
+- Binance rides the shared market_data_hub ({symbol}@bookTicker)
+- Bybit, OKX, KuCoin and MEXC each get one public WebSocket per exchange
+- Symbols are canonical (BTCUSDT); conversion to native symbols happens here
+- Each quote is reported as on_quote(exchange, symbol, bid, ask); a side that
+  did not change in the update is passed as None
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import websockets
+
+from backend.config import settings
+from backend.services.http_pool import http_pool
+from backend.services.market_data_hub import jittered_backoff, market_data_hub
+from backend.services.ticker_snapshot import canonical_symbol, native_symbol
+
+logger = logging.getLogger(__name__)
+
+# on_quote(exchange, canonical_symbol, bid, ask)
+QuoteHandler = Callable[[str, str, Optional[float], Optional[float]], None]
+Quote = Tuple[str, Optional[float], Optional[float]]
+
+
+def _price(value) -> Optional[float]:
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+def _top(levels) -> Optional[float]:
+    """Best price of a [[price, size, ...], ...] side"""
+    return _price(levels[0][0]) if levels else None
+
+
+class BookFeed(ABC):
+    """Top-of-book WebSocket feed for one exchange"""
+
+    exchange_name = ""
+    url = ""
+    # Application-level keepalive (seconds); None when protocol pings suffice
+    keepalive_interval: Optional[float] = None
+
+    def __init__(self, on_quote: QuoteHandler):
+        self.on_quote = on_quote
+        self.symbols: Set[str] = set()
+        self.websocket = None
+        self.task: Optional[asyncio.Task] = None
+        self.is_running = False
+        self.reconnects = 0
+        self.quotes_received = 0
+        self.last_message_time: Optional[float] = None
+
+    async def add_symbols(self, symbols: Iterable[str]):
+        """Stream more symbols; new ones are subscribed on the live connection"""
+        new = set(symbols) - self.symbols
+        if not new:
+            return
+
+        self.symbols |= new
+        self.is_running = True
+        if self.websocket is not None:
+            await self._subscribe(sorted(new))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Close the connection and stop reconnecting"""
+        self.is_running = False
+        if self.task and not self.task.done():
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+        self.websocket = None
+
+    # --- exchange specific ---
+
+    async def connect_url(self) -> str:
+        return self.url
+
+    @abstractmethod
+    def subscribe_messages(self, symbols: List[str]) -> List:
+        """Messages that subscribe `symbols` on the open connection"""
+
+    def keepalive_message(self):
+        return None
+
+    @abstractmethod
+    def parse(self, message: dict) -> Iterable[Quote]:
+        """Quotes carried by one decoded message"""
+
+    # --- connection ---
+
+    async def _send(self, message):
+        await self.websocket.send(message if isinstance(message, str) else json.dumps(message))
+
+    async def _subscribe(self, symbols: List[str]):
+        try:
+            for message in self.subscribe_messages(symbols):
+                await self._send(message)
+        except Exception as e:
+            # The read loop notices the broken socket and resubscribes on reconnect
+            logger.warning(f"⚠️ {self.exchange_name} book subscribe failed: {e}")
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            await self._send(self.keepalive_message())
+
+    async def _run(self):
+        attempt = 0
+
+        while self.is_running and self.symbols:
+            keepalive_task = None
+            try:
+                url = await self.connect_url()
+                async with websockets.connect(
+                    url,
+                    ping_interval=settings.WEBSOCKET_PING_INTERVAL,
+                    ping_timeout=settings.WEBSOCKET_PING_TIMEOUT,
+                    close_timeout=settings.WEBSOCKET_CLOSE_TIMEOUT
+                ) as websocket:
+                    self.websocket = websocket
+                    self.last_message_time = time.time()
+                    attempt = 0
+
+                    await self._subscribe(sorted(self.symbols))
+                    if self.keepalive_interval:
+                        keepalive_task = asyncio.create_task(self._keepalive())
+
+                    logger.info(f"✅ {self.exchange_name} book feed connected ({len(self.symbols)} symbols)")
+                    await self._read_loop(websocket)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ {self.exchange_name} book feed error: {e}")
+            finally:
+                if keepalive_task:
+                    keepalive_task.cancel()
+                self.websocket = None
+
+            if not (self.is_running and self.symbols):
+                break
+
+            wait_time = jittered_backoff(attempt, cap=settings.WEBSOCKET_RECONNECT_MAX_DELAY)
+            attempt += 1
+            self.reconnects += 1
+            logger.info(f"🔄 Reconnecting {self.exchange_name} book feed in {wait_time:.1f}s...")
+            await asyncio.sleep(wait_time)
+
+    async def _read_loop(self, websocket):
+        idle_timeout = settings.MARKET_DATA_IDLE_TIMEOUT
+
+        while self.is_running:
+            try:
+                raw = await asyncio.wait_for(websocket.recv(), timeout=idle_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ No data on {self.exchange_name} book feed for {idle_timeout}s - reconnecting")
+                return
+
+            self.last_message_time = time.time()
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                # Plain-text pong frames
+                continue
+            if not isinstance(message, dict):
+                continue
+
+            for native, bid, ask in self.parse(message):
+                if bid is None and ask is None:
+                    continue
+                self.quotes_received += 1
+                self.on_quote(self.exchange_name, canonical_symbol(self.exchange_name, native), bid, ask)
+
+    def get_stats(self) -> Dict:
+        return {
+            "symbols": len(self.symbols),
+            "connected": self.websocket is not None,
+            "reconnects": self.reconnects,
+            "quotes": self.quotes_received,
+            "last_message_age": round(time.time() - self.last_message_time, 1) if self.last_message_time else None
+        }
+
+
+class BybitBookFeed(BookFeed):
+    exchange_name = "bybit"
+    url = "wss://stream.bybit.com/v5/public/linear"
+    keepalive_interval = 20
+
+    def subscribe_messages(self, symbols):
+        # Max 10 topics per subscribe request
+        topics = [f"orderbook.1.{native_symbol(self.exchange_name, s)}" for s in symbols]
+        return [{"op": "subscribe", "args": topics[i:i + 10]} for i in range(0, len(topics), 10)]
+
+    def keepalive_message(self):
+        return {"op": "ping"}
+
+    def parse(self, message):
+        if not str(message.get("topic", "")).startswith("orderbook.1."):
+            return ()
+        data = message.get("data") or {}
+        return [(data.get("s"), _top(data.get("b")), _top(data.get("a")))]
+
+
+class OKXBookFeed(BookFeed):
+    exchange_name = "okx"
+    url = "wss://ws.okx.com:8443/ws/v5/public"
+    keepalive_interval = 25
+
+    def subscribe_messages(self, symbols):
+        args = [{"channel": "bbo-tbt", "instId": native_symbol(self.exchange_name, s)} for s in symbols]
+        return [{"op": "subscribe", "args": args}]
+
+    def keepalive_message(self):
+        return "ping"
+
+    def parse(self, message):
+        arg = message.get("arg") or {}
+        if arg.get("channel") != "bbo-tbt" or "data" not in message:
+            return ()
+        return [(arg.get("instId"), _top(d.get("bids")), _top(d.get("asks"))) for d in message["data"]]
+
+
+class KuCoinBookFeed(BookFeed):
+    exchange_name = "kucoin"
+    keepalive_interval = 18
+
+    async def connect_url(self) -> str:
+        # Public connections need a short-lived token
+        client = http_pool.get("kucoin")
+        response = await client.post("https://api-futures.kucoin.com/api/v1/bullet-public", timeout=10.0)
+        response.raise_for_status()
+        data = response.json()["data"]
+        server = data["instanceServers"][0]
+        self.keepalive_interval = max(5, server.get("pingInterval", 18000) / 1000 - 2)
+        return f"{server['endpoint']}?token={data['token']}&connectId={uuid.uuid4().hex}"
+
+    def subscribe_messages(self, symbols):
+        natives = [native_symbol(self.exchange_name, s) for s in symbols]
+        # Max 100 symbols per topic
+        return [
+            {
+                "id": uuid.uuid4().hex,
+                "type": "subscribe",
+                "topic": "/contractMarket/tickerV2:" + ",".join(natives[i:i + 100]),
+                "response": False
+            }
+            for i in range(0, len(natives), 100)
+        ]
+
+    def keepalive_message(self):
+        return {"id": uuid.uuid4().hex, "type": "ping"}
+
+    def parse(self, message):
+        if message.get("type") != "message" or message.get("subject") != "tickerV2":
+            return ()
+        data = message.get("data") or {}
+        return [(data.get("symbol"), _price(data.get("bestBidPrice")), _price(data.get("bestAskPrice")))]
+
+
+class MEXCBookFeed(BookFeed):
+    exchange_name = "mexc"
+    url = "wss://contract.mexc.com/edge"
+    keepalive_interval = 15
+
+    def subscribe_messages(self, symbols):
+        return [{"method": "sub.ticker", "param": {"symbol": native_symbol(self.exchange_name, s)}}
+                for s in symbols]
+
+    def keepalive_message(self):
+        return {"method": "ping"}
+
+    def parse(self, message):
+        if message.get("channel") != "push.ticker":
+            return ()
+        data = message.get("data") or {}
+        return [(data.get("symbol") or message.get("symbol"), _price(data.get("bid1")), _price(data.get("ask1")))]
+
+
+class BinanceBookFeed:
+    """Binance bookTicker streams over the shared market data hub"""
+
+    exchange_name = "binance"
+
+    def __init__(self, on_quote: QuoteHandler):
+        self.on_quote = on_quote
+        self.symbols: Set[str] = set()
+        self.quotes_received = 0
+
+    async def add_symbols(self, symbols: Iterable[str]):
+        # The hub streams testnet data outside LIVE - not comparable with other exchanges
+        if settings.ENVIRONMENT != "LIVE":
+            return
+        for symbol in set(symbols) - self.symbols:
+            self.symbols.add(symbol)
+            await market_data_hub.subscribe(f"{symbol.lower()}@bookTicker", self._handle)
+
+    async def _handle(self, msg: dict):
+        self.quotes_received += 1
+        self.on_quote(self.exchange_name, msg["s"], _price(msg.get("b")), _price(msg.get("a")))
+
+    async def stop(self):
+        for symbol in self.symbols:
+            await market_data_hub.unsubscribe(f"{symbol.lower()}@bookTicker", self._handle)
+        self.symbols.clear()
+
+    def get_stats(self) -> Dict:
+        return {"symbols": len(self.symbols), "connected": bool(self.symbols), "quotes": self.quotes_received}
+
+
+BOOK_FEEDS = {
+    "binance": BinanceBookFeed,
+    "bybit": BybitBookFeed,
+    "okx": OKXBookFeed,
+    "kucoin": KuCoinBookFeed,
+    "mexc": MEXCBookFeed,
+}
@@ -2,7 +2,7 @@ import hmac
 import hashlib
 import time
 from typing import Dict, List, Optional
-import httpx
+from backend.services.http_pool import http_pool
 import json
 
 class BybitService:
@@ -22,9 +22,14 @@ class BybitService:
         ).hexdigest()
         return signature
     
+    async def _reserve(self, method: str, path: str):
+        """Rate-limit budget for a signed request - before its timestamp is taken"""
+        return await http_pool.reserve("bybit", method, f"{self.BASE_URL}{path}", {}, self.api_key)
+    
     async def get_balance(self, is_futures: bool = False) -> Dict:
         """Get account balance"""
         try:
+            reserved = await self._reserve("GET", "/v5/account/wallet-balance")
             timestamp = str(int(time.time() * 1000))
             
             # Bybit V5 API - unified account
@@ -42,31 +47,33 @@ class BybitService:
             
             account_type = "CONTRACT" if is_futures else "SPOT"
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}{endpoint}",
-                    params={"accountType": account_type},
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("bybit")
+            response = await client.get(
+                f"{self.BASE_URL}{endpoint}",
+                params={"accountType": account_type},
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["retCode"] == 0:
-                    result = data["result"]["list"][0] if data["result"]["list"] else {}
-                    coins = result.get("coin", [])
+            if data["retCode"] == 0:
+                result = data["result"]["list"][0] if data["result"]["list"] else {}
+                coins = result.get("coin", [])
                     
-                    # Find USDT balance
-                    for coin in coins:
-                        if coin["coin"] == "USDT":
-                            return {
-                                "total": float(coin["walletBalance"]),
-                                "available": float(coin["availableToWithdraw"]),
-                                "currency": "USDT"
-                            }
+                # Find USDT balance
+                for coin in coins:
+                    if coin["coin"] == "USDT":
+                        return {
+                            "total": float(coin["walletBalance"]),
+                            "available": float(coin["availableToWithdraw"]),
+                            "currency": "USDT"
+                        }
                     
-                    return {"total": 0, "available": 0, "currency": "USDT"}
-                else:
-                    raise Exception(f"Bybit API error: {data.get('retMsg', 'Unknown error')}")
+                return {"total": 0, "available": 0, "currency": "USDT"}
+            else:
+                raise Exception(f"Bybit API error: {data.get('retMsg', 'Unknown error')}")
                     
         except Exception as e:
             raise Exception(f"Bybit balance error: {str(e)}")
@@ -77,18 +84,19 @@ class BybitService:
             endpoint = "/v5/market/tickers"
             category = "linear" if is_futures else "spot"
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}{endpoint}",
-                    params={"category": category, "symbol": symbol}
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("bybit")
+            response = await client.get(
+                f"{self.BASE_URL}{endpoint}",
+                params={"category": category, "symbol": symbol},
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["retCode"] == 0 and data["result"]["list"]:
-                    return float(data["result"]["list"][0]["lastPrice"])
-                else:
-                    raise Exception(f"Price not found for {symbol}")
+            if data["retCode"] == 0 and data["result"]["list"]:
+                return float(data["result"]["list"][0]["lastPrice"])
+            else:
+                raise Exception(f"Price not found for {symbol}")
                     
         except Exception as e:
             raise Exception(f"Bybit price error: {str(e)}")
@@ -105,7 +113,6 @@ class BybitService:
     ) -> Dict:
         """Create market order with optional TP/SL"""
         try:
-            timestamp = str(int(time.time() * 1000))
             category = "linear" if is_futures else "spot"
             
             print(f"[BYBIT] Creating order: {side} {amount} {symbol}")
@@ -120,6 +127,8 @@ class BybitService:
                     "sellLeverage": str(leverage)
                 }
                 leverage_params = json.dumps(leverage_payload)
+                reserved = await self._reserve("POST", "/v5/position/set-leverage")
+                timestamp = str(int(time.time() * 1000))
                 leverage_signature = self._generate_signature(leverage_params, timestamp)
                 
                 headers = {
@@ -130,13 +139,15 @@ class BybitService:
                     "Content-Type": "application/json"
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    await client.post(
-                        f"{self.BASE_URL}/v5/position/set-leverage",
-                        json=leverage_payload,
-                        headers=headers
-                    )
-                    print(f"[BYBIT] Leverage set to {leverage}x")
+                client = http_pool.get("bybit")
+                await client.post(
+                    f"{self.BASE_URL}/v5/position/set-leverage",
+                    json=leverage_payload,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                print(f"[BYBIT] Leverage set to {leverage}x")
             
             # Get current price for TP/SL calculation
             current_price = await self.get_current_price(symbol, is_futures)
@@ -176,6 +187,7 @@ class BybitService:
                 print(f"[BYBIT] SL set at {sl_price}")
             
             order_params = json.dumps(order_payload)
+            reserved = await self._reserve("POST", "/v5/order/create")
             timestamp = str(int(time.time() * 1000))
             signature = self._generate_signature(order_params, timestamp)
             
@@ -187,16 +199,18 @@ class BybitService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/v5/order/create",
-                    json=order_payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                print(f"[BYBIT] Order created: {result.get('result', {}).get('orderId')}")
-                return result
+            client = http_pool.get("bybit")
+            response = await client.post(
+                f"{self.BASE_URL}/v5/order/create",
+                json=order_payload,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            print(f"[BYBIT] Order created: {result.get('result', {}).get('orderId')}")
+            return result
                      
         except Exception as e:
             print(f"[BYBIT ERROR] Order failed: {str(e)}")
@@ -210,8 +224,6 @@ class BybitService:
             if not is_futures:
                 raise Exception("Spot doesn't have positions to close")
             
-            timestamp = str(int(time.time() * 1000))
-            
             # Get current position
             positions = await self.get_positions(is_futures)
             position = next((p for p in positions if p["symbol"] == symbol), None)
@@ -230,6 +242,8 @@ class BybitService:
             }
             
             close_params = json.dumps(close_payload)
+            reserved = await self._reserve("POST", "/v5/order/create")
+            timestamp = str(int(time.time() * 1000))
             signature = self._generate_signature(close_params, timestamp)
             
             headers = {
@@ -240,20 +254,22 @@ class BybitService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/v5/order/create",
-                    json=close_payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                print(f"[BYBIT] Position closed: {result.get('result', {}).get('orderId')}")
+            client = http_pool.get("bybit")
+            response = await client.post(
+                f"{self.BASE_URL}/v5/order/create",
+                json=close_payload,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            print(f"[BYBIT] Position closed: {result.get('result', {}).get('orderId')}")
                 
-                # Cancel all open orders
-                await self.cancel_all_orders(symbol, is_futures)
+            # Cancel all open orders
+            await self.cancel_all_orders(symbol, is_futures)
                 
-                return result
+            return result
                 
         except Exception as e:
             print(f"[BYBIT ERROR] Close position failed: {str(e)}")
@@ -264,6 +280,7 @@ class BybitService:
         try:
             print(f"[BYBIT] Cancelling all orders for {symbol}")
             
+            reserved = await self._reserve("POST", "/v5/order/cancel-all")
             timestamp = str(int(time.time() * 1000))
             category = "linear" if is_futures else "spot"
             
@@ -283,15 +300,17 @@ class BybitService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/v5/order/cancel-all",
-                    json=cancel_payload,
-                    headers=headers
-                )
-                response.raise_for_status()
-                print(f"[BYBIT] All orders cancelled for {symbol}")
-                return True
+            client = http_pool.get("bybit")
+            response = await client.post(
+                f"{self.BASE_URL}/v5/order/cancel-all",
+                json=cancel_payload,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            print(f"[BYBIT] All orders cancelled for {symbol}")
+            return True
                 
         except Exception as e:
             print(f"[BYBIT ERROR] Cancel orders failed: {str(e)}")
@@ -303,6 +322,7 @@ class BybitService:
             if not is_futures:
                 return []
             
+            reserved = await self._reserve("GET", "/v5/position/list")
             timestamp = str(int(time.time() * 1000))
             params = "5000"
             signature = self._generate_signature(params, timestamp)
@@ -314,40 +334,45 @@ class BybitService:
                 "X-BAPI-RECV-WINDOW": "5000"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/v5/position/list",
-                    params={"category": "linear", "settleCoin": "USDT"},
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("bybit")
+            response = await client.get(
+                f"{self.BASE_URL}/v5/position/list",
+                params={"category": "linear", "settleCoin": "USDT"},
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["retCode"] == 0:
-                    active_positions = []
-                    for pos in data["result"]["list"]:
-                        size = float(pos.get("size", 0))
-                        if size > 0:
-                            active_positions.append({
-                                "symbol": pos["symbol"],
-                                "side": pos["side"],
-                                "amount": size,
-                                "entry_price": float(pos["avgPrice"]),
-                                "current_price": float(pos["markPrice"]),
-                                "unrealized_pnl": float(pos["unrealisedPnl"]),
-                                "leverage": int(pos["leverage"])
-                            })
+            if data["retCode"] == 0:
+                active_positions = []
+                for pos in data["result"]["list"]:
+                    size = float(pos.get("size", 0))
+                    if size > 0:
+                        active_positions.append({
+                            "symbol": pos["symbol"],
+                            "side": pos["side"],
+                            "amount": size,
+                            "entry_price": float(pos["avgPrice"]),
+                            "current_price": float(pos["markPrice"]),
+                            "unrealized_pnl": float(pos["unrealisedPnl"]),
+                            "leverage": int(pos["leverage"])
+                        })
                     
-                    return active_positions
-                else:
-                    raise Exception(f"Bybit API error: {data.get('retMsg', 'Unknown error')}")
+                return active_positions
+            else:
+                raise Exception(f"Bybit API error: {data.get('retMsg', 'Unknown error')}")
                     
         except Exception as e:
             raise Exception(f"Bybit positions error: {str(e)}")
 
 
+def _get_service(api_key: str, api_secret: str) -> BybitService:
+    return http_pool.service("bybit", BybitService, api_key, api_secret)
+
 async def get_balance(api_key: str, api_secret: str, is_futures: bool = False) -> Dict:
-    service = BybitService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_balance(is_futures)
 
 async def create_order(
@@ -361,13 +386,13 @@ async def create_order(
     tp_percentage: float = 0,
     sl_percentage: float = 0
 ) -> Dict:
-    service = BybitService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.create_order(symbol, side, amount, leverage, is_futures, tp_percentage, sl_percentage)
 
 async def get_positions(api_key: str, api_secret: str, is_futures: bool = False) -> List[Dict]:
-    service = BybitService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_positions(is_futures)
 
 async def get_current_price(api_key: str, api_secret: str, symbol: str, is_futures: bool = False) -> float:
-    service = BybitService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_current_price(symbol, is_futures)
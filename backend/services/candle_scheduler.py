@@ -0,0 +1,130 @@
+"""
+Candle Scheduler
+Wakes exactly at candle close (plus a settle delay) for every timeframe.
+
+- Jobs register for an interval ("15m", "1h", ...)
+- One timer for the whole process: it sleeps until the earliest boundary
+- All jobs due at the same boundary run together in one batch
+  (e.g. on the hour: 1m, 5m, 15m, 30m and 1h jobs)
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from backend.config import settings
+from backend.services.candle_store import INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# callback(interval, candle_close_ms)
+CandleJob = Callable[[str, int], Awaitable[None]]
+
+
+def next_candle_close(interval: str, now: Optional[float] = None) -> int:
+    """Next close boundary for an interval, epoch ms (UTC aligned)"""
+    interval_ms = INTERVAL_SECONDS[interval] * 1000
+    now_ms = int((now if now is not None else time.time()) * 1000)
+    return (now_ms // interval_ms + 1) * interval_ms
+
+
+class CandleScheduler:
+    """Process-wide candle-close timer"""
+
+    def __init__(self, settle_delay: float = None):
+        self.settle_delay = settings.CANDLE_SETTLE_DELAY if settle_delay is None else settle_delay
+        self.jobs: Dict[str, Dict[str, CandleJob]] = {}
+        self.stats = {"wakeups": 0, "jobs_run": 0, "job_errors": 0}
+
+        self._task: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Event] = None
+
+    def add_job(self, job_id: str, interval: str, callback: CandleJob):
+        """Run callback at every close of `interval`"""
+        if interval not in INTERVAL_SECONDS:
+            raise ValueError(f"Unsupported interval: {interval}")
+
+        self.jobs.setdefault(interval, {})[job_id] = callback
+        self._ensure_running()
+        logger.debug(f"Candle job {job_id} scheduled for {interval} closes")
+
+    def remove_job(self, job_id: str, interval: Optional[str] = None):
+        """Remove a job from one interval, or from all of them"""
+        for iv in ([interval] if interval else list(self.jobs)):
+            jobs = self.jobs.get(iv)
+            if jobs and job_id in jobs:
+                del jobs[job_id]
+                if not jobs:
+                    del self.jobs[iv]
+
+        if not self.jobs and self._task and not self._task.done():
+            self._task.cancel()
+            self._task = None
+
+    def _ensure_running(self):
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        self._changed.set()
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self.jobs:
+                self._changed.clear()
+
+                boundaries = {iv: next_candle_close(iv) for iv in self.jobs}
+                boundary = min(boundaries.values())
+                wait_time = boundary / 1000 + self.settle_delay - time.time()
+
+                if wait_time > 0:
+                    try:
+                        # Jobs added for a sooner interval wake the timer early
+                        await asyncio.wait_for(self._changed.wait(), timeout=wait_time)
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+
+                due = [iv for iv, b in boundaries.items() if b == boundary and iv in self.jobs]
+                self._fire(due, boundary)
+
+                # Never fire the same boundary twice
+                await asyncio.sleep(max(0.0, boundary / 1000 + self.settle_delay - time.time()) + 0.001)
+
+        except asyncio.CancelledError:
+            pass
+
+    def _fire(self, intervals, boundary: int):
+        batch = [(iv, job_id, callback)
+                 for iv in intervals
+                 for job_id, callback in self.jobs.get(iv, {}).items()]
+        if not batch:
+            return
+
+        self.stats["wakeups"] += 1
+        logger.debug(f"⏰ Candle close {boundary}: {len(batch)} jobs ({', '.join(intervals)})")
+        asyncio.create_task(self._run_batch(batch, boundary))
+
+    async def _run_batch(self, batch, boundary: int):
+        results = await asyncio.gather(
+            *(callback(iv, boundary) for iv, _, callback in batch),
+            return_exceptions=True
+        )
+        for (iv, job_id, _), outcome in zip(batch, results):
+            self.stats["jobs_run"] += 1
+            if isinstance(outcome, Exception):
+                self.stats["job_errors"] += 1
+                logger.error(f"Candle job {job_id} ({iv}) failed: {outcome}")
+
+    def get_stats(self) -> Dict:
+        """Scheduler statistics"""
+        return {
+            **self.stats,
+            "jobs": {iv: len(jobs) for iv, jobs in self.jobs.items()},
+            "next_close": {iv: next_candle_close(iv) for iv in self.jobs}
+        }
+
+
+# Singleton instance
+candle_scheduler = CandleScheduler()
@@ -0,0 +1,258 @@
+"""
+Candle Store
+Shared rolling candle buffers keyed by (exchange, symbol, interval).
+
+- Seeded once over REST, then kept current by kline WebSocket streams
+- Bounded ring buffer per key (CANDLE_STORE_MAX_CANDLES)
+- Emits a "candle closed" event to every interested listener
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from backend.config import settings
+from backend.services.http_pool import http_pool
+from backend.services.market_data_hub import market_data_hub
+
+logger = logging.getLogger(__name__)
+
+# Candle = REST kline row: [open_time_ms, open, high, low, close, volume, ...]
+Candle = list
+CandleListener = Callable[[str, str, Candle], Awaitable[None]]
+CandleKey = Tuple[str, str, str]
+
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "3m": 180,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "2h": 7200,
+    "4h": 14400,
+    "6h": 21600,
+    "12h": 43200,
+    "1d": 86400,
+}
+
+# Exchanges fetch_klines can read
+KLINE_EXCHANGES = ("binance", "bybit", "okx")
+
+BYBIT_INTERVALS = {"1m": "1", "3m": "3", "5m": "5", "15m": "15", "30m": "30",
+                   "1h": "60", "2h": "120", "4h": "240", "6h": "360", "12h": "720", "1d": "D"}
+OKX_INTERVALS = {"1h": "1H", "2h": "2H", "4h": "4H", "6h": "6H", "12h": "12H", "1d": "1D"}
+
+
+async def fetch_klines(exchange_name: str, symbol: str, interval: str, limit: int) -> List[Candle]:
+    """
+    Fetch klines over REST, oldest first.
+
+    Rows keep the exchange's column order, which is the same for the first six
+    columns everywhere: open_time, open, high, low, close, volume.
+    The last row is the candle that is still forming.
+    """
+    exchange_name = exchange_name.lower()
+
+    if exchange_name == "binance":
+        url = f"{settings.BASE_URL}/fapi/v1/klines"
+        params = {"symbol": symbol, "interval": interval, "limit": limit}
+
+    elif exchange_name == "bybit":
+        url = "https://api.bybit.com/v5/market/kline"
+        params = {"category": "linear", "symbol": symbol,
+                  "interval": BYBIT_INTERVALS.get(interval, interval), "limit": limit}
+
+    elif exchange_name == "okx":
+        url = "https://www.okx.com/api/v5/market/candles"
+        params = {"instId": symbol, "bar": OKX_INTERVALS.get(interval, interval), "limit": limit}
+
+    else:
+        raise ValueError(f"Kline fetch not supported for {exchange_name}")
+
+    client = http_pool.get(exchange_name)
+    response = await client.get(url, params=params, timeout=10.0)
+    response.raise_for_status()
+    data = response.json()
+
+    if exchange_name == "binance":
+        candles = data
+    elif exchange_name == "bybit":
+        candles = data.get("result", {}).get("list", [])[::-1]
+    else:
+        candles = data.get("data", [])[::-1]
+
+    return [[int(c[0])] + list(c[1:]) for c in candles]
+
+
+def _stream_kline_to_row(k: dict) -> Candle:
+    """Convert a kline stream payload to the REST row format"""
+    return [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"], k["T"], k["q"], k["n"], k["V"], k["Q"], "0"]
+
+
+class _CandleSeries:
+    """Ring buffer and listeners for one (exchange, symbol, interval)"""
+
+    def __init__(self, key: CandleKey, max_candles: int):
+        self.key = key
+        self.candles: Deque[Candle] = deque(maxlen=max_candles)
+        self.listeners: List[CandleListener] = []
+        self.last_closed_time = 0
+        self.updated_at: Optional[float] = None
+        self.handler = None
+        # REST seed + stream subscription; every subscriber waits on it
+        self.started: Optional[asyncio.Task] = None
+
+    def apply(self, row: Candle) -> bool:
+        """Insert or update a candle. Returns True for a new open_time."""
+        if self.candles and self.candles[-1][0] == row[0]:
+            self.candles[-1] = row
+            return False
+        if self.candles and row[0] < self.candles[-1][0]:
+            return False
+        self.candles.append(row)
+        return True
+
+
+class CandleStore:
+    """
+    Shared candle store
+
+    Bots on the same (exchange, symbol, interval) share one buffer and one
+    kline stream. Listeners are called as callback(symbol, interval, candle)
+    once per closed candle, each in its own task so a slow bot never delays
+    the others or the stream reader.
+    """
+
+    def __init__(self, max_candles: int = None):
+        self.max_candles = max_candles or settings.CANDLE_STORE_MAX_CANDLES
+        self.series: Dict[CandleKey, _CandleSeries] = {}
+        self.closed_events = 0
+        self._lock = asyncio.Lock()
+        # Running listener notifications (the event loop only keeps weak references)
+        self._notifications: Set[asyncio.Task] = set()
+
+    async def subscribe(self, symbol: str, interval: str, listener: CandleListener,
+                        exchange_name: str = "binance") -> List[Candle]:
+        """Register a candle-closed listener and return the current candles"""
+        exchange_name = exchange_name.lower()
+        if exchange_name != "binance":
+            raise ValueError(f"Candle streaming not supported for {exchange_name}")
+
+        key = (exchange_name, symbol.upper(), interval)
+        async with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = _CandleSeries(key, self.max_candles)
+                self.series[key] = series
+                # The REST seed runs outside the store lock, so other markets never wait on it
+                series.started = asyncio.create_task(self._start(series))
+
+            series.listeners.append(listener)
+
+        # Shield: a cancelled subscriber must not cancel the shared start
+        await asyncio.shield(series.started)
+        return list(series.candles)
+
+    async def unsubscribe(self, symbol: str, interval: str, listener: CandleListener,
+                          exchange_name: str = "binance"):
+        """Remove a listener; the stream is closed when the last one leaves"""
+        key = (exchange_name.lower(), symbol.upper(), interval)
+        async with self._lock:
+            series = self.series.get(key)
+            if series is None or listener not in series.listeners:
+                return
+
+            series.listeners.remove(listener)
+            if series.listeners:
+                return
+
+            del self.series[key]
+            if series.handler is not None:
+                await market_data_hub.unsubscribe(f"{symbol.lower()}@kline_{interval}", series.handler)
+            logger.info(f"🔌 Candle store stopped tracking {symbol} {interval}")
+
+    def get_candles(self, symbol: str, interval: str, exchange_name: str = "binance",
+                    closed_only: bool = False) -> List[Candle]:
+        """Snapshot of the buffered candles, oldest first"""
+        series = self.series.get((exchange_name.lower(), symbol.upper(), interval))
+        if series is None:
+            return []
+
+        candles = list(series.candles)
+        if closed_only and candles and candles[-1][0] > series.last_closed_time:
+            candles = candles[:-1]
+        return candles
+
+    async def _start(self, series: _CandleSeries):
+        await self._seed(series)
+
+        _, symbol, interval = series.key
+        async with self._lock:
+            if self.series.get(series.key) is not series:
+                # Every listener left while seeding
+                return
+            series.handler = self._make_stream_handler(series)
+            await market_data_hub.subscribe(f"{symbol.lower()}@kline_{interval}", series.handler)
+        logger.info(f"✅ Candle store tracking {symbol} {interval} ({len(series.candles)} candles)")
+
+    async def _seed(self, series: _CandleSeries):
+        exchange_name, symbol, interval = series.key
+        try:
+            candles = await fetch_klines(exchange_name, symbol, interval, self.max_candles)
+        except Exception as e:
+            # Stream fills the buffer from here on
+            logger.error(f"❌ Candle seed failed for {symbol} {interval}: {e}")
+            return
+
+        for row in candles:
+            series.apply(row)
+
+        # Every row except the forming one is closed
+        if len(series.candles) > 1:
+            series.last_closed_time = series.candles[-2][0]
+        series.updated_at = time.time()
+
+    def _make_stream_handler(self, series: _CandleSeries):
+        async def handle(data: dict):
+            k = data.get("k")
+            if not k:
+                return
+
+            row = _stream_kline_to_row(k)
+            series.apply(row)
+            series.updated_at = time.time()
+
+            if k.get("x") and row[0] > series.last_closed_time:
+                series.last_closed_time = row[0]
+                self.closed_events += 1
+                _, symbol, interval = series.key
+                for listener in list(series.listeners):
+                    task = asyncio.create_task(self._notify(listener, symbol, interval, row))
+                    self._notifications.add(task)
+                    task.add_done_callback(self._notifications.discard)
+
+        return handle
+
+    async def _notify(self, listener: CandleListener, symbol: str, interval: str, candle: Candle):
+        try:
+            await listener(symbol, interval, candle)
+        except Exception as e:
+            logger.error(f"❌ Candle listener error for {symbol} {interval}: {e}")
+
+    def get_stats(self) -> dict:
+        """Store statistics"""
+        return {
+            "series": len(self.series),
+            "listeners": sum(len(s.listeners) for s in self.series.values()),
+            "closed_events": self.closed_events,
+            "buffers": {
+                f"{exchange}:{symbol}:{interval}": len(series.candles)
+                for (exchange, symbol, interval), series in self.series.items()
+            }
+        }
+
+
+# Singleton instance
+candle_store = CandleStore()
@@ -8,6 +8,9 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import ccxt.async_support as ccxt
 
+from backend.services.indicator_engine import indicator_engine
+from backend.services.signal_scheduler import signal_scheduler
+
 logger = logging.getLogger(__name__)
 
 class EMAMonitor:
@@ -16,7 +19,7 @@ class EMAMonitor:
     def __init__(self, db_connection):
         self.db = db_connection
         self.exchanges: Dict[str, ccxt.Exchange] = {}
-        self.monitoring_tasks: Dict[str, asyncio.Task] = {}
+        self.monitored_users: Dict[str, Dict] = {}
         
     async def initialize_exchange(self, exchange_name: str, api_key: str, api_secret: str):
         """Initialize exchange connection"""
@@ -37,86 +40,40 @@ class EMAMonitor:
             return False
     
     async def calculate_ema(self, exchange_name: str, symbol: str, interval: str, period: int) -> Optional[float]:
-        """Calculate EMA for given parameters"""
+        """Calculate EMA for given parameters (incremental, shared indicator engine)"""
         try:
-            exchange = self.exchanges.get(exchange_name)
-            if not exchange:
-                return None
-            
-            # Fetch OHLCV data
-            ohlcv = await exchange.fetch_ohlcv(symbol, interval, limit=period + 20)
-            
-            if len(ohlcv) < period:
+            emas = await self._get_emas(exchange_name, symbol, interval, (period,))
+            if emas is None:
                 return None
-            
-            # Calculate EMA
-            closes = [candle[4] for candle in ohlcv]  # Close prices
-            
-            # Simple EMA calculation
-            multiplier = 2 / (period + 1)
-            ema = closes[0]
-            
-            for close in closes[1:]:
-                ema = (close * multiplier) + (ema * (1 - multiplier))
-            
-            return ema
+            return emas["emas"][period]["value"]
             
         except Exception as e:
             logger.error(f"Error calculating EMA: {e}")
             return None
     
-    async def check_ema_signal(self, user_id: str, exchange_name: str, symbol: str, interval: str) -> Optional[Dict]:
-        """Check for EMA crossover signals"""
-        try:
-            # Calculate EMA 9 and EMA 21
-            ema9 = await self.calculate_ema(exchange_name, symbol, interval, 9)
-            ema21 = await self.calculate_ema(exchange_name, symbol, interval, 21)
-            
-            if ema9 is None or ema21 is None:
-                return None
-            
-            # Get previous EMAs to detect crossover
-            previous_ema9 = await self.get_previous_ema(user_id, symbol, interval, 9)
-            previous_ema21 = await self.get_previous_ema(user_id, symbol, interval, 21)
-            
-            # Store current EMAs
-            await self.store_ema(user_id, symbol, interval, 9, ema9)
-            await self.store_ema(user_id, symbol, interval, 21, ema21)
-            
-            signal = None
-            
-            # Bullish crossover: EMA9 crosses above EMA21
-            if previous_ema9 and previous_ema21:
-                if previous_ema9 < previous_ema21 and ema9 > ema21:
-                    signal = 'BUY'
-                # Bearish crossover: EMA9 crosses below EMA21
-                elif previous_ema9 > previous_ema21 and ema9 < ema21:
-                    signal = 'SELL'
-            
-            return {
-                'symbol': symbol,
-                'interval': interval,
-                'ema9': round(ema9, 2),
-                'ema21': round(ema21, 2),
-                'signal': signal,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-            
-        except Exception as e:
-            logger.error(f"Error checking EMA signal: {e}")
+    async def _get_emas(self, exchange_name: str, symbol: str, interval: str, periods) -> Optional[Dict]:
+        """Indicator engine update using this monitor's ccxt exchange for candles"""
+        if not self.exchanges.get(exchange_name):
             return None
+        
+        return await indicator_engine.get_emas(
+            self._market(exchange_name), symbol, interval, periods,
+            fetcher=self._candle_fetcher(exchange_name, symbol, interval)
+        )
     
-    async def get_previous_ema(self, user_id: str, symbol: str, interval: str, period: int) -> Optional[float]:
-        """Get previously stored EMA value"""
-        # Implementation depends on your database structure
-        # This is a placeholder
-        return None
+    @staticmethod
+    def _market(exchange_name: str) -> str:
+        """Indicator/scheduler market name - ccxt candles are kept apart from native REST ones"""
+        return f"ccxt_{(exchange_name or '').lower()}"
     
-    async def store_ema(self, user_id: str, symbol: str, interval: str, period: int, value: float):
-        """Store EMA value for future comparison"""
-        # Implementation depends on your database structure
-        # This is a placeholder
-        pass
+    def _candle_fetcher(self, exchange_name: str, symbol: str, interval: str):
+        async def fetch_ohlcv(limit: int):
+            exchange = self.exchanges.get(exchange_name)
+            if not exchange:
+                return []
+            return await exchange.fetch_ohlcv(symbol, interval, limit=limit)
+        
+        return fetch_ohlcv
     
     async def auto_open_position(self, user_id: str, signal: Dict, user_settings: Dict):
         """Automatically open position based on signal"""
@@ -301,66 +258,49 @@ class EMAMonitor:
     
     async def start_monitoring_user(self, user_id: str, user_settings: Dict):
         """Start monitoring signals for a user"""
-        if user_id in self.monitoring_tasks:
+        if user_id in self.monitored_users:
             logger.warning(f"Already monitoring user {user_id}")
             return
         
-        task = asyncio.create_task(self._monitor_loop(user_id, user_settings))
-        self.monitoring_tasks[user_id] = task
-        logger.info(f"Started monitoring for user {user_id}")
+        watchlist = user_settings.get('watchlist', [])
+        interval = user_settings.get('interval', '15m')
+        exchange_name = user_settings.get('exchange')
+        self.monitored_users[user_id] = user_settings
+        
+        # Signals are evaluated once per market and fanned out to users
+        for symbol in watchlist:
+            try:
+                await signal_scheduler.subscribe(
+                    user_id, self._market(exchange_name), symbol, interval, self._handle_signal,
+                    fetcher=self._candle_fetcher(exchange_name, symbol, interval)
+                )
+            except ValueError as e:
+                logger.error(f"Cannot monitor {symbol} for user {user_id}: {e}")
+        
+        logger.info(f"Started monitoring for user {user_id} ({len(watchlist)} symbols)")
     
     async def stop_monitoring_user(self, user_id: str):
         """Stop monitoring signals for a user"""
-        if user_id in self.monitoring_tasks:
-            task = self.monitoring_tasks[user_id]
-            task.cancel()
-            del self.monitoring_tasks[user_id]
+        user_settings = self.monitored_users.pop(user_id, None)
+        if user_settings:
+            for symbol in user_settings.get('watchlist', []):
+                await signal_scheduler.unsubscribe(
+                    user_id, self._market(user_settings.get('exchange')), symbol,
+                    user_settings.get('interval', '15m')
+                )
             logger.info(f"Stopped monitoring for user {user_id}")
     
-    async def _monitor_loop(self, user_id: str, user_settings: Dict):
-        """Main monitoring loop for a user"""
-        try:
-            while True:
-                # Get user's watchlist
-                watchlist = user_settings.get('watchlist', [])
-                interval = user_settings.get('interval', '15m')
-                exchange_name = user_settings.get('exchange')
-                
-                for symbol in watchlist:
-                    # Check signal
-                    signal = await self.check_ema_signal(user_id, exchange_name, symbol, interval)
-                    
-                    if signal and signal['signal'] in ['BUY', 'SELL']:
-                        # Check if auto-trading is enabled
-                        if user_settings.get('auto_trading', False):
-                            await self.auto_open_position(user_id, signal, user_settings)
-                    
-                    # Rate limiting - wait between checks
-                    await asyncio.sleep(2)
-                
-                # Wait for next interval check
-                # For 15m interval, check every 5 minutes
-                interval_map = {
-                    '15m': 300,  # 5 minutes
-                    '30m': 600,  # 10 minutes
-                    '1h': 1200,  # 20 minutes
-                    '4h': 3600,  # 1 hour
-                    '1d': 7200,  # 2 hours
-                }
-                
-                wait_time = interval_map.get(interval, 300)
-                await asyncio.sleep(wait_time)
-                
-        except asyncio.CancelledError:
-            logger.info(f"Monitoring cancelled for user {user_id}")
-        except Exception as e:
-            logger.error(f"Error in monitoring loop: {e}")
+    async def _handle_signal(self, user_id: str, signal: Dict):
+        """Per-user handling of a shared market signal"""
+        user_settings = self.monitored_users.get(user_id)
+        if user_settings and user_settings.get('auto_trading', False):
+            await self.auto_open_position(user_id, signal, user_settings)
     
     async def cleanup(self):
         """Cleanup all resources"""
-        # Cancel all monitoring tasks
-        for task in self.monitoring_tasks.values():
-            task.cancel()
+        # Leave every shared market
+        for user_id in list(self.monitored_users):
+            await self.stop_monitoring_user(user_id)
         
         # Close all exchange connections
         for exchange in self.exchanges.values():
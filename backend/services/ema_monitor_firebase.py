@@ -2,17 +2,19 @@
 EMA Signal Monitoring Service - Firebase Integrated
 Monitors EMA crossovers and triggers automated trading with Firebase persistence
 """
-import asyncio
 import logging
 from datetime import datetime
 from typing import Dict, List, Optional
 import time
 
 from backend.firebase_admin import (
-    firebase_initialized,
     get_user_api_keys,
     save_ema_signal
 )
+from backend.firebase_repository import firebase_repository
+from backend.ledger import record_path
+from backend.services.indicator_engine import indicator_engine
+from backend.services.signal_scheduler import signal_scheduler
 from backend.services.trade_manager import trade_manager
 
 logger = logging.getLogger(__name__)
@@ -22,7 +24,8 @@ class EMAMonitorFirebase:
     """Monitors EMA signals for automated trading with Firebase integration"""
 
     def __init__(self):
-        self.monitoring_tasks: Dict[str, asyncio.Task] = {}
+        self.monitored_users: Dict[str, Dict] = {}
+        self.last_checked_candle: Dict[str, int] = {}
 
     async def calculate_ema(
         self,
@@ -35,107 +38,21 @@ class EMAMonitorFirebase:
         passphrase: str = ""
     ) -> Optional[float]:
         """
-        Calculate EMA for given parameters using exchange API
+        EMA for the last closed candle from the shared indicator engine
 
-        Uses simple EMA formula: EMA = (Close - EMA_prev) * multiplier + EMA_prev
-        where multiplier = 2 / (period + 1)
+        The engine keeps incremental state per market, so this only fetches
+        candles that closed since the previous call.
         """
         try:
-            from backend.services.unified_exchange import unified_exchange
-            import httpx
-
-            # Fetch OHLCV data
-            exchange_name = exchange_name.lower()
-            limit = period + 20  # Get extra candles for accuracy
-
-            # Fetch candles from exchange
-            if exchange_name == "binance":
-                url = f"https://fapi.binance.com/fapi/v1/klines"
-                params = {"symbol": symbol, "interval": interval, "limit": limit}
-
-            elif exchange_name == "bybit":
-                url = f"https://api.bybit.com/v5/market/kline"
-                params = {"category": "linear", "symbol": symbol, "interval": interval, "limit": limit}
-
-            elif exchange_name == "okx":
-                url = f"https://www.okx.com/api/v5/market/candles"
-                # OKX uses different interval format
-                interval_map = {"15m": "15m", "1h": "1H", "4h": "4H", "1d": "1D"}
-                params = {"instId": symbol, "bar": interval_map.get(interval, interval), "limit": limit}
-
-            else:
-                # For KuCoin and MEXC, use similar approaches
-                logger.warning(f"OHLCV fetch not yet optimized for {exchange_name}, using default")
+            emas = await indicator_engine.get_emas(exchange_name, symbol, interval, (period,))
+            if emas is None:
+                logger.warning(f"Not enough data to calculate EMA{period} for {symbol}")
                 return None
-
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                candles = response.json()
-
-            # Parse candles based on exchange format
-            if exchange_name == "binance":
-                closes = [float(candle[4]) for candle in candles]  # Close price
-            elif exchange_name == "bybit":
-                closes = [float(candle[4]) for candle in candles.get("result", {}).get("list", [])][::-1]
-            elif exchange_name == "okx":
-                closes = [float(candle[4]) for candle in candles.get("data", [])][::-1]
-            else:
-                closes = []
-
-            if len(closes) < period:
-                logger.warning(f"Not enough data to calculate EMA{period}: got {len(closes)}, need {period}")
-                return None
-
-            # Calculate EMA
-            multiplier = 2 / (period + 1)
-            ema = closes[0]  # Start with first close
-
-            for close in closes[1:]:
-                ema = (close - ema) * multiplier + ema
-
-            logger.debug(f"Calculated EMA{period} for {symbol}: {ema:.2f}")
-            return ema
-
+            return emas["emas"][period]["value"]
         except Exception as e:
             logger.error(f"Error calculating EMA: {e}")
             return None
 
-    async def get_previous_ema(self, user_id: str, symbol: str, interval: str, period: int) -> Optional[float]:
-        """Get previously stored EMA value from Firebase"""
-        try:
-            if not firebase_initialized:
-                return None
-
-            from firebase_admin import db
-
-            ref = db.reference(f'ema_cache/{user_id}/{symbol}/{interval}/ema{period}')
-            data = ref.get()
-
-            if data and isinstance(data, dict):
-                return float(data.get('value', 0))
-
-            return None
-        except Exception as e:
-            logger.error(f"Error getting previous EMA: {e}")
-            return None
-
-    async def store_ema(self, user_id: str, symbol: str, interval: str, period: int, value: float):
-        """Store EMA value in Firebase for future comparison"""
-        try:
-            if not firebase_initialized:
-                return
-
-            from firebase_admin import db
-
-            ref = db.reference(f'ema_cache/{user_id}/{symbol}/{interval}/ema{period}')
-            ref.set({
-                'value': value,
-                'timestamp': int(time.time())
-            })
-        except Exception as e:
-            logger.error(f"Error storing EMA: {e}")
-
     async def check_ema_signal(
         self,
         user_id: str,
@@ -148,29 +65,28 @@ class EMAMonitorFirebase:
     ) -> Optional[Dict]:
         """Check for EMA crossover signals"""
         try:
-            # Calculate EMA 9 and EMA 21
-            ema9 = await self.calculate_ema(
-                exchange_name, api_key, api_secret, symbol, interval, 9, passphrase
-            )
-            ema21 = await self.calculate_ema(
-                exchange_name, api_key, api_secret, symbol, interval, 21, passphrase
-            )
-
-            if ema9 is None or ema21 is None:
+            # EMA 9 and EMA 21 from one candle update
+            emas = await indicator_engine.get_emas(exchange_name, symbol, interval, (9, 21))
+            if emas is None:
                 return None
 
-            # Get previous EMAs to detect crossover
-            previous_ema9 = await self.get_previous_ema(user_id, symbol, interval, 9)
-            previous_ema21 = await self.get_previous_ema(user_id, symbol, interval, 21)
+            ema9 = emas["emas"][9]["value"]
+            ema21 = emas["emas"][21]["value"]
+            previous_ema9 = emas["emas"][9]["previous"]
+            previous_ema21 = emas["emas"][21]["previous"]
+            price = emas["close"]
 
-            # Store current EMAs
-            await self.store_ema(user_id, symbol, interval, 9, ema9)
-            await self.store_ema(user_id, symbol, interval, 21, ema21)
+            # A closed candle is evaluated once per user; the first check only
+            # records it (its crossover may be up to an interval old)
+            candle_key = f"{user_id}:{exchange_name}:{symbol}:{interval}"
+            last_candle = self.last_checked_candle.get(candle_key)
+            is_new_candle = last_candle is not None and emas["open_time"] > last_candle
+            self.last_checked_candle[candle_key] = emas["open_time"]
 
             signal = None
 
             # Bullish crossover: EMA9 crosses above EMA21
-            if previous_ema9 and previous_ema21:
+            if is_new_candle and previous_ema9 and previous_ema21:
                 if previous_ema9 < previous_ema21 and ema9 > ema21:
                     signal = 'BUY'
                 # Bearish crossover: EMA9 crosses below EMA21
@@ -184,19 +100,19 @@ class EMAMonitorFirebase:
                 'ema9': round(ema9, 2),
                 'ema21': round(ema21, 2),
                 'signal': signal,
-                'price': ema9,  # Approximate current price
+                'price': price,
                 'timestamp': datetime.utcnow().isoformat()
             }
 
             # Save signal to Firebase if there's a crossover
             if signal:
                 logger.info(f"🚨 EMA Signal detected: {symbol} {signal} (EMA9: {ema9:.2f}, EMA21: {ema21:.2f})")
-                save_ema_signal(user_id, {
+                result['id'] = await save_ema_signal(user_id, {
                     'symbol': symbol,
                     'signal_type': signal,
                     'ema9': ema9,
                     'ema21': ema21,
-                    'price': ema9,
+                    'price': price,
                     'exchange': exchange_name,
                     'interval': interval
                 })
@@ -208,7 +124,7 @@ class EMAMonitorFirebase:
                         'signal': signal,
                         'exchange': exchange_name,
                         'symbol': symbol,
-                        'price': round(ema9, 2),
+                        'price': price,
                         'ema9': round(ema9, 2),
                         'ema21': round(ema21, 2),
                         'interval': interval,
@@ -232,7 +148,7 @@ class EMAMonitorFirebase:
             exchange_name = user_settings.get('exchange')
 
             # Get user's API keys from Firebase
-            api_keys = get_user_api_keys(user_id, exchange_name)
+            api_keys = await get_user_api_keys(user_id, exchange_name)
             if not api_keys:
                 logger.error(f"No API keys found for {exchange_name}")
                 return None
@@ -269,9 +185,8 @@ class EMAMonitorFirebase:
             # Update signal as acted upon
             if signal.get('id'):
                 try:
-                    from firebase_admin import db
-                    ref = db.reference(f'signals/{signal["id"]}')
-                    ref.update({
+                    path = record_path(user_id, 'signals', signal['id']) or f'signals/{signal["id"]}'
+                    await firebase_repository.update(path, {
                         'action_taken': True,
                         'trade_id': order_result.get('trade_id'),
                         'action_timestamp': int(time.time())
@@ -287,87 +202,63 @@ class EMAMonitorFirebase:
 
     async def start_monitoring_user(self, user_id: str, user_settings: Dict):
         """Start monitoring signals for a user"""
-        if user_id in self.monitoring_tasks:
+        if user_id in self.monitored_users:
             logger.warning(f"Already monitoring user {user_id}")
             return
 
-        task = asyncio.create_task(self._monitor_loop(user_id, user_settings))
-        self.monitoring_tasks[user_id] = task
-        logger.info(f"Started EMA monitoring for user {user_id}")
+        exchange_name = user_settings.get('exchange')
+        api_keys = await get_user_api_keys(user_id, exchange_name)
+        if not api_keys:
+            logger.error(f"No API keys found for {exchange_name}, cannot monitor")
+            return
+
+        watchlist = user_settings.get('watchlist', [])
+        interval = user_settings.get('interval', '15m')
+        self.monitored_users[user_id] = user_settings
+
+        # Signals are evaluated once per market and fanned out to users
+        for symbol in watchlist:
+            try:
+                await signal_scheduler.subscribe(user_id, exchange_name, symbol, interval, self._handle_signal)
+            except ValueError as e:
+                logger.error(f"Cannot monitor {symbol} for user {user_id}: {e}")
+
+        logger.info(f"Started EMA monitoring for user {user_id} ({len(watchlist)} symbols)")
 
     async def stop_monitoring_user(self, user_id: str):
         """Stop monitoring signals for a user"""
-        if user_id in self.monitoring_tasks:
-            task = self.monitoring_tasks[user_id]
-            task.cancel()
-            del self.monitoring_tasks[user_id]
+        if user_id in self.monitored_users:
+            del self.monitored_users[user_id]
+            await signal_scheduler.unsubscribe_user(user_id)
             logger.info(f"Stopped EMA monitoring for user {user_id}")
 
-    async def _monitor_loop(self, user_id: str, user_settings: Dict):
-        """Main monitoring loop for a user"""
-        try:
-            exchange_name = user_settings.get('exchange')
-            api_keys = get_user_api_keys(user_id, exchange_name)
+    async def _handle_signal(self, user_id: str, signal: Dict):
+        """Per-user handling of a shared market signal"""
+        user_settings = self.monitored_users.get(user_id)
+        if not user_settings:
+            return
 
-            if not api_keys:
-                logger.error(f"No API keys found for {exchange_name}, cannot monitor")
-                return
-
-            while True:
-                # Get user's watchlist
-                watchlist = user_settings.get('watchlist', [])
-                interval = user_settings.get('interval', '15m')
-
-                for symbol in watchlist:
-                    try:
-                        # Check signal
-                        signal = await self.check_ema_signal(
-                            user_id,
-                            exchange_name,
-                            api_keys.get('api_key'),
-                            api_keys.get('api_secret'),
-                            symbol,
-                            interval,
-                            api_keys.get('passphrase', '')
-                        )
-
-                        if signal and signal.get('signal') in ['BUY', 'SELL']:
-                            # Check if auto-trading is enabled
-                            if user_settings.get('enabled', False):
-                                await self.auto_open_position(user_id, signal, user_settings)
-
-                    except Exception as e:
-                        logger.error(f"Error checking {symbol}: {e}")
-
-                    # Rate limiting - wait between checks
-                    await asyncio.sleep(2)
-
-                # Wait for next interval check
-                interval_map = {
-                    '15m': 300,  # 5 minutes
-                    '30m': 600,  # 10 minutes
-                    '1h': 1200,  # 20 minutes
-                    '4h': 3600,  # 1 hour
-                    '1d': 7200,  # 2 hours
-                }
-
-                wait_time = interval_map.get(interval, 300)
-                logger.info(f"Waiting {wait_time}s until next check for user {user_id}")
-                await asyncio.sleep(wait_time)
-
-        except asyncio.CancelledError:
-            logger.info(f"Monitoring cancelled for user {user_id}")
-        except Exception as e:
-            logger.error(f"Error in monitoring loop for user {user_id}: {e}")
+        signal_id = await save_ema_signal(user_id, {
+            'symbol': signal['symbol'],
+            'signal_type': signal['signal'],
+            'ema9': signal['ema9'],
+            'ema21': signal['ema21'],
+            'price': signal['price'],
+            'exchange': signal['exchange'],
+            'interval': signal['interval']
+        })
+
+        # Check if auto-trading is enabled
+        if user_settings.get('enabled', False):
+            # Per-user copy: the market signal is shared by every subscriber
+            await self.auto_open_position(user_id, {**signal, 'id': signal_id}, user_settings)
 
     async def cleanup(self):
         """Cleanup all resources"""
-        # Cancel all monitoring tasks
-        for user_id, task in list(self.monitoring_tasks.items()):
-            task.cancel()
+        for user_id in list(self.monitored_users):
+            await self.stop_monitoring_user(user_id)
             logger.info(f"Cancelled monitoring for user {user_id}")
 
-        self.monitoring_tasks.clear()
         logger.info("EMA Monitor cleaned up")
 
 
@@ -0,0 +1,163 @@
+"""
+HTTP Client Pool
+Long-lived, connection-pooled httpx clients - one per exchange.
+
+- Keep-alive connections are reused across requests (no handshake per call)
+- HTTP/2 is used when the optional `h2` package is installed
+- Limits come from settings (HTTP_POOL_*)
+- Clients are created lazily and closed on app shutdown (startup.lifespan)
+- Every request passes the shared exchange rate limiter (rate_limiter) and
+  feeds its response headers back into it
+- Signed requests take their budget with reserve() before they are signed,
+  so a queued wait never outlives the signature's timestamp (recvWindow)
+- Per-credential exchange adapters are reused through service(), keyed by a
+  hash of the credentials (LRU, HTTP_POOL_MAX_SERVICES / HTTP_POOL_SERVICE_TTL)
+
+Timeouts are passed per request, so one client serves fast price calls and
+slower signed account calls alike.
+"""
+import hashlib
+import importlib.util
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Tuple, TypeVar
+
+import httpx
+
+from backend.config import settings
+from backend.services.rate_limiter import bucket_name, rate_limiter, request_cost
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# Headers carrying the caller's API key - requests are queued fairly per key
+API_KEY_HEADERS = ("X-MBX-APIKEY", "X-BAPI-API-KEY", "OK-ACCESS-KEY", "KC-API-KEY", "X-MEXC-APIKEY", "ApiKey")
+
+# Request extension marking a request whose budget reserve() already took
+RESERVED_EXTENSION = "rate_limit_reserved"
+
+
+def _digest(*parts: str) -> str:
+    # Secrets are not kept as dict keys
+    return hashlib.sha256(":".join(parts).encode()).hexdigest()[:16]
+
+
+def _rate_limit_hooks(name: str) -> Dict[str, list]:
+    """httpx event hooks that run `name`'s requests through the rate limiter"""
+
+    async def on_request(request: httpx.Request):
+        if request.extensions.get(RESERVED_EXTENSION):
+            return
+        bucket = bucket_name(name, request.url.host)
+        weight, priority = request_cost(bucket, request.method, request.url.path, request.url.params)
+        user_key = next((request.headers[h] for h in API_KEY_HEADERS if h in request.headers), None)
+        await rate_limiter.acquire(bucket, weight, priority, user_key)
+
+    async def on_response(response: httpx.Response):
+        bucket = bucket_name(name, response.request.url.host)
+        rate_limiter.update_from_headers(bucket, response.headers, response.status_code)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+class HTTPClientPool:
+    """Registry of shared httpx.AsyncClient instances keyed by name (exchange)"""
+
+    def __init__(self):
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.limits = httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_POOL_KEEPALIVE_EXPIRY
+        )
+        # (name, api key digest, credentials digest) -> [adapter, last_used]; least recently used first
+        self.services: "OrderedDict[Tuple[str, str, str], List[Any]]" = OrderedDict()
+        self.max_services = settings.HTTP_POOL_MAX_SERVICES
+        self.service_ttl = settings.HTTP_POOL_SERVICE_TTL
+
+    def get(self, name: str = "default") -> httpx.AsyncClient:
+        """Shared client for `name`, created on first use"""
+        client = self.clients.get(name)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                timeout=settings.HTTP_POOL_DEFAULT_TIMEOUT,
+                http2=HTTP2_AVAILABLE,
+                event_hooks=_rate_limit_hooks(name)
+            )
+            self.clients[name] = client
+            logger.info(f"🔗 HTTP client created for {name} (http2: {HTTP2_AVAILABLE})")
+        return client
+
+    def service(self, name: str, factory: Callable[..., T], api_key: str, *secrets: str) -> T:
+        """
+        Adapter for one credential set of exchange `name`, reused across calls
+
+        `factory(api_key, *secrets)` builds it on first use. Entries idle for
+        longer than HTTP_POOL_SERVICE_TTL, or beyond HTTP_POOL_MAX_SERVICES, are dropped.
+        """
+        now = time.time()
+        key = (name, _digest(api_key), _digest(api_key, *secrets))
+        entry = self.services.get(key)
+        if entry is None or now - entry[1] > self.service_ttl:
+            entry = [factory(api_key, *secrets), now]
+            self.services[key] = entry
+        entry[1] = now
+        self.services.move_to_end(key)
+
+        while self.services:
+            oldest_key, (_, last_used) = next(iter(self.services.items()))
+            if len(self.services) <= self.max_services and now - last_used <= self.service_ttl:
+                break
+            del self.services[oldest_key]
+        return entry[0]
+
+    def forget_service(self, name: str, api_key: str):
+        """Drop the cached adapters of an API key (e.g. after it was removed)"""
+        digest = _digest(api_key)
+        for key in [k for k in self.services if k[0] == name and k[1] == digest]:
+            del self.services[key]
+
+    async def reserve(self, name: str, method: str, url: str, params: Mapping = None, api_key: str = None) -> Dict:
+        """
+        Take the rate-limit budget for a signed request before signing it
+
+        Call right before building the timestamp/signature and send the request
+        with `extensions=` the returned dict; the request hook then lets that
+        request through without queuing it a second time. The marker travels
+        with the request, so nothing is left behind if signing fails.
+        """
+        url = httpx.URL(url)
+        bucket = bucket_name(name, url.host)
+        weight, priority = request_cost(bucket, method.upper(), url.path, params if params is not None else url.params)
+        await rate_limiter.acquire(bucket, weight, priority, api_key)
+        return {RESERVED_EXTENSION: True}
+
+    async def close(self):
+        """Close every client"""
+        for name, client in list(self.clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"❌ Error closing HTTP client {name}: {e}")
+        self.clients.clear()
+        self.services.clear()
+        logger.info("✅ HTTP client pool closed")
+
+    def get_stats(self) -> Dict:
+        """Pool statistics"""
+        return {
+            "clients": sorted(self.clients),
+            "http2": HTTP2_AVAILABLE,
+            "max_connections": settings.HTTP_POOL_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTTP_POOL_MAX_KEEPALIVE,
+            "services": len(self.services)
+        }
+
+
+# Singleton instance
+http_pool = HTTPClientPool()
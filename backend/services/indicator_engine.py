@@ -0,0 +1,287 @@
+"""
+Indicator Engine
+Incremental EMA state shared by every signal consumer.
+
+- State per (exchange, symbol, interval), one EMA per period
+- Seeded with an SMA of the first `period` closes, then O(1) per closed candle
+- Only missing closed candles are fetched; one fetch serves every period
+- State is persisted to Firebase (indicator_state/...) and restored on restart
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from backend.firebase_admin import get_indicator_state, save_indicator_state
+from backend.services.candle_store import INTERVAL_SECONDS, candle_store, fetch_klines
+
+logger = logging.getLogger(__name__)
+
+# fetcher(limit) -> candles oldest first, [open_time_ms, open, high, low, close, ...]
+CandleFetcher = Callable[[int], Awaitable[List[list]]]
+SeriesKey = Tuple[str, str, str]
+
+
+class EMAState:
+    """EMA for one period, seeded with an SMA"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.multiplier = 2 / (period + 1)
+        self.value: Optional[float] = None
+        self.previous: Optional[float] = None
+        self._seed_sum = 0.0
+        self._seed_count = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+    def update(self, close: float):
+        """Apply one closed candle"""
+        if self.value is None:
+            self._seed_sum += close
+            self._seed_count += 1
+            if self._seed_count == self.period:
+                self.value = self._seed_sum / self.period
+            return
+
+        self.previous = self.value
+        self.value = (close - self.value) * self.multiplier + self.value
+
+    def peek(self, close: float) -> Optional[float]:
+        """EMA if `close` were the next closed candle (for the forming candle)"""
+        if self.value is None:
+            return None
+        return (close - self.value) * self.multiplier + self.value
+
+    def export(self) -> Dict:
+        return {
+            "value": self.value,
+            "previous": self.previous,
+            "seed_sum": self._seed_sum,
+            "seed_count": self._seed_count
+        }
+
+    @classmethod
+    def load(cls, period: int, data: Dict) -> "EMAState":
+        state = cls(period)
+        state.value = data.get("value")
+        state.previous = data.get("previous")
+        state._seed_sum = float(data.get("seed_sum", 0.0))
+        state._seed_count = int(data.get("seed_count", 0))
+        return state
+
+
+class _SeriesState:
+    """All EMA periods for one (exchange, symbol, interval)"""
+
+    def __init__(self, key: SeriesKey, periods: Iterable[int]):
+        self.key = key
+        self.emas: Dict[int, EMAState] = {p: EMAState(p) for p in periods}
+        self.last_open_time = 0
+        self.last_close: Optional[float] = None
+        self.live_close: Optional[float] = None
+        self.updated_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    def apply(self, candles: List[list]) -> int:
+        """Apply closed candles newer than the last one seen"""
+        applied = 0
+        for candle in candles:
+            open_time = int(candle[0])
+            if open_time <= self.last_open_time:
+                continue
+            close = float(candle[4])
+            for ema in self.emas.values():
+                ema.update(close)
+            self.last_open_time = open_time
+            self.last_close = close
+            applied += 1
+        return applied
+
+    def export(self) -> Dict:
+        return {
+            "last_open_time": self.last_open_time,
+            "last_close": self.last_close,
+            "emas": {f"ema{p}": ema.export() for p, ema in self.emas.items()},
+            "updated_at": int(time.time())
+        }
+
+    @classmethod
+    def load(cls, key: SeriesKey, periods: Iterable[int], data: Dict) -> Optional["_SeriesState"]:
+        emas = data.get("emas") or {}
+        if any(f"ema{p}" not in emas for p in periods):
+            return None
+
+        state = cls(key, periods)
+        state.emas = {p: EMAState.load(p, emas[f"ema{p}"]) for p in periods}
+        state.last_open_time = int(data.get("last_open_time", 0))
+        state.last_close = data.get("last_close")
+        return state
+
+
+class IndicatorEngine:
+    """
+    Shared incremental EMA engine
+
+    get_emas() brings a series up to date with the fewest candles possible
+    and returns EMA values for the last closed candle plus the previous one,
+    which is all a crossover check needs.
+    """
+
+    SEED_CANDLES = 100
+    MAX_CATCH_UP = 300
+
+    def __init__(self, persist: bool = True):
+        self.persist = persist
+        self.series: Dict[SeriesKey, _SeriesState] = {}
+        self.stats = {"updates": 0, "seeds": 0, "candles_applied": 0, "restored": 0}
+
+    async def get_emas(
+        self,
+        exchange_name: str,
+        symbol: str,
+        interval: str,
+        periods: Iterable[int] = (9, 21),
+        fetcher: Optional[CandleFetcher] = None,
+        live: bool = False
+    ) -> Optional[Dict]:
+        """
+        Up-to-date EMAs for a market
+
+        With live=True the forming candle is always refreshed so "live_close"
+        and the "live" EMAs reflect the current price.
+
+        Returns {"open_time", "close", "live_close", "emas": {period: {"value", "previous", "live"}}}
+        or None when there is not enough history yet.
+        """
+        periods = tuple(sorted(set(periods)))
+        key = (exchange_name.lower(), symbol, interval)
+
+        state = self.series.get(key)
+        if state is None or any(p not in state.emas for p in periods):
+            wanted = set(periods) | (set(state.emas) if state else set())
+            state = await self._restore(key, wanted) or _SeriesState(key, wanted)
+            self.series[key] = state
+
+        async with state.lock:
+            await self._update(state, fetcher, live)
+
+        if not state.last_open_time and self.series.get(key) is state:
+            # No candles (e.g. unknown symbol) - do not keep an empty series around
+            del self.series[key]
+
+        if not all(state.emas[p].ready for p in periods):
+            return None
+
+        return {
+            "open_time": state.last_open_time,
+            "close": state.last_close,
+            "live_close": state.live_close if state.live_close is not None else state.last_close,
+            "emas": {
+                p: {
+                    "value": state.emas[p].value,
+                    "previous": state.emas[p].previous,
+                    "live": state.emas[p].peek(state.live_close) if state.live_close is not None else state.emas[p].value
+                }
+                for p in periods
+            }
+        }
+
+    def export_state(self) -> Dict[str, Dict]:
+        """All series state, keyed "exchange:symbol:interval\""""
+        return {":".join(key): state.export() for key, state in self.series.items()}
+
+    def get_stats(self) -> Dict:
+        """Engine statistics"""
+        return {**self.stats, "series": len(self.series)}
+
+    async def _restore(self, key: SeriesKey, periods: Iterable[int]) -> Optional[_SeriesState]:
+        if not self.persist:
+            return None
+
+        data = await get_indicator_state(*key)
+        if not data:
+            return None
+
+        state = _SeriesState.load(key, periods, data)
+        if state:
+            self.stats["restored"] += 1
+            logger.info(f"♻️ Restored EMA state for {key[1]} {key[2]} ({key[0]})")
+        return state
+
+    async def _update(self, state: _SeriesState, fetcher: Optional[CandleFetcher], live: bool = False):
+        exchange_name, symbol, interval = state.key
+        interval_ms = INTERVAL_SECONDS.get(interval, 0) * 1000
+        now_ms = int(time.time() * 1000)
+
+        # Nothing new can have closed since the last applied candle
+        if (not live and state.last_open_time and interval_ms
+                and now_ms < state.last_open_time + 2 * interval_ms):
+            return
+
+        # Bots keep a live buffer for Binance markets - use it when it is enough
+        candles = candle_store.get_candles(symbol, interval, exchange_name)
+        if state.last_open_time:
+            usable = bool(candles) and self._continues(state, candles, interval_ms)
+        else:
+            usable = len(candles) > 2 * max(state.emas)
+
+        if not usable:
+            limit = self.SEED_CANDLES
+            if state.last_open_time and interval_ms:
+                missing = (now_ms - state.last_open_time) // interval_ms
+                if missing + 2 <= self.MAX_CATCH_UP:
+                    limit = int(missing) + 2
+
+            try:
+                if fetcher:
+                    candles = await fetcher(limit)
+                else:
+                    candles = await fetch_klines(exchange_name, symbol, interval, limit)
+            except Exception as e:
+                logger.error(f"❌ Candle fetch failed for {symbol} {interval}: {e}")
+                return
+
+        if not candles:
+            return
+
+        closed = self._closed_candles(candles, interval_ms, now_ms)
+        state.live_close = float(candles[-1][4]) if len(closed) < len(candles) else None
+
+        if state.last_open_time and not self._continues(state, closed, interval_ms):
+            # Gap since the last update - rebuild from scratch
+            state.emas = {p: EMAState(p) for p in state.emas}
+            state.last_open_time, state.last_close = 0, None
+
+        if not state.last_open_time:
+            self.stats["seeds"] += 1
+
+        applied = state.apply(closed)
+        state.updated_at = time.time()
+        self.stats["updates"] += 1
+        self.stats["candles_applied"] += applied
+
+        if applied and self.persist:
+            await save_indicator_state(exchange_name, symbol, interval, state.export())
+
+    @staticmethod
+    def _closed_candles(candles: List[list], interval_ms: int, now_ms: int) -> List[list]:
+        if not interval_ms:
+            return candles[:-1]
+        return [c for c in candles if int(c[0]) + interval_ms <= now_ms]
+
+    @staticmethod
+    def _continues(state: _SeriesState, candles: List[list], interval_ms: int) -> bool:
+        """True if `candles` extend the series without a gap"""
+        if not candles:
+            return True
+        first = int(candles[0][0])
+        if first <= state.last_open_time:
+            return True
+        return bool(interval_ms) and first == state.last_open_time + interval_ms
+
+
+# Singleton instance
+indicator_engine = IndicatorEngine()
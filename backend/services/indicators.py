@@ -0,0 +1,220 @@
+"""
+Vectorized Indicators
+NumPy indicators over 2-D arrays (symbols x candles).
+
+Every function takes arrays shaped (N, T) - one row per symbol, oldest candle
+first - and returns arrays of the same shape. Values that are not defined yet
+(the warm-up window) are NaN. 1-D input is treated as a single symbol.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _as_2d(values) -> np.ndarray:
+    return np.atleast_2d(np.asarray(values, dtype=np.float64))
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Simple moving average"""
+    values = _as_2d(values)
+    n, t = values.shape
+    out = np.full((n, t), np.nan)
+    if t < period:
+        return out
+
+    csum = np.cumsum(values, axis=1)
+    out[:, period - 1] = csum[:, period - 1]
+    out[:, period:] = csum[:, period:] - csum[:, :-period]
+    out[:, period - 1:] /= period
+    return out
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Exponential moving average, seeded with the SMA of the first `period` values"""
+    values = _as_2d(values)
+    n, t = values.shape
+    out = np.full((n, t), np.nan)
+    if t < period:
+        return out
+
+    multiplier = 2 / (period + 1)
+    current = values[:, :period].mean(axis=1)
+    out[:, period - 1] = current
+    # Recursive along time, vectorized across all symbols
+    for i in range(period, t):
+        current = (values[:, i] - current) * multiplier + current
+        out[:, i] = current
+    return out
+
+
+def _wilder(values: np.ndarray, period: int, start: int) -> np.ndarray:
+    """Wilder smoothing starting with the mean of values[:, start:start + period]"""
+    n, t = values.shape
+    out = np.full((n, t), np.nan)
+    first = start + period - 1
+    if t <= first:
+        return out
+
+    current = values[:, start:start + period].mean(axis=1)
+    out[:, first] = current
+    for i in range(first + 1, t):
+        current = (current * (period - 1) + values[:, i]) / period
+        out[:, i] = current
+    return out
+
+
+def rsi(closes, period: int = 14) -> np.ndarray:
+    """Relative strength index (Wilder)"""
+    closes = _as_2d(closes)
+    n, t = closes.shape
+    if t <= period:
+        return np.full((n, t), np.nan)
+
+    delta = np.zeros((n, t))
+    delta[:, 1:] = np.diff(closes, axis=1)
+    avg_gain = _wilder(np.clip(delta, 0, None), period, 1)
+    avg_loss = _wilder(np.clip(-delta, 0, None), period, 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        out = 100 - 100 / (1 + rs)
+    # No losses in the window -> RSI 100
+    out = np.where((avg_loss == 0) & ~np.isnan(avg_gain), 100.0, out)
+    return out
+
+
+def atr(high, low, close, period: int = 14) -> np.ndarray:
+    """Average true range (Wilder)"""
+    high, low, close = _as_2d(high), _as_2d(low), _as_2d(close)
+    prev_close = np.empty_like(close)
+    prev_close[:, 0] = close[:, 0]
+    prev_close[:, 1:] = close[:, :-1]
+
+    true_range = np.maximum.reduce([
+        high - low,
+        np.abs(high - prev_close),
+        np.abs(low - prev_close)
+    ])
+    return _wilder(true_range, period, 0)
+
+
+def crossovers(fast, slow) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Crossover masks
+
+    bullish[i, j] is True when fast crosses above slow at candle j,
+    bearish[i, j] when it crosses below. Warm-up candles are always False.
+    """
+    fast, slow = _as_2d(fast), _as_2d(slow)
+    bullish = np.zeros(fast.shape, dtype=bool)
+    bearish = np.zeros(fast.shape, dtype=bool)
+
+    with np.errstate(invalid="ignore"):
+        prev_below = fast[:, :-1] < slow[:, :-1]
+        prev_above = fast[:, :-1] > slow[:, :-1]
+        bullish[:, 1:] = prev_below & (fast[:, 1:] > slow[:, 1:])
+        bearish[:, 1:] = prev_above & (fast[:, 1:] < slow[:, 1:])
+    return bullish, bearish
+
+
+def closes_matrix(candle_sets: Sequence[List[list]], length: int) -> Tuple[np.ndarray, List[int]]:
+    """
+    Stack the last `length` closes of each candle list into an (N, length) array
+
+    Returns the matrix and the indices of the candle lists that had enough data.
+    """
+    rows, used = [], []
+    for i, candles in enumerate(candle_sets):
+        if candles and len(candles) >= length:
+            rows.append([float(c[4]) for c in candles[-length:]])
+            used.append(i)
+    if not rows:
+        return np.empty((0, length)), used
+    return np.asarray(rows, dtype=np.float64), used
+
+
+def ema_crossover_scan(closes, fast: int = 9, slow: int = 21) -> Dict[str, np.ndarray]:
+    """
+    EMA fast/slow crossover state at the last candle for every symbol
+
+    Returns 1-D arrays of length N: ema_fast, ema_slow, bullish, bearish, trend
+    (1 = fast above slow, -1 = below, 0 = equal/undefined).
+    """
+    closes = _as_2d(closes)
+    ema_fast = ema(closes, fast)
+    ema_slow = ema(closes, slow)
+    bullish, bearish = crossovers(ema_fast, ema_slow)
+
+    last_fast, last_slow = ema_fast[:, -1], ema_slow[:, -1]
+    with np.errstate(invalid="ignore"):
+        trend = np.sign(np.nan_to_num(last_fast - last_slow)).astype(int)
+
+    return {
+        "ema_fast": last_fast,
+        "ema_slow": last_slow,
+        "bullish": bullish[:, -1],
+        "bearish": bearish[:, -1],
+        "trend": trend
+    }
+
+
+async def scan_ema_crossovers(
+    exchange_name: str,
+    symbols: Sequence[str],
+    interval: str = "15m",
+    fast: int = 9,
+    slow: int = 21,
+    candles: int = 100,
+    concurrency: int = 10
+) -> List[Dict]:
+    """
+    Market-wide EMA crossover scan on closed candles
+
+    Candles are fetched concurrently (bounded), then every symbol is evaluated
+    in one vectorized pass. Raises ValueError for an exchange or interval
+    without kline support.
+    """
+    from backend.services.candle_store import INTERVAL_SECONDS, KLINE_EXCHANGES, fetch_klines
+
+    # Validated up front: per-symbol fetch errors are only logged
+    if exchange_name.lower() not in KLINE_EXCHANGES:
+        raise ValueError(f"EMA scan not supported for {exchange_name}")
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(symbol: str) -> Optional[List[list]]:
+        async with semaphore:
+            try:
+                rows = await fetch_klines(exchange_name, symbol, interval, candles + 1)
+                return rows[:-1]  # drop the forming candle
+            except Exception as e:
+                logger.warning(f"Scan fetch failed for {symbol}: {e}")
+                return None
+
+    candle_sets = await asyncio.gather(*(fetch(s) for s in symbols))
+    length = min((len(c) for c in candle_sets if c and len(c) > 2 * slow), default=0)
+    if not length:
+        return []
+
+    closes, used = closes_matrix(candle_sets, length)
+    scan = ema_crossover_scan(closes, fast, slow)
+
+    results = []
+    for row, idx in enumerate(used):
+        signal = "BUY" if scan["bullish"][row] else "SELL" if scan["bearish"][row] else None
+        results.append({
+            "symbol": symbols[idx],
+            f"ema{fast}": round(float(scan["ema_fast"][row]), 6),
+            f"ema{slow}": round(float(scan["ema_slow"][row]), 6),
+            "price": float(closes[row, -1]),
+            "trend": "BULLISH" if scan["trend"][row] > 0 else "BEARISH" if scan["trend"][row] < 0 else "NEUTRAL",
+            "signal": signal
+        })
+    return results
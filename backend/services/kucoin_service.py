@@ -3,7 +3,7 @@ import hashlib
 import base64
 import time
 from typing import Dict, List, Optional
-import httpx
+from backend.services.http_pool import http_pool
 import json
 
 class KuCoinService:
@@ -39,14 +39,19 @@ class KuCoinService:
     def _get_base_url(self, is_futures: bool) -> str:
         return self.FUTURES_BASE_URL if is_futures else self.SPOT_BASE_URL
     
+    async def _reserve(self, method: str, url: str):
+        """Rate-limit budget for a signed request - before its timestamp is taken"""
+        return await http_pool.reserve("kucoin", method, url, None, self.api_key)
+    
     async def get_balance(self, is_futures: bool = False) -> Dict:
         """Get account balance"""
         try:
             base_url = self._get_base_url(is_futures)
-            timestamp = str(int(time.time() * 1000))
             method = "GET"
             endpoint = "/api/v1/account-overview" if is_futures else "/api/v1/accounts"
             
+            reserved = await self._reserve(method, f"{base_url}{endpoint}")
+            timestamp = str(int(time.time() * 1000))
             signature, passphrase = self._generate_signature(timestamp, method, endpoint)
             
             headers = {
@@ -57,34 +62,36 @@ class KuCoinService:
                 "KC-API-KEY-VERSION": "2"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("kucoin")
+            response = await client.get(
+                f"{base_url}{endpoint}",
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["code"] == "200000":
-                    if is_futures:
-                        account_data = data["data"]
-                        return {
-                            "total": float(account_data.get("accountEquity", 0)),
-                            "available": float(account_data.get("availableBalance", 0)),
-                            "currency": "USDT"
-                        }
-                    else:
-                        # Find USDT balance in spot
-                        for account in data["data"]:
-                            if account["currency"] == "USDT" and account["type"] == "trade":
-                                return {
-                                    "total": float(account["balance"]),
-                                    "available": float(account["available"]),
-                                    "currency": "USDT"
-                                }
-                        return {"total": 0, "available": 0, "currency": "USDT"}
+            if data["code"] == "200000":
+                if is_futures:
+                    account_data = data["data"]
+                    return {
+                        "total": float(account_data.get("accountEquity", 0)),
+                        "available": float(account_data.get("availableBalance", 0)),
+                        "currency": "USDT"
+                    }
                 else:
-                    raise Exception(f"KuCoin API error: {data.get('msg', 'Unknown error')}")
+                    # Find USDT balance in spot
+                    for account in data["data"]:
+                        if account["currency"] == "USDT" and account["type"] == "trade":
+                            return {
+                                "total": float(account["balance"]),
+                                "available": float(account["available"]),
+                                "currency": "USDT"
+                            }
+                    return {"total": 0, "available": 0, "currency": "USDT"}
+            else:
+                raise Exception(f"KuCoin API error: {data.get('msg', 'Unknown error')}")
                     
         except Exception as e:
             raise Exception(f"KuCoin balance error: {str(e)}")
@@ -95,21 +102,22 @@ class KuCoinService:
             base_url = self._get_base_url(is_futures)
             endpoint = "/api/v1/ticker" if is_futures else "/api/v1/market/orderbook/level1"
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}",
-                    params={"symbol": symbol}
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("kucoin")
+            response = await client.get(
+                f"{base_url}{endpoint}",
+                params={"symbol": symbol},
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["code"] == "200000":
-                    if is_futures:
-                        return float(data["data"]["price"])
-                    else:
-                        return float(data["data"]["price"])
+            if data["code"] == "200000":
+                if is_futures:
+                    return float(data["data"]["price"])
                 else:
-                    raise Exception(f"Price not found for {symbol}")
+                    return float(data["data"]["price"])
+            else:
+                raise Exception(f"Price not found for {symbol}")
                     
         except Exception as e:
             raise Exception(f"KuCoin price error: {str(e)}")
@@ -127,7 +135,6 @@ class KuCoinService:
         """Create market order"""
         try:
             base_url = self._get_base_url(is_futures)
-            timestamp = str(int(time.time() * 1000))
             method = "POST"
             
             if is_futures:
@@ -138,6 +145,8 @@ class KuCoinService:
                     "leverage": leverage
                 })
                 
+                reserved = await self._reserve(method, f"{base_url}{leverage_endpoint}")
+                timestamp = str(int(time.time() * 1000))
                 leverage_signature, passphrase = self._generate_signature(
                     timestamp, method, leverage_endpoint, leverage_body
                 )
@@ -151,12 +160,14 @@ class KuCoinService:
                     "Content-Type": "application/json"
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    await client.post(
-                        f"{base_url}{leverage_endpoint}",
-                        content=leverage_body,
-                        headers=headers
-                    )
+                client = http_pool.get("kucoin")
+                await client.post(
+                    f"{base_url}{leverage_endpoint}",
+                    content=leverage_body,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
                 
                 # Create futures order
                 order_endpoint = "/api/v1/orders"
@@ -178,6 +189,7 @@ class KuCoinService:
                     "size": str(amount)
                 })
             
+            reserved = await self._reserve(method, f"{base_url}{order_endpoint}")
             timestamp = str(int(time.time() * 1000))
             signature, passphrase = self._generate_signature(timestamp, method, order_endpoint, order_body)
             
@@ -190,14 +202,16 @@ class KuCoinService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{base_url}{order_endpoint}",
-                    content=order_body,
-                    headers=headers
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_pool.get("kucoin")
+            response = await client.post(
+                f"{base_url}{order_endpoint}",
+                content=order_body,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            return response.json()
                     
         except Exception as e:
             raise Exception(f"KuCoin order error: {str(e)}")
@@ -209,10 +223,11 @@ class KuCoinService:
                 return []
             
             base_url = self._get_base_url(is_futures)
-            timestamp = str(int(time.time() * 1000))
             method = "GET"
             endpoint = "/api/v1/positions"
             
+            reserved = await self._reserve(method, f"{base_url}{endpoint}")
+            timestamp = str(int(time.time() * 1000))
             signature, passphrase = self._generate_signature(timestamp, method, endpoint)
             
             headers = {
@@ -223,32 +238,34 @@ class KuCoinService:
                 "KC-API-KEY-VERSION": "2"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("kucoin")
+            response = await client.get(
+                f"{base_url}{endpoint}",
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["code"] == "200000":
-                    active_positions = []
-                    for pos in data["data"]:
-                        current_qty = float(pos.get("currentQty", 0))
-                        if current_qty != 0:
-                            active_positions.append({
-                                "symbol": pos["symbol"],
-                                "side": "LONG" if current_qty > 0 else "SHORT",
-                                "amount": abs(current_qty),
-                                "entry_price": float(pos["avgEntryPrice"]),
-                                "current_price": float(pos["markPrice"]),
-                                "unrealized_pnl": float(pos["unrealisedPnl"]),
-                                "leverage": int(pos["realLeverage"])
-                            })
+            if data["code"] == "200000":
+                active_positions = []
+                for pos in data["data"]:
+                    current_qty = float(pos.get("currentQty", 0))
+                    if current_qty != 0:
+                        active_positions.append({
+                            "symbol": pos["symbol"],
+                            "side": "LONG" if current_qty > 0 else "SHORT",
+                            "amount": abs(current_qty),
+                            "entry_price": float(pos["avgEntryPrice"]),
+                            "current_price": float(pos["markPrice"]),
+                            "unrealized_pnl": float(pos["unrealisedPnl"]),
+                            "leverage": int(pos["realLeverage"])
+                        })
                     
-                    return active_positions
-                else:
-                    raise Exception(f"KuCoin API error: {data.get('msg', 'Unknown error')}")
+                return active_positions
+            else:
+                raise Exception(f"KuCoin API error: {data.get('msg', 'Unknown error')}")
                      
         except Exception as e:
             raise Exception(f"KuCoin positions error: {str(e)}")
@@ -270,7 +287,6 @@ class KuCoinService:
             
             # Close via market order
             base_url = self._get_base_url(is_futures)
-            timestamp = str(int(time.time() * 1000))
             method = "POST"
             endpoint = "/api/v1/orders"
             
@@ -285,6 +301,8 @@ class KuCoinService:
                 "reduceOnly": True
             })
             
+            reserved = await self._reserve(method, f"{base_url}{endpoint}")
+            timestamp = str(int(time.time() * 1000))
             signature, passphrase = self._generate_signature(timestamp, method, endpoint, order_body)
             
             headers = {
@@ -296,20 +314,22 @@ class KuCoinService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{base_url}{endpoint}",
-                    content=order_body,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                print(f"[KUCOIN] Position closed: {result.get('data', {}).get('orderId')}")
+            client = http_pool.get("kucoin")
+            response = await client.post(
+                f"{base_url}{endpoint}",
+                content=order_body,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            print(f"[KUCOIN] Position closed: {result.get('data', {}).get('orderId')}")
                 
-                # Cancel all open orders
-                await self.cancel_all_orders(symbol, is_futures)
+            # Cancel all open orders
+            await self.cancel_all_orders(symbol, is_futures)
                 
-                return result
+            return result
                 
         except Exception as e:
             print(f"[KUCOIN ERROR] Close position failed: {str(e)}")
@@ -321,10 +341,11 @@ class KuCoinService:
             print(f"[KUCOIN] Cancelling all orders for {symbol}")
             
             base_url = self._get_base_url(is_futures)
-            timestamp = str(int(time.time() * 1000))
             method = "DELETE"
             endpoint = f"/api/v1/orders?symbol={symbol}"
             
+            reserved = await self._reserve(method, f"{base_url}{endpoint}")
+            timestamp = str(int(time.time() * 1000))
             signature, passphrase = self._generate_signature(timestamp, method, endpoint)
             
             headers = {
@@ -335,22 +356,27 @@ class KuCoinService:
                 "KC-API-KEY-VERSION": "2"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.delete(
-                    f"{base_url}{endpoint}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                print(f"[KUCOIN] All orders cancelled for {symbol}")
-                return True
+            client = http_pool.get("kucoin")
+            response = await client.delete(
+                f"{base_url}{endpoint}",
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            print(f"[KUCOIN] All orders cancelled for {symbol}")
+            return True
                 
         except Exception as e:
             print(f"[KUCOIN ERROR] Cancel orders failed: {str(e)}")
             return False
 
 
+def _get_service(api_key: str, api_secret: str, passphrase: str = "") -> KuCoinService:
+    return http_pool.service("kucoin", KuCoinService, api_key, api_secret, passphrase)
+
 async def get_balance(api_key: str, api_secret: str, is_futures: bool = False, passphrase: str = "") -> Dict:
-    service = KuCoinService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.get_balance(is_futures)
 
 async def create_order(
@@ -365,13 +391,13 @@ async def create_order(
     sl_percentage: float = 0,
     passphrase: str = ""
 ) -> Dict:
-    service = KuCoinService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.create_order(symbol, side, amount, leverage, is_futures, tp_percentage, sl_percentage)
 
 async def get_positions(api_key: str, api_secret: str, is_futures: bool = False, passphrase: str = "") -> List[Dict]:
-    service = KuCoinService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.get_positions(is_futures)
 
 async def get_current_price(api_key: str, api_secret: str, symbol: str, is_futures: bool = False, passphrase: str = "") -> float:
-    service = KuCoinService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.get_current_price(symbol, is_futures)
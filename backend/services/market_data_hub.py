@@ -0,0 +1,312 @@
+"""
+Market Data Hub
+Multiplexes Binance futures market streams over a small number of
+combined-stream WebSocket connections.
+
+- Streams are added/removed at runtime with SUBSCRIBE/UNSUBSCRIBE frames
+- Each connection carries up to MARKET_DATA_MAX_STREAMS_PER_CONNECTION streams
+- Connections reconnect forever with jittered exponential backoff
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import websockets
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+StreamHandler = Callable[[dict], Awaitable[None]]
+
+
+def jittered_backoff(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """
+    Exponential backoff with jitter.
+
+    Half of the delay is fixed and half is random, so reconnects are spread
+    out without ever collapsing into a tight retry loop.
+    """
+    # Exponent clamped: 2 ** 1024 overflows a float in long-running reconnect loops
+    delay = min(cap, base * (2 ** min(attempt, 16)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class _StreamConnection:
+    """A single combined-stream WebSocket carrying a subset of the hub's streams"""
+
+    # Binance allows 10 incoming control messages per second per connection,
+    # so subscribe/unsubscribe requests are batched over a short window.
+    CONTROL_BATCH_DELAY = 0.25
+
+    def __init__(self, hub: "MarketDataHub", conn_id: int):
+        self.hub = hub
+        self.conn_id = conn_id
+        self.streams: Set[str] = set()
+        self.websocket = None
+        self.task: Optional[asyncio.Task] = None
+        self.connected_at: Optional[float] = None
+        self.last_message_time: Optional[float] = None
+        self.reconnects = 0
+
+        self._request_id = 0
+        self._pending_subscribe: Set[str] = set()
+        self._pending_unsubscribe: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def add(self, stream: str):
+        """Attach a stream to this connection"""
+        self.streams.add(stream)
+        self._queue_control("SUBSCRIBE", stream)
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    def remove(self, stream: str):
+        """Detach a stream from this connection"""
+        self.streams.discard(stream)
+        self._queue_control("UNSUBSCRIBE", stream)
+
+    async def stop(self):
+        """Close the connection and stop reconnecting"""
+        for task in (self._flush_task, self.task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    logger.error(f"❌ Error stopping market data connection #{self.conn_id}: {e}")
+        self.task = None
+        self._flush_task = None
+        self.websocket = None
+
+    def _queue_control(self, method: str, stream: str):
+        if method == "SUBSCRIBE":
+            self._pending_unsubscribe.discard(stream)
+            self._pending_subscribe.add(stream)
+        else:
+            self._pending_subscribe.discard(stream)
+            self._pending_unsubscribe.add(stream)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_control())
+
+    async def _flush_control(self):
+        await asyncio.sleep(self.CONTROL_BATCH_DELAY)
+
+        if self.websocket is None:
+            # Not connected - every stream in self.streams is subscribed on (re)connect
+            self._pending_subscribe.clear()
+            self._pending_unsubscribe.clear()
+            return
+
+        for method, pending in (("UNSUBSCRIBE", self._pending_unsubscribe),
+                                ("SUBSCRIBE", self._pending_subscribe)):
+            if pending:
+                params = sorted(pending)
+                pending.clear()
+                await self._send(method, params)
+
+    async def _send(self, method: str, params: List[str]):
+        if self.websocket is None:
+            return
+
+        self._request_id += 1
+        try:
+            await self.websocket.send(json.dumps({
+                "method": method,
+                "params": params,
+                "id": self._request_id
+            }))
+            logger.debug(f"📡 {method} {len(params)} streams on connection #{self.conn_id}")
+        except Exception as e:
+            # The read loop notices the broken socket and resubscribes on reconnect
+            logger.warning(f"⚠️ {method} failed on market data connection #{self.conn_id}: {e}")
+
+    async def _run(self):
+        attempt = 0
+        url = f"{settings.WEBSOCKET_URL}/stream"
+
+        while self.hub.is_running and self.streams:
+            try:
+                async with websockets.connect(
+                    url,
+                    ping_interval=settings.WEBSOCKET_PING_INTERVAL,
+                    ping_timeout=settings.WEBSOCKET_PING_TIMEOUT,
+                    close_timeout=settings.WEBSOCKET_CLOSE_TIMEOUT
+                ) as websocket:
+                    self.websocket = websocket
+                    self.connected_at = time.time()
+                    self.last_message_time = time.time()
+                    attempt = 0
+
+                    self._pending_subscribe.clear()
+                    self._pending_unsubscribe.clear()
+                    if self.streams:
+                        await self._send("SUBSCRIBE", sorted(self.streams))
+
+                    logger.info(f"✅ Market data connection #{self.conn_id} connected ({len(self.streams)} streams)")
+                    await self._read_loop(websocket)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Market data connection #{self.conn_id} error: {e}")
+            finally:
+                self.websocket = None
+                self.connected_at = None
+
+            if not (self.hub.is_running and self.streams):
+                break
+
+            wait_time = jittered_backoff(attempt, cap=settings.WEBSOCKET_RECONNECT_MAX_DELAY)
+            attempt += 1
+            self.reconnects += 1
+            logger.info(f"🔄 Reconnecting market data connection #{self.conn_id} in {wait_time:.1f}s...")
+            await asyncio.sleep(wait_time)
+
+        logger.info(f"🔌 Market data connection #{self.conn_id} closed")
+
+    async def _read_loop(self, websocket):
+        idle_timeout = settings.MARKET_DATA_IDLE_TIMEOUT
+
+        while self.hub.is_running and self.streams:
+            try:
+                raw = await asyncio.wait_for(websocket.recv(), timeout=idle_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ No data on market data connection #{self.conn_id} for {idle_timeout}s - reconnecting")
+                return
+
+            self.last_message_time = time.time()
+
+            try:
+                message = json.loads(raw)
+            except ValueError:
+                logger.debug(f"Ignoring non-JSON frame on connection #{self.conn_id}")
+                continue
+
+            stream = message.get("stream")
+            if stream is None:
+                # Control response ({"result": null, "id": n}) or error frame
+                if message.get("error"):
+                    logger.error(f"❌ Market data control error on connection #{self.conn_id}: {message['error']}")
+                continue
+
+            await self.hub._dispatch(stream, message.get("data"))
+
+
+class MarketDataHub:
+    """
+    Shared market-data hub for all bots
+
+    Consumers subscribe a handler to a stream name (e.g. "btcusdt@ticker").
+    The first handler for a stream opens the subscription, the last one to
+    leave closes it. Handlers are awaited in the reader task, so they must be fast.
+    """
+
+    def __init__(self, max_streams_per_connection: int = None):
+        self.max_streams_per_connection = max_streams_per_connection or settings.MARKET_DATA_MAX_STREAMS_PER_CONNECTION
+        self.handlers: Dict[str, List[StreamHandler]] = {}
+        self.stream_connections: Dict[str, _StreamConnection] = {}
+        self.connections: List[_StreamConnection] = []
+        self.is_running = True
+        self.messages_dispatched = 0
+
+        self._next_conn_id = 1
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, stream: str, handler: StreamHandler):
+        """Register a handler for a stream, opening the stream if needed"""
+        stream = stream.lower()
+        async with self._lock:
+            self.is_running = True
+            handlers = self.handlers.setdefault(stream, [])
+            handlers.append(handler)
+
+            if len(handlers) == 1:
+                connection = self._connection_with_capacity()
+                self.stream_connections[stream] = connection
+                connection.add(stream)
+                logger.info(f"✅ Stream {stream} added to market data connection #{connection.conn_id}")
+
+    async def unsubscribe(self, stream: str, handler: StreamHandler):
+        """Remove a handler, closing the stream when nobody listens anymore"""
+        stream = stream.lower()
+        async with self._lock:
+            handlers = self.handlers.get(stream)
+            if not handlers or handler not in handlers:
+                return
+
+            handlers.remove(handler)
+            if handlers:
+                return
+
+            del self.handlers[stream]
+            connection = self.stream_connections.pop(stream, None)
+            if connection is None:
+                return
+
+            connection.remove(stream)
+            logger.info(f"🔌 Stream {stream} removed from market data connection #{connection.conn_id}")
+
+            if not connection.streams:
+                await connection.stop()
+                self.connections.remove(connection)
+
+    def _connection_with_capacity(self) -> _StreamConnection:
+        for connection in self.connections:
+            if len(connection.streams) < self.max_streams_per_connection:
+                return connection
+
+        connection = _StreamConnection(self, self._next_conn_id)
+        self._next_conn_id += 1
+        self.connections.append(connection)
+        return connection
+
+    async def _dispatch(self, stream: str, data: Optional[dict]):
+        if data is None:
+            return
+
+        self.messages_dispatched += 1
+        for handler in list(self.handlers.get(stream, ())):
+            try:
+                await handler(data)
+            except Exception as e:
+                logger.error(f"❌ Market data handler error for {stream}: {e}")
+
+    def get_stats(self) -> dict:
+        """Hub statistics"""
+        return {
+            "streams": len(self.handlers),
+            "handlers": sum(len(h) for h in self.handlers.values()),
+            "connections": [
+                {
+                    "id": c.conn_id,
+                    "streams": len(c.streams),
+                    "connected": c.websocket is not None,
+                    "reconnects": c.reconnects,
+                    "last_message_age": round(time.time() - c.last_message_time, 1) if c.last_message_time else None
+                }
+                for c in self.connections
+            ],
+            "messages_dispatched": self.messages_dispatched
+        }
+
+    async def close(self):
+        """Close every connection"""
+        async with self._lock:
+            self.is_running = False
+            for connection in self.connections:
+                await connection.stop()
+            self.connections.clear()
+            self.stream_connections.clear()
+            self.handlers.clear()
+            logger.info("✅ MarketDataHub closed")
+
+
+# Singleton instance
+market_data_hub = MarketDataHub()
@@ -2,7 +2,7 @@ import hmac
 import hashlib
 import time
 from typing import Dict, List, Optional
-import httpx
+from backend.services.http_pool import http_pool
 from urllib.parse import urlencode
 
 class MEXCService:
@@ -26,6 +26,10 @@ class MEXCService:
     def _get_base_url(self, is_futures: bool) -> str:
         return self.FUTURES_BASE_URL if is_futures else self.SPOT_BASE_URL
     
+    async def _reserve(self, method: str, url: str):
+        """Rate-limit budget for a signed request - before its timestamp is taken"""
+        return await http_pool.reserve("mexc", method, url, {}, self.api_key)
+    
     async def get_balance(self, is_futures: bool = False) -> Dict:
         """Get account balance"""
         try:
@@ -33,6 +37,7 @@ class MEXCService:
             
             if is_futures:
                 endpoint = "/api/v1/private/account/assets"
+                reserved = await self._reserve("GET", f"{base_url}{endpoint}")
                 params = {
                     "timestamp": int(time.time() * 1000)
                 }
@@ -43,28 +48,31 @@ class MEXCService:
                     "Content-Type": "application/json"
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        f"{base_url}{endpoint}",
-                        params=params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                client = http_pool.get("mexc")
+                response = await client.get(
+                    f"{base_url}{endpoint}",
+                    params=params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
+                data = response.json()
                     
-                    if data["success"]:
-                        for asset in data["data"]:
-                            if asset["currency"] == "USDT":
-                                return {
-                                    "total": float(asset["equity"]),
-                                    "available": float(asset["availableBalance"]),
-                                    "currency": "USDT"
-                                }
-                        return {"total": 0, "available": 0, "currency": "USDT"}
-                    else:
-                        raise Exception(f"MEXC API error: {data.get('message', 'Unknown error')}")
+                if data["success"]:
+                    for asset in data["data"]:
+                        if asset["currency"] == "USDT":
+                            return {
+                                "total": float(asset["equity"]),
+                                "available": float(asset["availableBalance"]),
+                                "currency": "USDT"
+                            }
+                    return {"total": 0, "available": 0, "currency": "USDT"}
+                else:
+                    raise Exception(f"MEXC API error: {data.get('message', 'Unknown error')}")
             else:
                 endpoint = "/api/v3/account"
+                reserved = await self._reserve("GET", f"{base_url}{endpoint}")
                 params = {
                     "timestamp": int(time.time() * 1000)
                 }
@@ -74,23 +82,25 @@ class MEXCService:
                     "X-MEXC-APIKEY": self.api_key
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.get(
-                        f"{base_url}{endpoint}",
-                        params=params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                client = http_pool.get("mexc")
+                response = await client.get(
+                    f"{base_url}{endpoint}",
+                    params=params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
+                data = response.json()
                     
-                    for balance in data.get("balances", []):
-                        if balance["asset"] == "USDT":
-                            return {
-                                "total": float(balance["free"]) + float(balance["locked"]),
-                                "available": float(balance["free"]),
-                                "currency": "USDT"
-                            }
-                    return {"total": 0, "available": 0, "currency": "USDT"}
+                for balance in data.get("balances", []):
+                    if balance["asset"] == "USDT":
+                        return {
+                            "total": float(balance["free"]) + float(balance["locked"]),
+                            "available": float(balance["free"]),
+                            "currency": "USDT"
+                        }
+                return {"total": 0, "available": 0, "currency": "USDT"}
                     
         except Exception as e:
             raise Exception(f"MEXC balance error: {str(e)}")
@@ -102,28 +112,30 @@ class MEXCService:
             
             if is_futures:
                 endpoint = "/api/v1/contract/ticker"
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        f"{base_url}{endpoint}",
-                        params={"symbol": symbol}
-                    )
-                    response.raise_for_status()
-                    data = response.json()
+                client = http_pool.get("mexc")
+                response = await client.get(
+                    f"{base_url}{endpoint}",
+                    params={"symbol": symbol},
+                    timeout=10.0
+                )
+                response.raise_for_status()
+                data = response.json()
                     
-                    if data["success"]:
-                        return float(data["data"]["lastPrice"])
-                    else:
-                        raise Exception(f"Price not found for {symbol}")
+                if data["success"]:
+                    return float(data["data"]["lastPrice"])
+                else:
+                    raise Exception(f"Price not found for {symbol}")
             else:
                 endpoint = "/api/v3/ticker/price"
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        f"{base_url}{endpoint}",
-                        params={"symbol": symbol}
-                    )
-                    response.raise_for_status()
-                    data = response.json()
-                    return float(data["price"])
+                client = http_pool.get("mexc")
+                response = await client.get(
+                    f"{base_url}{endpoint}",
+                    params={"symbol": symbol},
+                    timeout=10.0
+                )
+                response.raise_for_status()
+                data = response.json()
+                return float(data["price"])
                     
         except Exception as e:
             raise Exception(f"MEXC price error: {str(e)}")
@@ -145,6 +157,7 @@ class MEXCService:
             if is_futures:
                 # Set leverage
                 leverage_endpoint = "/api/v1/private/position/leverage"
+                reserved = await self._reserve("POST", f"{base_url}{leverage_endpoint}")
                 leverage_params = {
                     "symbol": symbol,
                     "leverage": leverage,
@@ -157,17 +170,20 @@ class MEXCService:
                     "Content-Type": "application/json"
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    await client.post(
-                        f"{base_url}{leverage_endpoint}",
-                        json=leverage_params,
-                        headers=headers
-                    )
+                client = http_pool.get("mexc")
+                await client.post(
+                    f"{base_url}{leverage_endpoint}",
+                    json=leverage_params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
                 
                 # Create futures order
                 order_endpoint = "/api/v1/private/order/submit"
                 open_type = 1 if side == "BUY" else 2  # 1=open long, 2=open short
                 
+                reserved = await self._reserve("POST", f"{base_url}{order_endpoint}")
                 order_params = {
                     "symbol": symbol,
                     "price": 0,  # Market order
@@ -179,17 +195,20 @@ class MEXCService:
                 }
                 order_params["signature"] = self._generate_signature(order_params)
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{base_url}{order_endpoint}",
-                        json=order_params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    return response.json()
+                client = http_pool.get("mexc")
+                response = await client.post(
+                    f"{base_url}{order_endpoint}",
+                    json=order_params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
+                return response.json()
             else:
                 # Spot order
                 endpoint = "/api/v3/order"
+                reserved = await self._reserve("POST", f"{base_url}{endpoint}")
                 params = {
                     "symbol": symbol,
                     "side": side,
@@ -203,14 +222,16 @@ class MEXCService:
                     "X-MEXC-APIKEY": self.api_key
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{base_url}{endpoint}",
-                        data=params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
-                    return response.json()
+                client = http_pool.get("mexc")
+                response = await client.post(
+                    f"{base_url}{endpoint}",
+                    data=params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
+                return response.json()
                     
         except Exception as e:
             raise Exception(f"MEXC order error: {str(e)}")
@@ -224,6 +245,7 @@ class MEXCService:
             base_url = self._get_base_url(is_futures)
             endpoint = "/api/v1/private/position/list/position_list"
             
+            reserved = await self._reserve("GET", f"{base_url}{endpoint}")
             params = {
                 "timestamp": int(time.time() * 1000)
             }
@@ -234,33 +256,35 @@ class MEXCService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{base_url}{endpoint}",
-                    params=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("mexc")
+            response = await client.get(
+                f"{base_url}{endpoint}",
+                params=params,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["success"]:
-                    active_positions = []
-                    for pos in data["data"]:
-                        hold_vol = float(pos.get("holdVol", 0))
-                        if hold_vol > 0:
-                            active_positions.append({
-                                "symbol": pos["symbol"],
-                                "side": "LONG" if pos["positionType"] == 1 else "SHORT",
-                                "amount": hold_vol,
-                                "entry_price": float(pos["openAvgPrice"]),
-                                "current_price": float(pos["fairPrice"]),
-                                "unrealized_pnl": float(pos["unrealisedPnl"]),
-                                "leverage": int(pos["leverage"])
-                            })
+            if data["success"]:
+                active_positions = []
+                for pos in data["data"]:
+                    hold_vol = float(pos.get("holdVol", 0))
+                    if hold_vol > 0:
+                        active_positions.append({
+                            "symbol": pos["symbol"],
+                            "side": "LONG" if pos["positionType"] == 1 else "SHORT",
+                            "amount": hold_vol,
+                            "entry_price": float(pos["openAvgPrice"]),
+                            "current_price": float(pos["fairPrice"]),
+                            "unrealized_pnl": float(pos["unrealisedPnl"]),
+                            "leverage": int(pos["leverage"])
+                        })
                     
-                    return active_positions
-                else:
-                    raise Exception(f"MEXC API error: {data.get('message', 'Unknown error')}")
+                return active_positions
+            else:
+                raise Exception(f"MEXC API error: {data.get('message', 'Unknown error')}")
                      
         except Exception as e:
             raise Exception(f"MEXC positions error: {str(e)}")
@@ -286,6 +310,7 @@ class MEXCService:
             
             close_type = 3 if position["side"] == "LONG" else 4  # 3=close long, 4=close short
             
+            reserved = await self._reserve("POST", f"{base_url}{endpoint}")
             params = {
                 "symbol": symbol,
                 "price": 0,
@@ -302,20 +327,22 @@ class MEXCService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{base_url}{endpoint}",
-                    json=params,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                print(f"[MEXC] Position closed: {result.get('data')}")
+            client = http_pool.get("mexc")
+            response = await client.post(
+                f"{base_url}{endpoint}",
+                json=params,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            print(f"[MEXC] Position closed: {result.get('data')}")
                 
-                # Cancel all open orders
-                await self.cancel_all_orders(symbol, is_futures)
+            # Cancel all open orders
+            await self.cancel_all_orders(symbol, is_futures)
                 
-                return result
+            return result
                 
         except Exception as e:
             print(f"[MEXC ERROR] Close position failed: {str(e)}")
@@ -330,6 +357,7 @@ class MEXCService:
             
             if is_futures:
                 endpoint = "/api/v1/private/order/cancel_all"
+                reserved = await self._reserve("POST", f"{base_url}{endpoint}")
                 params = {
                     "symbol": symbol,
                     "timestamp": int(time.time() * 1000)
@@ -341,15 +369,18 @@ class MEXCService:
                     "Content-Type": "application/json"
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.post(
-                        f"{base_url}{endpoint}",
-                        json=params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
+                client = http_pool.get("mexc")
+                response = await client.post(
+                    f"{base_url}{endpoint}",
+                    json=params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
             else:
                 endpoint = "/api/v3/openOrders"
+                reserved = await self._reserve("DELETE", f"{base_url}{endpoint}")
                 params = {
                     "symbol": symbol,
                     "timestamp": int(time.time() * 1000)
@@ -360,13 +391,15 @@ class MEXCService:
                     "X-MEXC-APIKEY": self.api_key
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    response = await client.delete(
-                        f"{base_url}{endpoint}",
-                        params=params,
-                        headers=headers
-                    )
-                    response.raise_for_status()
+                client = http_pool.get("mexc")
+                response = await client.delete(
+                    f"{base_url}{endpoint}",
+                    params=params,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
+                response.raise_for_status()
             
             print(f"[MEXC] All orders cancelled for {symbol}")
             return True
@@ -376,8 +409,11 @@ class MEXCService:
             return False
 
 
+def _get_service(api_key: str, api_secret: str) -> MEXCService:
+    return http_pool.service("mexc", MEXCService, api_key, api_secret)
+
 async def get_balance(api_key: str, api_secret: str, is_futures: bool = False) -> Dict:
-    service = MEXCService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_balance(is_futures)
 
 async def create_order(
@@ -391,13 +427,13 @@ async def create_order(
     tp_percentage: float = 0,
     sl_percentage: float = 0
 ) -> Dict:
-    service = MEXCService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.create_order(symbol, side, amount, leverage, is_futures, tp_percentage, sl_percentage)
 
 async def get_positions(api_key: str, api_secret: str, is_futures: bool = False) -> List[Dict]:
-    service = MEXCService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_positions(is_futures)
 
 async def get_current_price(api_key: str, api_secret: str, symbol: str, is_futures: bool = False) -> float:
-    service = MEXCService(api_key, api_secret)
+    service = _get_service(api_key, api_secret)
     return await service.get_current_price(symbol, is_futures)
@@ -3,7 +3,7 @@ import hashlib
 import base64
 import time
 from typing import Dict, List, Optional
-import httpx
+from backend.services.http_pool import http_pool
 import json
 from datetime import datetime
 
@@ -25,13 +25,18 @@ class OKXService:
         )
         return base64.b64encode(mac.digest()).decode()
     
+    async def _reserve(self, method: str, request_path: str):
+        """Rate-limit budget for a signed request - before its timestamp is taken"""
+        return await http_pool.reserve("okx", method, f"{self.BASE_URL}{request_path}", None, self.api_key)
+    
     async def get_balance(self, is_futures: bool = False) -> Dict:
         """Get account balance"""
         try:
-            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             method = "GET"
             request_path = "/api/v5/account/balance"
             
+            reserved = await self._reserve(method, request_path)
+            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             signature = self._generate_signature(timestamp, method, request_path)
             
             headers = {
@@ -42,27 +47,29 @@ class OKXService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}{request_path}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("okx")
+            response = await client.get(
+                f"{self.BASE_URL}{request_path}",
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["code"] == "0":
-                    details = data["data"][0]["details"]
-                    for detail in details:
-                        if detail["ccy"] == "USDT":
-                            return {
-                                "total": float(detail["eq"]),
-                                "available": float(detail["availBal"]),
-                                "currency": "USDT"
-                            }
+            if data["code"] == "0":
+                details = data["data"][0]["details"]
+                for detail in details:
+                    if detail["ccy"] == "USDT":
+                        return {
+                            "total": float(detail["eq"]),
+                            "available": float(detail["availBal"]),
+                            "currency": "USDT"
+                        }
                     
-                    return {"total": 0, "available": 0, "currency": "USDT"}
-                else:
-                    raise Exception(f"OKX API error: {data.get('msg', 'Unknown error')}")
+                return {"total": 0, "available": 0, "currency": "USDT"}
+            else:
+                raise Exception(f"OKX API error: {data.get('msg', 'Unknown error')}")
                     
         except Exception as e:
             raise Exception(f"OKX balance error: {str(e)}")
@@ -73,18 +80,19 @@ class OKXService:
             # OKX uses instId format like BTC-USDT-SWAP for futures
             inst_type = "SWAP" if is_futures else "SPOT"
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/api/v5/market/ticker",
-                    params={"instId": symbol}
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("okx")
+            response = await client.get(
+                f"{self.BASE_URL}/api/v5/market/ticker",
+                params={"instId": symbol},
+                timeout=10.0
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["code"] == "0" and data["data"]:
-                    return float(data["data"][0]["last"])
-                else:
-                    raise Exception(f"Price not found for {symbol}")
+            if data["code"] == "0" and data["data"]:
+                return float(data["data"][0]["last"])
+            else:
+                raise Exception(f"Price not found for {symbol}")
                     
         except Exception as e:
             raise Exception(f"OKX price error: {str(e)}")
@@ -101,7 +109,6 @@ class OKXService:
     ) -> Dict:
         """Create market order"""
         try:
-            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             method = "POST"
             
             # Set leverage for futures
@@ -113,6 +120,8 @@ class OKXService:
                     "mgnMode": "cross"
                 })
                 
+                reserved = await self._reserve(method, leverage_path)
+                timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
                 leverage_signature = self._generate_signature(timestamp, method, leverage_path, leverage_body)
                 
                 headers = {
@@ -123,12 +132,14 @@ class OKXService:
                     "Content-Type": "application/json"
                 }
                 
-                async with httpx.AsyncClient(timeout=30.0) as client:
-                    await client.post(
-                        f"{self.BASE_URL}{leverage_path}",
-                        content=leverage_body,
-                        headers=headers
-                    )
+                client = http_pool.get("okx")
+                await client.post(
+                    f"{self.BASE_URL}{leverage_path}",
+                    content=leverage_body,
+                    headers=headers,
+                    timeout=30.0,
+                    extensions=reserved
+                )
             
             # Create order
             request_path = "/api/v5/trade/order"
@@ -141,6 +152,7 @@ class OKXService:
             }
             
             body_str = json.dumps(order_body)
+            reserved = await self._reserve(method, request_path)
             timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             signature = self._generate_signature(timestamp, method, request_path, body_str)
             
@@ -152,14 +164,16 @@ class OKXService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}{request_path}",
-                    content=body_str,
-                    headers=headers
-                )
-                response.raise_for_status()
-                return response.json()
+            client = http_pool.get("okx")
+            response = await client.post(
+                f"{self.BASE_URL}{request_path}",
+                content=body_str,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            return response.json()
                     
         except Exception as e:
             raise Exception(f"OKX order error: {str(e)}")
@@ -170,10 +184,11 @@ class OKXService:
             if not is_futures:
                 return []
             
-            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             method = "GET"
             request_path = "/api/v5/account/positions"
             
+            reserved = await self._reserve(method, request_path)
+            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             signature = self._generate_signature(timestamp, method, request_path)
             
             headers = {
@@ -184,32 +199,34 @@ class OKXService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}{request_path}",
-                    headers=headers
-                )
-                response.raise_for_status()
-                data = response.json()
+            client = http_pool.get("okx")
+            response = await client.get(
+                f"{self.BASE_URL}{request_path}",
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            data = response.json()
                 
-                if data["code"] == "0":
-                    active_positions = []
-                    for pos in data["data"]:
-                        pos_amt = float(pos.get("pos", 0))
-                        if pos_amt != 0:
-                            active_positions.append({
-                                "symbol": pos["instId"],
-                                "side": "LONG" if pos["posSide"] == "long" else "SHORT",
-                                "amount": abs(pos_amt),
-                                "entry_price": float(pos["avgPx"]),
-                                "current_price": float(pos["markPx"]),
-                                "unrealized_pnl": float(pos["upl"]),
-                                "leverage": int(pos["lever"])
-                            })
+            if data["code"] == "0":
+                active_positions = []
+                for pos in data["data"]:
+                    pos_amt = float(pos.get("pos", 0))
+                    if pos_amt != 0:
+                        active_positions.append({
+                            "symbol": pos["instId"],
+                            "side": "LONG" if pos["posSide"] == "long" else "SHORT",
+                            "amount": abs(pos_amt),
+                            "entry_price": float(pos["avgPx"]),
+                            "current_price": float(pos["markPx"]),
+                            "unrealized_pnl": float(pos["upl"]),
+                            "leverage": int(pos["lever"])
+                        })
                     
-                    return active_positions
-                else:
-                    raise Exception(f"OKX API error: {data.get('msg', 'Unknown error')}")
+                return active_positions
+            else:
+                raise Exception(f"OKX API error: {data.get('msg', 'Unknown error')}")
                      
         except Exception as e:
             raise Exception(f"OKX positions error: {str(e)}")
@@ -230,7 +247,6 @@ class OKXService:
                 raise Exception(f"No open position found for {symbol}")
             
             # Close via market order
-            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             method = "POST"
             request_path = "/api/v5/trade/order"
             
@@ -246,6 +262,8 @@ class OKXService:
             }
             
             body_str = json.dumps(order_body)
+            reserved = await self._reserve(method, request_path)
+            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             signature = self._generate_signature(timestamp, method, request_path, body_str)
             
             headers = {
@@ -256,20 +274,22 @@ class OKXService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}{request_path}",
-                    content=body_str,
-                    headers=headers
-                )
-                response.raise_for_status()
-                result = response.json()
-                print(f"[OKX] Position closed: {result.get('data', [{}])[0].get('ordId')}")
+            client = http_pool.get("okx")
+            response = await client.post(
+                f"{self.BASE_URL}{request_path}",
+                content=body_str,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            result = response.json()
+            print(f"[OKX] Position closed: {result.get('data', [{}])[0].get('ordId')}")
                 
-                # Cancel all open orders
-                await self.cancel_all_orders(symbol, is_futures)
+            # Cancel all open orders
+            await self.cancel_all_orders(symbol, is_futures)
                 
-                return result
+            return result
                 
         except Exception as e:
             print(f"[OKX ERROR] Close position failed: {str(e)}")
@@ -280,7 +300,6 @@ class OKXService:
         try:
             print(f"[OKX] Cancelling all orders for {symbol}")
             
-            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             method = "POST"
             request_path = "/api/v5/trade/cancel-all"
             
@@ -289,6 +308,8 @@ class OKXService:
             }
             
             body_str = json.dumps(cancel_body)
+            reserved = await self._reserve(method, request_path)
+            timestamp = datetime.utcnow().isoformat("T", "milliseconds") + "Z"
             signature = self._generate_signature(timestamp, method, request_path, body_str)
             
             headers = {
@@ -299,23 +320,28 @@ class OKXService:
                 "Content-Type": "application/json"
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}{request_path}",
-                    content=body_str,
-                    headers=headers
-                )
-                response.raise_for_status()
-                print(f"[OKX] All orders cancelled for {symbol}")
-                return True
+            client = http_pool.get("okx")
+            response = await client.post(
+                f"{self.BASE_URL}{request_path}",
+                content=body_str,
+                headers=headers,
+                timeout=30.0,
+                extensions=reserved
+            )
+            response.raise_for_status()
+            print(f"[OKX] All orders cancelled for {symbol}")
+            return True
                 
         except Exception as e:
             print(f"[OKX ERROR] Cancel orders failed: {str(e)}")
             return False
 
 
+def _get_service(api_key: str, api_secret: str, passphrase: str = "") -> OKXService:
+    return http_pool.service("okx", OKXService, api_key, api_secret, passphrase)
+
 async def get_balance(api_key: str, api_secret: str, is_futures: bool = False, passphrase: str = "") -> Dict:
-    service = OKXService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.get_balance(is_futures)
 
 async def create_order(
@@ -330,13 +356,13 @@ async def create_order(
     sl_percentage: float = 0,
     passphrase: str = ""
 ) -> Dict:
-    service = OKXService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.create_order(symbol, side, amount, leverage, is_futures, tp_percentage, sl_percentage)
 
 async def get_positions(api_key: str, api_secret: str, is_futures: bool = False, passphrase: str = "") -> List[Dict]:
-    service = OKXService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.get_positions(is_futures)
 
 async def get_current_price(api_key: str, api_secret: str, symbol: str, is_futures: bool = False, passphrase: str = "") -> float:
-    service = OKXService(api_key, api_secret, passphrase)
+    service = _get_service(api_key, api_secret, passphrase)
     return await service.get_current_price(symbol, is_futures)
@@ -0,0 +1,377 @@
+"""
+Exchange Rate Limiter
+One process-wide request budget per exchange, shared by every bot and adapter.
+
+- Exchanges enforce weight limits per IP, so all users share one token bucket
+  per exchange host (EXCHANGE_WEIGHT_LIMITS, weight per minute); refill and
+  accounting are O(1) per request
+- Response headers keep the bucket honest: X-MBX-USED-WEIGHT-1M overrides the
+  local count, Retry-After / 429 / 418 pause the exchange
+- Requests carry a priority class: EXECUTION (order placement/cancel/close),
+  RISK (positions, fills, leverage) and INFO (balance polling, market data).
+  Waiters are served by class and round-robin across users inside a class
+- Under pressure INFO is deferred first (it may not dip into the reserve kept
+  for the higher classes) and shed with RequestShedError once its wait would
+  exceed RATE_LIMIT_INFO_MAX_WAIT; EXECUTION never waits behind lower classes
+- http_pool clients call acquire()/update_from_headers() through event hooks,
+  BinanceClient through BinanceRateLimiter
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from enum import IntEnum
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+
+class RequestPriority(IntEnum):
+    """Scheduling class of an exchange request - lower is served first"""
+    EXECUTION = 0
+    RISK = 1
+    INFO = 2
+
+
+LANE_NAMES = tuple(priority.name.lower() for priority in RequestPriority)
+
+
+class RequestShedError(Exception):
+    """An INFO request was dropped because the exchange budget is under pressure"""
+
+    def __init__(self, exchange: str, wait: float):
+        self.exchange = exchange
+        self.wait = wait
+        super().__init__(f"{exchange} rate limit pressure - informational request shed (wait {wait:.1f}s)")
+
+# Binance request weights that differ from 1 (https://binance-docs.github.io)
+BINANCE_WEIGHTS = {
+    "/fapi/v2/account": 5,
+    "/fapi/v3/account": 5,
+    "/fapi/v2/balance": 5,
+    "/fapi/v2/positionRisk": 5,
+    "/fapi/v3/positionRisk": 5,
+    "/fapi/v1/userTrades": 5,
+    "/fapi/v1/income": 30,
+    "/api/v3/account": 20,
+    "/api/v3/exchangeInfo": 20,
+    "/api/v3/openOrders": 6,
+    "/api/v3/myTrades": 20,
+}
+# Same endpoints without a `symbol` parameter cover every market
+BINANCE_ALL_SYMBOL_WEIGHTS = {
+    "/fapi/v1/ticker/24hr": 40,
+    "/fapi/v1/ticker/price": 2,
+    "/fapi/v1/ticker/bookTicker": 5,
+    "/fapi/v1/openOrders": 40,
+    "/api/v3/ticker/24hr": 80,
+    "/api/v3/ticker/price": 4,
+    "/api/v3/ticker/bookTicker": 4,
+    "/api/v3/openOrders": 80,
+}
+
+EXECUTION_PATH_MARKERS = ("order", "trading-stop", "close-position")
+RISK_PATH_MARKERS = ("position", "leverage", "margintype", "usertrades", "openorders", "fills", "listenkey")
+
+
+def parse_weight_limits(value: str) -> Dict[str, float]:
+    """"binance:2000,bybit:3000" -> {"binance": 2000.0, "bybit": 3000.0}"""
+    limits = {}
+    for item in value.split(","):
+        name, _, limit = item.strip().partition(":")
+        if name and limit:
+            limits[name.strip().lower()] = float(limit)
+    return limits
+
+
+def bucket_name(exchange: str, host: str = "") -> str:
+    """Binance spot and futures hosts have separate IP limits"""
+    exchange = exchange.lower()
+    if exchange == "binance" and host.startswith("api."):
+        return "binance_spot"
+    return exchange
+
+
+def request_cost(
+    exchange: str, method: str, path: str, params: Mapping[str, str]
+) -> Tuple[int, RequestPriority]:
+    """(weight, priority) of a REST request, inferred from its method and path"""
+    lowered = path.lower()
+    if method != "GET" and any(marker in lowered for marker in EXECUTION_PATH_MARKERS):
+        priority = RequestPriority.EXECUTION
+    elif any(marker in lowered for marker in RISK_PATH_MARKERS):
+        priority = RequestPriority.RISK
+    else:
+        priority = RequestPriority.INFO
+
+    weight = 1
+    if exchange.startswith("binance"):
+        if "symbol" not in params and path in BINANCE_ALL_SYMBOL_WEIGHTS:
+            weight = BINANCE_ALL_SYMBOL_WEIGHTS[path]
+        elif path.endswith("/klines"):
+            limit = int(params.get("limit", 500))
+            weight = 1 if limit < 100 else 2 if limit < 500 else 5 if limit <= 1000 else 10
+        else:
+            weight = BINANCE_WEIGHTS.get(path, 1)
+    return weight, priority
+
+
+class TokenBucket:
+    """Weight budget that refills continuously; every operation is O(1)"""
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def wait_time(self, weight: float, now: float, reserve: float = 0.0) -> float:
+        """Seconds until `weight` tokens are available on top of `reserve` (0 = now)"""
+        self._refill(now)
+        missing = min(weight + reserve, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, weight: float, now: float):
+        self._refill(now)
+        self.tokens -= weight
+
+    def sync_used(self, used: float, now: float):
+        """Apply the server's count of weight used in the current window"""
+        self._refill(now)
+        self.tokens = min(self.tokens, self.capacity - used)
+
+
+class ExchangeLimiter:
+    """Bucket, pause state and priority lanes of one exchange host"""
+
+    def __init__(self, name: str, weight_per_minute: float):
+        self.name = name
+        self.bucket = TokenBucket(weight_per_minute)
+        self.paused_until = 0.0
+        # Budget a class leaves untouched for the classes above it
+        self.reserves = (
+            0.0,
+            weight_per_minute * settings.RATE_LIMIT_RISK_RESERVE,
+            weight_per_minute * settings.RATE_LIMIT_INFO_RESERVE
+        )
+        self.info_max_wait = settings.RATE_LIMIT_INFO_MAX_WAIT
+        # lane -> user -> waiting (future, weight); the OrderedDict gives round-robin order
+        self.lanes: List["OrderedDict[str, Deque[Tuple[asyncio.Future, float]]]"] = [
+            OrderedDict() for _ in LANE_NAMES
+        ]
+        self.waiting = [0] * len(LANE_NAMES)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            "requests": 0,
+            "weight": 0,
+            "queued": 0,
+            "wait_ms_total": 0.0,
+            "max_wait_ms": 0.0,
+            "pauses": 0,
+            "header_syncs": 0,
+            "lanes": {name: 0 for name in LANE_NAMES},
+            "deferred": {name: 0 for name in LANE_NAMES},
+            "shed": 0
+        }
+
+    def _delay(self, weight: float, priority: int, now: float) -> float:
+        return max(self.paused_until - now, self.bucket.wait_time(weight, now, self.reserves[priority]))
+
+    async def acquire(self, weight: float, priority: RequestPriority, user_key: str) -> float:
+        """Wait for budget; returns seconds waited (INFO may raise RequestShedError)"""
+        now = time.monotonic()
+        # Only waiters of the same or a higher class go first
+        if not any(self.waiting[:priority + 1]):
+            delay = self._delay(weight, priority, now)
+            if not delay:
+                self.bucket.take(weight, now)
+                self._record(weight, priority, 0.0)
+                return 0.0
+            if priority == RequestPriority.INFO and delay > self.info_max_wait:
+                self._shed(delay)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.lanes[priority].setdefault(user_key, deque()).append((future, weight))
+        self.waiting[priority] += 1
+        self.stats["queued"] += 1
+        self.stats["deferred"][LANE_NAMES[priority]] += 1
+        self._ensure_dispatcher(loop)
+        self._wakeup.set()
+
+        # The dispatcher charges the bucket; cancelled (or shed) waiters are skipped
+        if priority == RequestPriority.INFO:
+            try:
+                await asyncio.wait_for(future, self.info_max_wait)
+            except asyncio.TimeoutError:
+                self._shed(time.monotonic() - now)
+        else:
+            await future
+        waited = time.monotonic() - now
+        self._record(weight, priority, waited)
+        return waited
+
+    def _shed(self, wait: float):
+        self.stats["shed"] += 1
+        raise RequestShedError(self.name, wait)
+
+    def _record(self, weight: float, priority: int, waited: float):
+        self.stats["requests"] += 1
+        self.stats["weight"] += weight
+        self.stats["lanes"][LANE_NAMES[priority]] += 1
+        if waited:
+            waited_ms = waited * 1000
+            self.stats["wait_ms_total"] += waited_ms
+            self.stats["max_wait_ms"] = round(max(self.stats["max_wait_ms"], waited_ms), 1)
+
+    def _ensure_dispatcher(self, loop: asyncio.AbstractEventLoop):
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._dispatch())
+
+    def _head(self) -> Optional[Tuple[int, str]]:
+        """(lane, user) of the next live waiter; drops cancelled ones"""
+        for priority, lane in enumerate(self.lanes):
+            while lane:
+                user_key, queue = next(iter(lane.items()))
+                while queue and queue[0][0].done():
+                    queue.popleft()
+                    self.waiting[priority] -= 1
+                if queue:
+                    return priority, user_key
+                del lane[user_key]
+        return None
+
+    async def _dispatch(self):
+        while any(self.waiting):
+            head = self._head()
+            if head is None:
+                break
+            priority, user_key = head
+            lane = self.lanes[priority]
+            future, weight = lane[user_key][0]
+
+            now = time.monotonic()
+            delay = self._delay(weight, priority, now)
+            if delay > 0:
+                # Re-evaluate early when a higher lane fills or the pause changes
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            lane[user_key].popleft()
+            self.waiting[priority] -= 1
+            if lane[user_key]:
+                lane.move_to_end(user_key)
+            else:
+                del lane[user_key]
+            self.bucket.take(weight, now)
+            future.set_result(None)
+
+    def pause(self, seconds: float, reason: str):
+        until = time.monotonic() + seconds
+        if until > self.paused_until:
+            self.paused_until = until
+            self.stats["pauses"] += 1
+            logger.warning(f"🚦 {self.name} requests paused for {seconds:.0f}s ({reason})")
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def update_from_headers(self, headers: Mapping[str, str], status: int):
+        used = headers.get("x-mbx-used-weight-1m")
+        if used is not None:
+            try:
+                self.bucket.sync_used(float(used), time.monotonic())
+                self.stats["header_syncs"] += 1
+            except ValueError:
+                pass
+
+        if status in (418, 429):
+            retry_after = headers.get("retry-after")
+            try:
+                seconds = float(retry_after) if retry_after else None
+            except ValueError:
+                seconds = None
+            if seconds is None:
+                seconds = settings.RATE_LIMIT_BAN_BACKOFF if status == 418 else settings.RATE_LIMIT_429_BACKOFF
+            self.pause(seconds, f"HTTP {status}")
+
+    def get_stats(self) -> Dict:
+        requests = self.stats["requests"]
+        now = time.monotonic()
+        self.bucket._refill(now)
+        return {
+            **{k: v for k, v in self.stats.items() if k != "wait_ms_total"},
+            "avg_wait_ms": round(self.stats["wait_ms_total"] / requests, 1) if requests else 0,
+            "capacity": self.bucket.capacity,
+            "available": round(max(0.0, self.bucket.tokens), 1),
+            "waiting": dict(zip(LANE_NAMES, self.waiting)),
+            "paused_for": round(max(0.0, self.paused_until - now), 1)
+        }
+
+
+class RateLimiter:
+    """Registry of per-exchange limiters; exchanges without a limit are not throttled"""
+
+    def __init__(self, limits: Dict[str, float] = None):
+        self.limits = limits or parse_weight_limits(settings.EXCHANGE_WEIGHT_LIMITS)
+        self.exchanges: Dict[str, ExchangeLimiter] = {}
+
+    def _get(self, exchange: str) -> Optional[ExchangeLimiter]:
+        limiter = self.exchanges.get(exchange)
+        if limiter is None:
+            limit = self.limits.get(exchange)
+            if not limit:
+                return None
+            limiter = self.exchanges[exchange] = ExchangeLimiter(exchange, limit)
+        return limiter
+
+    async def acquire(
+        self,
+        exchange: str,
+        weight: float = 1,
+        priority: RequestPriority = RequestPriority.INFO,
+        user_id: Optional[str] = None
+    ) -> float:
+        """
+        Wait until `exchange` has budget for `weight`; returns seconds waited
+
+        Raises RequestShedError for INFO requests under pressure.
+        """
+        limiter = self._get(exchange)
+        if limiter is None:
+            return 0.0
+        return await limiter.acquire(weight, priority, user_id or "")
+
+    def update_from_headers(self, exchange: str, headers: Mapping[str, str], status: int = 200):
+        """Feed a response's rate-limit headers and status back into the bucket"""
+        limiter = self._get(exchange)
+        if limiter is not None:
+            limiter.update_from_headers(headers, status)
+
+    def pause(self, exchange: str, seconds: float, reason: str = "manual"):
+        limiter = self._get(exchange)
+        if limiter is not None:
+            limiter.pause(seconds, reason)
+
+    def get_stats(self) -> Dict:
+        """Budget, queue depth and wait times per exchange"""
+        return {name: limiter.get_stats() for name, limiter in self.exchanges.items()}
+
+
+# Singleton instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,193 @@
+"""
+Signal Scheduler
+Evaluates each (exchange, symbol, interval) EMA signal once and fans the
+result out to every subscribed user.
+
+- One evaluation per distinct market, not per user
+- Evaluations run at candle close (candle_scheduler), batched per interval
+- Signals are broadcast to WebSocket clients once per market
+- User handlers run concurrently, so one slow user never delays the rest
+- A market may bring its own candle fetcher (e.g. ccxt-backed monitors)
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.services.candle_scheduler import candle_scheduler
+from backend.services.indicator_engine import CandleFetcher, indicator_engine
+
+logger = logging.getLogger(__name__)
+
+MarketKey = Tuple[str, str, str]
+# handler(user_id, signal) - only called for BUY/SELL signals
+SignalHandler = Callable[[str, Dict], Awaitable[None]]
+
+
+class SignalScheduler:
+    """Shared EMA9/EMA21 crossover evaluation for all users"""
+
+    JOB_ID = "signal_scheduler"
+    MAX_CONCURRENT_EVALUATIONS = 20
+
+    def __init__(self):
+        self.markets: Dict[MarketKey, Dict[str, SignalHandler]] = {}
+        # Candle source of markets not served by the built-in REST fetch
+        self.fetchers: Dict[MarketKey, CandleFetcher] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.last_signal_candle: Dict[MarketKey, int] = {}
+        self.stats = {"evaluations": 0, "signals": 0, "dispatches": 0}
+
+    async def subscribe(self, user_id: str, exchange_name: str, symbol: str, interval: str,
+                        handler: SignalHandler, fetcher: Optional[CandleFetcher] = None):
+        """Subscribe a user to a market's signals (the first subscriber's fetcher serves the market)"""
+        key = (exchange_name.lower(), symbol, interval)
+        is_new_market = key not in self.markets
+        if is_new_market:
+            # Candle-close job per interval (raises for unsupported intervals)
+            candle_scheduler.add_job(self.JOB_ID, interval, self._on_candle_close)
+            if fetcher:
+                self.fetchers[key] = fetcher
+
+        self.markets.setdefault(key, {})[user_id] = handler
+
+        if is_new_market:
+            # First evaluation right away - records the baseline candle, never signals
+            asyncio.create_task(self._evaluate_market(key))
+            logger.info(f"Started signal evaluation for {symbol} {interval} ({key[0]})")
+
+    async def unsubscribe(self, user_id: str, exchange_name: str, symbol: str, interval: str):
+        """Remove a user from a market; evaluation stops with the last user"""
+        key = (exchange_name.lower(), symbol, interval)
+        users = self.markets.get(key)
+        if not users or user_id not in users:
+            return
+
+        del users[user_id]
+        if not users:
+            del self.markets[key]
+            self.fetchers.pop(key, None)
+            self.last_signal_candle.pop(key, None)
+            if not any(k[2] == interval for k in self.markets):
+                candle_scheduler.remove_job(self.JOB_ID, interval)
+            logger.info(f"Stopped signal evaluation for {symbol} {interval} ({key[0]})")
+
+    async def unsubscribe_user(self, user_id: str):
+        """Remove a user from every market"""
+        for key in [k for k, users in self.markets.items() if user_id in users]:
+            await self.unsubscribe(user_id, *key)
+
+    async def evaluate(self, exchange_name: str, symbol: str, interval: str) -> Optional[Dict]:
+        """
+        Evaluate the EMA crossover on the last closed candle
+
+        A crossover is reported once per candle per market. The first
+        evaluation of a market only records its last closed candle: that
+        crossover may be nearly an interval old (or already traded before a
+        restart), so only candles closing after it can signal.
+        """
+        key = (exchange_name.lower(), symbol, interval)
+        emas = await indicator_engine.get_emas(key[0], symbol, interval, (9, 21), fetcher=self.fetchers.get(key))
+        if emas is None:
+            return None
+
+        self.stats["evaluations"] += 1
+        ema9 = emas["emas"][9]["value"]
+        ema21 = emas["emas"][21]["value"]
+        previous_ema9 = emas["emas"][9]["previous"]
+        previous_ema21 = emas["emas"][21]["previous"]
+
+        last_candle = self.last_signal_candle.get(key)
+        is_new_candle = last_candle is not None and emas["open_time"] > last_candle
+        self.last_signal_candle[key] = emas["open_time"]
+
+        signal = None
+
+        # Bullish crossover: EMA9 crosses above EMA21
+        if is_new_candle and previous_ema9 and previous_ema21:
+            if previous_ema9 < previous_ema21 and ema9 > ema21:
+                signal = 'BUY'
+            # Bearish crossover: EMA9 crosses below EMA21
+            elif previous_ema9 > previous_ema21 and ema9 < ema21:
+                signal = 'SELL'
+
+        return {
+            'symbol': symbol,
+            'interval': interval,
+            'exchange': key[0],
+            'ema9': round(ema9, 2),
+            'ema21': round(ema21, 2),
+            'signal': signal,
+            'price': emas["close"],
+            'candle_time': emas["open_time"],
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+    async def _on_candle_close(self, interval: str, candle_close_ms: int):
+        """Evaluate every market on this interval in one batch"""
+        keys = [key for key in self.markets if key[2] == interval]
+        await asyncio.gather(*(self._evaluate_market(key) for key in keys))
+
+    async def _evaluate_market(self, key: MarketKey):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_EVALUATIONS)
+
+        exchange_name, symbol, interval = key
+        try:
+            async with self._semaphore:
+                result = await self.evaluate(exchange_name, symbol, interval)
+            if result and result['signal'] and key in self.markets:
+                await self._dispatch(key, result)
+        except Exception as e:
+            logger.error(f"Error evaluating {symbol} {interval}: {e}")
+
+    async def _dispatch(self, key: MarketKey, result: Dict):
+        self.stats["signals"] += 1
+        logger.info(
+            f"🚨 EMA Signal detected: {result['symbol']} {result['signal']} "
+            f"(EMA9: {result['ema9']:.2f}, EMA21: {result['ema21']:.2f})"
+        )
+
+        # Broadcast once per market
+        try:
+            from backend.websocket_manager import connection_manager
+            await connection_manager.broadcast_signal({
+                'signal': result['signal'],
+                'exchange': result['exchange'],
+                'symbol': result['symbol'],
+                'price': result['price'],
+                'ema9': result['ema9'],
+                'ema21': result['ema21'],
+                'interval': result['interval']
+            })
+        except Exception as e:
+            logger.error(f"Failed to broadcast signal: {e}")
+
+        handlers = list(self.markets.get(key, {}).items())
+        results = await asyncio.gather(
+            *(handler(user_id, dict(result)) for user_id, handler in handlers),
+            return_exceptions=True
+        )
+        for (user_id, _), outcome in zip(handlers, results):
+            if isinstance(outcome, Exception):
+                logger.error(f"Signal handler failed for user {user_id}: {outcome}")
+        self.stats["dispatches"] += len(handlers)
+
+    def get_stats(self) -> Dict:
+        """Scheduler statistics"""
+        return {
+            **self.stats,
+            "markets": len(self.markets),
+            "subscriptions": sum(len(users) for users in self.markets.values())
+        }
+
+    async def cleanup(self):
+        """Stop every market evaluation"""
+        candle_scheduler.remove_job(self.JOB_ID)
+        self.markets.clear()
+        self.fetchers.clear()
+        logger.info("Signal scheduler cleaned up")
+
+
+# Singleton instance
+signal_scheduler = SignalScheduler()
@@ -0,0 +1,96 @@
+"""
+Ticker Cache
+Short-TTL cache for public last prices, shared by every user.
+
+- Keyed by (exchange, market, symbol) - prices are public, never per user
+- Single-flight: concurrent misses for one key share a single REST request
+- WebSocket feeds write into the cache, so hot symbols rarely hit REST
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+TickerKey = Tuple[str, str, str]
+PriceFetcher = Callable[[], Awaitable[float]]
+
+
+def _key(exchange_name: str, symbol: str, is_futures: bool) -> TickerKey:
+    return (exchange_name.lower(), "futures" if is_futures else "spot", symbol.upper())
+
+
+class TickerCache:
+    """Last-price cache with request coalescing"""
+
+    def __init__(self, ttl: float = None):
+        self.ttl = settings.TICKER_CACHE_TTL if ttl is None else ttl
+        # key -> (price, updated_at, source)
+        self.prices: Dict[TickerKey, Tuple[float, float, str]] = {}
+        self._inflight: Dict[TickerKey, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "ws_updates": 0}
+
+    def put(self, exchange_name: str, symbol: str, price: float, is_futures: bool = True,
+            source: str = "ws"):
+        """Store a price (WebSocket ticks and REST results)"""
+        self.prices[_key(exchange_name, symbol, is_futures)] = (float(price), time.time(), source)
+        if source == "ws":
+            self.stats["ws_updates"] += 1
+
+    def get(self, exchange_name: str, symbol: str, is_futures: bool = True) -> Optional[Tuple[float, str]]:
+        """Fresh (price, source) or None"""
+        entry = self.prices.get(_key(exchange_name, symbol, is_futures))
+        if entry and time.time() - entry[1] <= self.ttl:
+            return entry[0], entry[2]
+        return None
+
+    async def get_price(self, exchange_name: str, symbol: str, fetcher: PriceFetcher,
+                        is_futures: bool = True) -> Tuple[float, str]:
+        """
+        Cached price, or fetch it once for all concurrent callers
+
+        Returns (price, source) where source is "ws", "rest" or "cache".
+        """
+        cached = self.get(exchange_name, symbol, is_futures)
+        if cached:
+            self.stats["hits"] += 1
+            return cached[0], "cache" if cached[1] == "rest" else cached[1]
+
+        key = _key(exchange_name, symbol, is_futures)
+        task = self._inflight.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.create_task(self._fetch(key, fetcher))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+
+        # Shield: one cancelled caller must not cancel the shared request
+        price = await asyncio.shield(task)
+        return price, "rest"
+
+    async def _fetch(self, key: TickerKey, fetcher: PriceFetcher) -> float:
+        price = float(await fetcher())
+        self.prices[key] = (price, time.time(), "rest")
+        return price
+
+    def invalidate(self, exchange_name: str, symbol: str, is_futures: bool = True):
+        """Drop a cached price"""
+        self.prices.pop(_key(exchange_name, symbol, is_futures), None)
+
+    def get_stats(self) -> Dict:
+        """Cache statistics"""
+        return {
+            **self.stats,
+            "entries": len(self.prices),
+            "inflight": len(self._inflight),
+            "ttl": self.ttl
+        }
+
+
+# Singleton instance
+ticker_cache = TickerCache()
@@ -0,0 +1,274 @@
+"""
+Ticker Snapshot
+All-symbols ticker snapshots per exchange, refreshed on a schedule.
+
+- One all-tickers REST call per exchange per refresh, instead of one per symbol
+- Stored column-wise (NumPy arrays: last, bid, ask) with a symbol index
+- Symbols are normalized to the canonical form (BTCUSDT) across exchanges;
+  the exchange-native symbol is kept alongside
+- Refresh loops start on first use and stop once the exchange's snapshot
+  has not been read for TICKER_SNAPSHOT_IDLE_TTL (or on app shutdown)
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.config import settings
+from backend.services.http_pool import http_pool
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXCHANGES = ("binance", "bybit", "okx", "kucoin", "mexc")
+
+
+def canonical_symbol(exchange_name: str, native: str) -> str:
+    """Exchange-native perpetual symbol -> BTCUSDT form"""
+    symbol = native.upper()
+    if exchange_name == "okx":
+        symbol = symbol.replace("-SWAP", "")
+    elif exchange_name == "kucoin":
+        # XBTUSDTM -> BTCUSDT
+        if symbol.endswith("M"):
+            symbol = symbol[:-1]
+        if symbol.startswith("XBT"):
+            symbol = "BTC" + symbol[3:]
+    return symbol.replace("-", "").replace("_", "")
+
+
+def native_symbol(exchange_name: str, canonical: str) -> str:
+    """BTCUSDT -> exchange-native USDT perpetual symbol"""
+    canonical = canonical.upper()
+    base = canonical[:-4] if canonical.endswith("USDT") else canonical
+    if exchange_name == "okx":
+        return f"{base}-USDT-SWAP"
+    if exchange_name == "kucoin":
+        return ("XBT" if base == "BTC" else base) + "USDTM"
+    if exchange_name == "mexc":
+        return f"{base}_USDT"
+    return canonical
+
+
+async def _get_json(exchange_name: str, url: str, params: Optional[Dict] = None):
+    client = http_pool.get(exchange_name)
+    response = await client.get(url, params=params, timeout=10.0)
+    response.raise_for_status()
+    return response.json()
+
+
+async def fetch_all_tickers(exchange_name: str) -> List[tuple]:
+    """
+    All perpetual tickers of an exchange in one call
+
+    Returns rows of (native_symbol, last, bid, ask).
+    """
+    if exchange_name == "binance":
+        prices, books = await asyncio.gather(
+            _get_json("binance", f"{settings.BASE_URL}/fapi/v1/ticker/price"),
+            _get_json("binance", f"{settings.BASE_URL}/fapi/v1/ticker/bookTicker")
+        )
+        book = {b["symbol"]: b for b in books}
+        return [
+            (p["symbol"], p["price"], book.get(p["symbol"], {}).get("bidPrice"),
+             book.get(p["symbol"], {}).get("askPrice"))
+            for p in prices
+        ]
+
+    if exchange_name == "bybit":
+        data = await _get_json("bybit", "https://api.bybit.com/v5/market/tickers", {"category": "linear"})
+        return [(t["symbol"], t.get("lastPrice"), t.get("bid1Price"), t.get("ask1Price"))
+                for t in data.get("result", {}).get("list", [])]
+
+    if exchange_name == "okx":
+        data = await _get_json("okx", "https://www.okx.com/api/v5/market/tickers", {"instType": "SWAP"})
+        return [(t["instId"], t.get("last"), t.get("bidPx"), t.get("askPx"))
+                for t in data.get("data", [])]
+
+    if exchange_name == "kucoin":
+        data = await _get_json("kucoin", "https://api-futures.kucoin.com/api/v1/allTickers")
+        return [(t["symbol"], t.get("price"), t.get("bestBidPrice"), t.get("bestAskPrice"))
+                for t in data.get("data", [])]
+
+    if exchange_name == "mexc":
+        data = await _get_json("mexc", "https://contract.mexc.com/api/v1/contract/ticker")
+        return [(t["symbol"], t.get("lastPrice"), t.get("bid1"), t.get("ask1"))
+                for t in data.get("data", [])]
+
+    raise ValueError(f"Ticker snapshot not supported for {exchange_name}")
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class TickerTable:
+    """Immutable column-wise snapshot of one exchange's tickers"""
+
+    def __init__(self, exchange_name: str, rows: List[tuple]):
+        self.exchange = exchange_name
+        self.updated_at = time.time()
+
+        self.index: Dict[str, int] = {}
+        self.native: List[str] = []
+        for native, *_ in rows:
+            symbol = canonical_symbol(exchange_name, native)
+            if symbol not in self.index:
+                self.index[symbol] = len(self.native)
+                self.native.append(native)
+
+        keep = {native: i for i, native in enumerate(self.native)}
+        columns = np.full((3, len(self.native)), np.nan)
+        for native, last, bid, ask in rows:
+            i = keep.get(native)
+            if i is not None:
+                columns[:, i] = (_to_float(last), _to_float(bid), _to_float(ask))
+        self.last, self.bid, self.ask = columns
+
+    def positions(self, symbols: Sequence[str]) -> np.ndarray:
+        """Row index per symbol, -1 when missing"""
+        return np.array([self.index.get(s.upper(), -1) for s in symbols], dtype=np.int64)
+
+    def column(self, name: str, symbols: Sequence[str]) -> np.ndarray:
+        """Column values aligned to `symbols` (NaN when missing)"""
+        values = getattr(self, name)
+        pos = self.positions(symbols)
+        out = np.full(len(pos), np.nan)
+        found = pos >= 0
+        out[found] = values[pos[found]]
+        return out
+
+    def __len__(self):
+        return len(self.native)
+
+
+class TickerSnapshotService:
+    """Scheduled all-tickers refresh for every supported exchange"""
+
+    def __init__(self, refresh_interval: float = None, idle_ttl: float = None):
+        self.refresh_interval = (settings.TICKER_SNAPSHOT_INTERVAL
+                                 if refresh_interval is None else refresh_interval)
+        self.idle_ttl = settings.TICKER_SNAPSHOT_IDLE_TTL if idle_ttl is None else idle_ttl
+        self.tables: Dict[str, TickerTable] = {}
+        self.last_read: Dict[str, float] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._ready: Dict[str, asyncio.Event] = {}
+        self.stats = {"refreshes": 0, "errors": 0, "idle_stops": 0}
+
+    def _ensure_running(self, exchange_name: str):
+        if exchange_name not in SUPPORTED_EXCHANGES:
+            raise ValueError(f"Ticker snapshot not supported for {exchange_name}")
+
+        if exchange_name not in self._ready:
+            self._ready[exchange_name] = asyncio.Event()
+        task = self._tasks.get(exchange_name)
+        if task is None or task.done():
+            self._tasks[exchange_name] = asyncio.create_task(self._refresh_loop(exchange_name))
+            logger.info(f"📸 Ticker snapshot started for {exchange_name}")
+
+    async def _refresh_loop(self, exchange_name: str):
+        attempt = 0
+        try:
+            while True:
+                if time.time() - self.last_read.get(exchange_name, 0) > self.idle_ttl:
+                    # Nobody reads this exchange any more; the next get_table restarts it
+                    self._tasks.pop(exchange_name, None)
+                    self.tables.pop(exchange_name, None)
+                    self._ready[exchange_name].clear()
+                    self.stats["idle_stops"] += 1
+                    logger.info(f"📸 Ticker snapshot stopped for idle {exchange_name}")
+                    return
+                try:
+                    await self.refresh(exchange_name)
+                    attempt = 0
+                    await asyncio.sleep(self.refresh_interval)
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    attempt += 1
+                    logger.warning(f"⚠️ Ticker snapshot refresh failed for {exchange_name}: {e}")
+                    await asyncio.sleep(min(self.refresh_interval * 2 ** min(attempt, 16), 60))
+        except asyncio.CancelledError:
+            pass
+
+    async def refresh(self, exchange_name: str) -> TickerTable:
+        """Fetch all tickers once and swap in the new table"""
+        rows = await fetch_all_tickers(exchange_name)
+        table = TickerTable(exchange_name, rows)
+        self.tables[exchange_name] = table
+        self.stats["refreshes"] += 1
+        if exchange_name in self._ready:
+            self._ready[exchange_name].set()
+        return table
+
+    async def get_table(self, exchange_name: str, wait: float = 10.0) -> Optional[TickerTable]:
+        """Latest table; waits for the first refresh when there is none yet"""
+        exchange_name = exchange_name.lower()
+        self._ensure_running(exchange_name)
+        self.last_read[exchange_name] = time.time()
+
+        if exchange_name not in self.tables:
+            try:
+                await asyncio.wait_for(self._ready[exchange_name].wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                return None
+        return self.tables.get(exchange_name)
+
+    async def get_prices(self, exchange_name: str, symbols: Sequence[str]) -> Dict:
+        """Multi-symbol prices from the snapshot"""
+        table = await self.get_table(exchange_name)
+        if table is None:
+            return {"exchange": exchange_name.lower(), "updated_at": None, "tickers": {},
+                    "missing": [s.upper() for s in symbols]}
+
+        symbols = [s.upper() for s in symbols]
+        last = table.column("last", symbols)
+        bid = table.column("bid", symbols)
+        ask = table.column("ask", symbols)
+
+        tickers = {}
+        missing = []
+        for i, symbol in enumerate(symbols):
+            if np.isnan(last[i]):
+                missing.append(symbol)
+                continue
+            tickers[symbol] = {
+                "last": float(last[i]),
+                "bid": None if np.isnan(bid[i]) else float(bid[i]),
+                "ask": None if np.isnan(ask[i]) else float(ask[i]),
+                "native_symbol": table.native[table.index[symbol]]
+            }
+
+        return {
+            "exchange": table.exchange,
+            "updated_at": table.updated_at,
+            "tickers": tickers,
+            "missing": missing
+        }
+
+    def get_stats(self) -> Dict:
+        """Snapshot statistics"""
+        return {
+            **self.stats,
+            "exchanges": {
+                name: {"symbols": len(table), "age": round(time.time() - table.updated_at, 1)}
+                for name, table in self.tables.items()
+            },
+            "running": sorted(self._tasks),
+            "refresh_interval": self.refresh_interval,
+            "idle_ttl": self.idle_ttl
+        }
+
+    async def close(self):
+        """Stop every refresh loop"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        logger.info("Ticker snapshot stopped")
+
+
+# Singleton instance
+ticker_snapshot = TickerSnapshotService()
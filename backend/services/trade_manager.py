@@ -16,7 +16,9 @@ from typing import Dict, Optional, List
 from datetime import datetime
 
 from backend.firebase_admin import firebase_initialized
+from backend.firebase_repository import firebase_repository
 from backend.services.unified_exchange import unified_exchange, ExchangeError
+from backend.services.account_state import account_state
 
 logger = logging.getLogger(__name__)
 
@@ -50,11 +52,10 @@ class TradeManager:
             return None
 
         try:
-            from firebase_admin import db
-
             # Check in Firebase
-            ref = db.reference(f'trades/{user_id}')
-            trades = ref.order_by_child('client_order_id').equal_to(client_order_id).get()
+            trades = await firebase_repository.query(
+                f'trades/{user_id}', order_by_child='client_order_id', equal_to=client_order_id
+            )
 
             if trades:
                 trade_id = list(trades.keys())[0]
@@ -80,18 +81,13 @@ class TradeManager:
             return str(uuid.uuid4())
 
         try:
-            from firebase_admin import db
-
             # Add metadata
             trade_data['created_at'] = int(time.time())
             trade_data['updated_at'] = int(time.time())
             trade_data['user_id'] = user_id
 
             # Save to Firebase
-            ref = db.reference(f'trades/{user_id}')
-            new_trade_ref = ref.push(trade_data)
-
-            trade_id = new_trade_ref.key
+            trade_id = await firebase_repository.push(f'trades/{user_id}', trade_data)
             logger.info(f"Trade saved to Firebase: {trade_id}")
 
             return trade_id
@@ -107,12 +103,9 @@ class TradeManager:
             return False
 
         try:
-            from firebase_admin import db
-
             updates['updated_at'] = int(time.time())
 
-            ref = db.reference(f'trades/{user_id}/{trade_id}')
-            ref.update(updates)
+            await firebase_repository.update(f'trades/{user_id}/{trade_id}', updates)
 
             logger.info(f"Trade updated: {trade_id}")
             return True
@@ -243,6 +236,9 @@ class TradeManager:
             else:
                 raise ExchangeError(exchange, f"Unsupported exchange: {exchange}")
 
+            # Balance/positions changed - drop the user's cached account state
+            account_state.invalidate_user(user_id, exchange)
+
             # Extract exchange order ID
             exchange_order_id = str(result.get('orderId') or result.get('order_id') or result.get('id') or uuid.uuid4())
 
@@ -319,14 +315,12 @@ class TradeManager:
             return []
 
         try:
-            from firebase_admin import db
-
-            ref = db.reference(f'trades/{user_id}')
-
             if status:
-                trades_data = ref.order_by_child('status').equal_to(status).limit_to_last(limit).get()
+                trades_data = await firebase_repository.query(
+                    f'trades/{user_id}', order_by_child='status', equal_to=status, limit_to_last=limit
+                )
             else:
-                trades_data = ref.limit_to_last(limit).get()
+                trades_data = await firebase_repository.query(f'trades/{user_id}', limit_to_last=limit)
 
             if not trades_data:
                 return []
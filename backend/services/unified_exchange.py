@@ -2,18 +2,20 @@
 Unified Exchange Service
 Provides a consistent interface for all exchange operations with:
 - Retry logic with exponential backoff
-- Rate limiting
+- Rate limiting (shared per-exchange budget in rate_limiter, applied by http_pool)
+- Shared public price cache (ticker_cache)
 - Error normalization
 - Logging
 """
 
 import asyncio
 import logging
-import time
 from typing import Dict, List, Optional, Callable
 from datetime import datetime
 from functools import wraps
 
+from backend.services.ticker_cache import ticker_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -104,21 +106,6 @@ def retry_with_backoff(
 class UnifiedExchangeService:
     """Unified interface for all exchange operations"""
 
-    def __init__(self):
-        self._last_request_time: Dict[str, float] = {}
-        self._min_request_interval = 0.1  # 100ms between requests
-
-    async def _rate_limit(self, exchange: str):
-        """Apply rate limiting between requests"""
-        now = time.time()
-        last_time = self._last_request_time.get(exchange, 0)
-        time_since_last = now - last_time
-
-        if time_since_last < self._min_request_interval:
-            await asyncio.sleep(self._min_request_interval - time_since_last)
-
-        self._last_request_time[exchange] = time.time()
-
     @retry_with_backoff(max_retries=3)
     async def get_balance(
         self,
@@ -142,8 +129,6 @@ class UnifiedExchangeService:
             "timestamp": str (ISO)
         }
         """
-        await self._rate_limit(exchange)
-
         try:
             exchange_name = str(exchange).lower()
             logger.info(f"Fetching balance from {exchange_name} ({['spot', 'futures'][is_futures]})")
@@ -196,7 +181,6 @@ class UnifiedExchangeService:
             logger.error(f"Balance fetch failed for {safe_exchange}: {str(e)}")
             raise ExchangeError(safe_exchange, f"Failed to fetch balance: {str(e)}", e)
 
-    @retry_with_backoff(max_retries=3)
     async def get_current_price(
         self,
         exchange: str,
@@ -209,16 +193,45 @@ class UnifiedExchangeService:
         """
         Get current market price
 
+        Served from the shared ticker cache (WebSocket fed where available);
+        concurrent misses for the same market share one REST request.
+
         Returns:
         {
             "exchange": str,
             "symbol": str,
             "price": float,
+            "source": "ws" | "cache" | "rest",
             "timestamp": str (ISO)
         }
         """
-        await self._rate_limit(exchange)
+        exchange_name = str(exchange).lower() if exchange else "unknown"
+        price, source = await ticker_cache.get_price(
+            exchange_name,
+            symbol,
+            lambda: self._fetch_current_price(exchange, symbol, api_key, api_secret, is_futures, passphrase),
+            is_futures
+        )
+
+        return {
+            "exchange": exchange_name,
+            "symbol": symbol,
+            "price": price,
+            "source": source,
+            "timestamp": datetime.utcnow().isoformat()
+        }
 
+    @retry_with_backoff(max_retries=3)
+    async def _fetch_current_price(
+        self,
+        exchange: str,
+        symbol: str,
+        api_key: str = "",
+        api_secret: str = "",
+        is_futures: bool = True,
+        passphrase: str = ""
+    ) -> float:
+        """Fetch the last price over REST"""
         try:
             exchange_name = str(exchange).lower()
 
@@ -245,12 +258,7 @@ class UnifiedExchangeService:
             else:
                 raise ExchangeError(exchange_name, f"Unsupported exchange: {exchange_name}")
 
-            return {
-                "exchange": exchange_name,
-                "symbol": symbol,
-                "price": float(price),
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            return float(price)
 
         except ExchangeError:
             raise
@@ -284,8 +292,6 @@ class UnifiedExchangeService:
             "timestamp": str (ISO)
         }
         """
-        await self._rate_limit(exchange)
-
         try:
             exchange_name = str(exchange).lower()
 
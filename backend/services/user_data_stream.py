@@ -0,0 +1,390 @@
+"""
+User Data Streams
+Binance futures user-data WebSocket per user, feeding an in-memory account state.
+
+- A listen key (POST /fapi/v1/listenKey) opens wss://.../ws/<listenKey>; it is
+  kept alive with PUT every USER_DATA_KEEPALIVE_INTERVAL and recreated when
+  Binance reports listenKeyExpired
+- ACCOUNT_UPDATE events update wallet balances and positions, ORDER_TRADE_UPDATE
+  events record fills and realized PnL per order; both invalidate the user's
+  cached REST state (account_state)
+- The stream only sends changes: balances/positions become authoritative once
+  seeded from REST (seed_balance / seed_positions) and are reset on reconnect,
+  so nothing missed while disconnected is served from memory
+- Streams are reference counted per user - several bots share one connection
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import websockets
+
+from backend.config import settings
+from backend.services.account_state import account_state
+from backend.services.http_pool import http_pool
+from backend.services.market_data_hub import jittered_backoff
+
+logger = logging.getLogger(__name__)
+
+OrderListener = Callable[[dict], Awaitable[None]]
+
+LISTEN_KEY_PATH = "/fapi/v1/listenKey"
+FINAL_ORDER_STATUSES = ("FILLED", "CANCELED", "EXPIRED", "REJECTED", "EXPIRED_IN_MATCH")
+
+
+class UserAccountState:
+    """Balances, positions and recent order fills of one user, as pushed by Binance"""
+
+    MAX_ORDERS = 100
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        # asset -> {"wallet": float, "cross_wallet": float}
+        self.balances: Dict[str, Dict[str, float]] = {}
+        # (symbol, position side) -> REST-shaped position dict
+        self.positions: Dict[Tuple[str, str], Dict] = {}
+        # Symbols whose positions are known (seeded or pushed since the last reset)
+        self.position_symbols: set = set()
+        # orderId -> order summary; insertion order = age
+        self.orders: Dict[int, Dict] = {}
+        self.balance_updated: Optional[float] = None
+        self.last_event_time: Optional[float] = None
+        self._order_waiters: Dict[int, List[asyncio.Future]] = {}
+
+    def reset(self):
+        """Forget balances/positions (events may have been missed while disconnected)"""
+        self.balances.clear()
+        self.positions.clear()
+        self.position_symbols.clear()
+        self.balance_updated = None
+
+    # --- REST seeding ---
+
+    def seed_balance(self, asset: str, wallet: float, as_of: float):
+        """Balance read over REST at `as_of`; ignored if an event is newer"""
+        if self.balance_updated is not None and self.balance_updated > as_of:
+            return
+        self.balances[asset] = {"wallet": wallet, "cross_wallet": wallet}
+        self.balance_updated = as_of
+
+    def seed_positions(self, symbol: str, positions: List[Dict], as_of: float):
+        """Open positions of `symbol` read over REST at `as_of`"""
+        if symbol in self.position_symbols and (self.last_event_time or 0) > as_of:
+            return
+        for key in [k for k in self.positions if k[0] == symbol]:
+            del self.positions[key]
+        for position in positions:
+            self.positions[(symbol, position.get("positionSide", "BOTH"))] = dict(position)
+        self.position_symbols.add(symbol)
+
+    # --- reads ---
+
+    def get_balance(self, asset: str = "USDT") -> Optional[float]:
+        """Wallet balance, None until known"""
+        balance = self.balances.get(asset)
+        return balance["wallet"] if balance else None
+
+    def get_positions(self, symbol: str) -> Optional[List[Dict]]:
+        """Open positions of `symbol` in REST format, None until known"""
+        if symbol not in self.position_symbols:
+            return None
+        return [dict(p) for (s, _), p in self.positions.items() if s == symbol]
+
+    def get_order(self, order_id: int) -> Optional[Dict]:
+        return self.orders.get(int(order_id))
+
+    async def wait_for_order(self, order_id: int, timeout: float) -> Optional[Dict]:
+        """The order's summary once it reaches a final status (None on timeout)"""
+        order_id = int(order_id)
+        order = self.orders.get(order_id)
+        if order and order["status"] in FINAL_ORDER_STATUSES:
+            return dict(order)
+
+        future = asyncio.get_running_loop().create_future()
+        self._order_waiters.setdefault(order_id, []).append(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._order_waiters.get(order_id)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters:
+                    del self._order_waiters[order_id]
+
+    # --- events ---
+
+    def apply_account_update(self, event: dict):
+        """ACCOUNT_UPDATE: balances (a.B) and positions (a.P) that changed"""
+        event_time = event.get("E", 0) / 1000
+        update = event.get("a", {})
+
+        for balance in update.get("B", []):
+            self.balances[balance["a"]] = {
+                "wallet": float(balance.get("wb", 0)),
+                "cross_wallet": float(balance.get("cw", 0))
+            }
+        if update.get("B"):
+            self.balance_updated = event_time
+
+        for position in update.get("P", []):
+            symbol, side = position["s"], position.get("ps", "BOTH")
+            amount = float(position.get("pa", 0))
+            self.position_symbols.add(symbol)
+            if amount == 0:
+                self.positions.pop((symbol, side), None)
+                continue
+            self.positions[(symbol, side)] = {
+                "symbol": symbol,
+                "positionSide": side,
+                "positionAmt": position.get("pa"),
+                "entryPrice": position.get("ep"),
+                "unRealizedProfit": position.get("up"),
+                "marginType": position.get("mt"),
+                "updateTime": event.get("E")
+            }
+
+    def apply_order_update(self, event: dict) -> Dict:
+        """ORDER_TRADE_UPDATE: order status, filled quantity and realized PnL"""
+        data = event.get("o", {})
+        order_id = int(data["i"])
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.orders[order_id] = {
+                "order_id": order_id,
+                "symbol": data.get("s"),
+                "client_order_id": data.get("c"),
+                "side": data.get("S"),
+                "type": data.get("o"),
+                "reduce_only": data.get("R", False),
+                "realized_pnl": 0.0,
+                "commission": 0.0
+            }
+            while len(self.orders) > self.MAX_ORDERS:
+                del self.orders[next(iter(self.orders))]
+
+        if data.get("x") == "TRADE":
+            order["realized_pnl"] += float(data.get("rp", 0))
+            order["commission"] += float(data.get("n", 0))
+        order.update({
+            "status": data.get("X"),
+            "filled_qty": float(data.get("z", 0)),
+            "avg_price": float(data.get("ap", 0)),
+            "update_time": data.get("T") or event.get("E")
+        })
+
+        if order["status"] in FINAL_ORDER_STATUSES:
+            for future in self._order_waiters.pop(order_id, []):
+                if not future.done():
+                    future.set_result(dict(order))
+        return dict(order)
+
+
+class _UserStream:
+    """Listen key + WebSocket connection of one user"""
+
+    def __init__(self, manager: "UserDataStreamManager", user_id: str, api_key: str):
+        self.manager = manager
+        self.user_id = user_id
+        self.api_key = api_key
+        self.state = UserAccountState(user_id)
+        self.refs = 0
+        self.listen_key: Optional[str] = None
+        self.connected = False
+        self.reconnects = 0
+        self.events = 0
+        self.listeners: List[OrderListener] = []
+        self.task: Optional[asyncio.Task] = None
+        self.keepalive_task: Optional[asyncio.Task] = None
+
+    async def _listen_key_request(self, method: str) -> dict:
+        client = http_pool.get("binance")
+        params = {"listenKey": self.listen_key} if method != "POST" and self.listen_key else None
+        response = await client.request(
+            method,
+            f"{settings.BASE_URL}{LISTEN_KEY_PATH}",
+            params=params,
+            headers={"X-MBX-APIKEY": self.api_key},
+            timeout=10.0
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _keepalive(self):
+        while True:
+            await asyncio.sleep(settings.USER_DATA_KEEPALIVE_INTERVAL)
+            try:
+                await self._listen_key_request("PUT")
+                logger.debug(f"🔑 Listen key kept alive for user {self.user_id}")
+            except Exception as e:
+                # The stream reports listenKeyExpired and reconnects with a new key
+                logger.warning(f"⚠️ Listen key keepalive failed for user {self.user_id}: {e}")
+
+    async def run(self):
+        attempt = 0
+        while self.manager.is_running:
+            try:
+                self.listen_key = (await self._listen_key_request("POST"))["listenKey"]
+                async with websockets.connect(
+                    f"{settings.WEBSOCKET_URL}/ws/{self.listen_key}",
+                    ping_interval=settings.WEBSOCKET_PING_INTERVAL,
+                    ping_timeout=settings.WEBSOCKET_PING_TIMEOUT,
+                    close_timeout=settings.WEBSOCKET_CLOSE_TIMEOUT
+                ) as websocket:
+                    # Anything before this point may have been missed
+                    self.state.reset()
+                    self.connected = True
+                    attempt = 0
+                    if self.keepalive_task is None or self.keepalive_task.done():
+                        self.keepalive_task = asyncio.create_task(self._keepalive())
+                    logger.info(f"✅ User data stream connected for user {self.user_id}")
+                    await self._read_loop(websocket)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ User data stream error for user {self.user_id}: {e}")
+            finally:
+                self.connected = False
+
+            if not self.manager.is_running:
+                break
+
+            wait_time = jittered_backoff(attempt, cap=settings.WEBSOCKET_RECONNECT_MAX_DELAY)
+            attempt += 1
+            self.reconnects += 1
+            logger.info(f"🔄 Reconnecting user data stream for user {self.user_id} in {wait_time:.1f}s...")
+            await asyncio.sleep(wait_time)
+
+    async def _read_loop(self, websocket):
+        async for raw in websocket:
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                continue
+
+            self.events += 1
+            self.state.last_event_time = time.time()
+            event_type = event.get("e")
+
+            if event_type == "ACCOUNT_UPDATE":
+                self.state.apply_account_update(event)
+                account_state.invalidate_user(self.user_id, "binance")
+            elif event_type == "ORDER_TRADE_UPDATE":
+                order = self.state.apply_order_update(event)
+                if event.get("o", {}).get("x") == "TRADE":
+                    account_state.invalidate_user(self.user_id, "binance")
+                for listener in list(self.listeners):
+                    try:
+                        await listener(order)
+                    except Exception as e:
+                        logger.error(f"❌ Order listener error for user {self.user_id}: {e}")
+            elif event_type == "listenKeyExpired":
+                logger.warning(f"⚠️ Listen key expired for user {self.user_id} - reconnecting")
+                return
+            elif event_type == "MARGIN_CALL":
+                logger.warning(f"⚠️ Margin call for user {self.user_id}: {event.get('p')}")
+
+    async def stop(self):
+        for task in (self.keepalive_task, self.task):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                except Exception as e:
+                    logger.error(f"❌ Error stopping user data stream for user {self.user_id}: {e}")
+        self.keepalive_task = None
+        self.task = None
+        self.connected = False
+
+        if self.listen_key:
+            try:
+                await self._listen_key_request("DELETE")
+            except Exception as e:
+                logger.debug(f"Listen key delete failed for user {self.user_id}: {e}")
+            self.listen_key = None
+
+
+class UserDataStreamManager:
+    """Per-user user-data streams, shared by every bot of the user"""
+
+    def __init__(self):
+        self.streams: Dict[str, _UserStream] = {}
+        self.is_running = True
+        self._lock = asyncio.Lock()
+
+    async def start(self, user_id: str, api_key: str):
+        """Open (or join) the user's stream"""
+        if not settings.USER_DATA_STREAM_ENABLED or not api_key:
+            return
+        async with self._lock:
+            self.is_running = True
+            stream = self.streams.get(user_id)
+            if stream is None or stream.api_key != api_key:
+                old, stream = stream, _UserStream(self, user_id, api_key)
+                if old is not None:
+                    await old.stop()
+                    # Bots still holding the old stream release this one on stop()
+                    stream.refs = old.refs
+                    stream.listeners = old.listeners
+                self.streams[user_id] = stream
+            stream.refs += 1
+            if stream.task is None or stream.task.done():
+                stream.task = asyncio.create_task(stream.run())
+
+    async def stop(self, user_id: str):
+        """Leave the user's stream; the last one out closes it"""
+        async with self._lock:
+            stream = self.streams.get(user_id)
+            if stream is None:
+                return
+            stream.refs -= 1
+            if stream.refs > 0:
+                return
+            del self.streams[user_id]
+            await stream.stop()
+            logger.info(f"🔌 User data stream closed for user {user_id}")
+
+    def get_state(self, user_id: str) -> Optional[UserAccountState]:
+        """The user's live account state; None unless the stream is connected"""
+        stream = self.streams.get(user_id)
+        if stream is None or not stream.connected:
+            return None
+        return stream.state
+
+    def add_order_listener(self, user_id: str, listener: OrderListener):
+        stream = self.streams.get(user_id)
+        if stream is not None and listener not in stream.listeners:
+            stream.listeners.append(listener)
+
+    def remove_order_listener(self, user_id: str, listener: OrderListener):
+        stream = self.streams.get(user_id)
+        if stream is not None and listener in stream.listeners:
+            stream.listeners.remove(listener)
+
+    def get_stats(self) -> dict:
+        """Stream statistics"""
+        return {
+            "streams": len(self.streams),
+            "connected": sum(1 for s in self.streams.values() if s.connected),
+            "events": sum(s.events for s in self.streams.values()),
+            "reconnects": sum(s.reconnects for s in self.streams.values())
+        }
+
+    async def close(self):
+        """Close every stream"""
+        async with self._lock:
+            self.is_running = False
+            for stream in self.streams.values():
+                await stream.stop()
+            self.streams.clear()
+            logger.info("✅ User data streams closed")
+
+
+# Singleton instance
+user_data_streams = UserDataStreamManager()
@@ -34,10 +34,74 @@ async def lifespan(app):
     except Exception as e:
         logger.warning(f"⚠️ EMA Monitor not available: {str(e)}")
     
+    # Cross-worker WebSocket fan-out (PUBSUB_URL)
+    try:
+        from backend.websocket_manager import connection_manager
+        await connection_manager.start_pubsub()
+        logger.info(f"✅ WebSocket pub/sub: {connection_manager.broker.get_stats()['backend']}")
+    except Exception as e:
+        logger.error(f"❌ WebSocket pub/sub start failed: {str(e)}")
+    
     logger.info("✅ Application startup complete!")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down EMA Navigator AI Trading API...")
+    
+    try:
+        from backend.websocket_manager import connection_manager
+        await connection_manager.close_pubsub()
+    except Exception as e:
+        logger.error(f"❌ WebSocket pub/sub shutdown failed: {str(e)}")
+    
+    # Close shared market data streams and pooled HTTP clients
+    try:
+        from backend.services.market_data_hub import market_data_hub
+        await market_data_hub.close()
+    except Exception as e:
+        logger.error(f"❌ Market data hub shutdown failed: {str(e)}")
+    
+    try:
+        from backend.services.arbitrage_scanner import arbitrage_scanner
+        await arbitrage_scanner.stop()
+    except Exception as e:
+        logger.error(f"❌ Arbitrage scanner shutdown failed: {str(e)}")
+    
+    try:
+        from backend.services.ticker_snapshot import ticker_snapshot
+        await ticker_snapshot.close()
+    except Exception as e:
+        logger.error(f"❌ Ticker snapshot shutdown failed: {str(e)}")
+    
+    try:
+        from backend.services.user_data_stream import user_data_streams
+        await user_data_streams.close()
+    except Exception as e:
+        logger.error(f"❌ User data stream shutdown failed: {str(e)}")
+    
+    try:
+        from backend.services.binance_client_pool import binance_client_pool
+        await binance_client_pool.close()
+    except Exception as e:
+        logger.error(f"❌ Binance client pool shutdown failed: {str(e)}")
+    
+    try:
+        from backend.services.http_pool import http_pool
+        await http_pool.close()
+    except Exception as e:
+        logger.error(f"❌ HTTP client pool shutdown failed: {str(e)}")
+    
+    try:
+        from backend.firebase_batcher import firebase_batcher
+        await firebase_batcher.close()
+    except Exception as e:
+        logger.error(f"❌ Firebase batch flush on shutdown failed: {str(e)}")
+    
+    try:
+        from backend.firebase_repository import firebase_repository
+        firebase_repository.close()
+    except Exception as e:
+        logger.error(f"❌ Firebase repository shutdown failed: {str(e)}")
+    
     logger.info("✅ Application shutdown complete!")
@@ -1,16 +1,148 @@
 """
 WebSocket Manager for Broadcasting Trading Signals
 Handles 1000+ concurrent connections efficiently
+
+- Every connection has a bounded outbound queue and its own writer task
+- Broadcasts only enqueue (no socket awaits), so one slow client never
+  delays the others
+- Slow clients lose their oldest queued messages; clients that stay behind
+  (or whose sends time out) are disconnected
+- Each broadcast is serialized once (orjson when installed) and the same
+  text frame is queued for every recipient
+- Messages are routed through a topic index; clients subscribe to the topics
+  they care about (see TOPIC_PREFIXES)
+
+Client protocol (JSON text frames, plus the plain "ping"):
+  {"action": "subscribe", "topics": ["signals:binance:BTCUSDT"]}
+  {"action": "unsubscribe", "topics": ["signals:binance:BTCUSDT"]}
+  {"action": "auth", "token": "<JWT or Firebase ID token>"}  -> joins user:<id>
+New connections receive DEFAULT_TOPICS until their first subscribe.
+
+Published messages also go to the pub/sub broker (backend/pubsub.py), so
+clients connected to other workers/instances receive them too.
 """
 import asyncio
 import logging
-from typing import Set, Dict, Any
+from typing import Awaitable, Callable, Iterable, List, Set, Dict, Any, Optional, Union
 from fastapi import WebSocket, WebSocketDisconnect
 import json
 from datetime import datetime
 
+from backend.config import settings
+from backend.pubsub import InProcessBroker, create_broker
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+Message = Union[Dict[str, Any], str]
+# authenticate(token) -> user dict ({"user_id": ...}); raises on invalid tokens
+Authenticator = Callable[[str], Awaitable[Dict[str, Any]]]
+
+# signals[:exchange[:symbol[:interval]]], arbitrage[:symbol], status, user:<user_id>
+# prefix -> max number of ":"-separated parts
+TOPIC_PREFIXES = {"signals": 4, "arbitrage": 2, "status": 1, "user": 2}
+# Legacy firehose for clients that never subscribe
+DEFAULT_TOPICS = ("signals", "arbitrage", "status")
+
+
+def signal_topics(signal: Dict[str, Any]) -> List[str]:
+    """Every topic level a signal is published on"""
+    topics = ["signals"]
+    exchange = str(signal.get("exchange") or "").lower()
+    symbol = str(signal.get("symbol") or "").upper()
+    if exchange:
+        topics.append(f"signals:{exchange}")
+        if symbol:
+            topics.append(f"signals:{exchange}:{symbol}")
+            if signal.get("interval"):
+                topics.append(f"signals:{exchange}:{symbol}:{signal['interval']}")
+    return topics
+
+
+def normalize_topic(topic: str) -> Optional[str]:
+    """Canonical topic name, or None when the topic is not valid"""
+    parts = str(topic).strip().split(":")
+    if parts[0] not in TOPIC_PREFIXES or len(parts) > TOPIC_PREFIXES[parts[0]] or not all(parts):
+        return None
+    if parts[0] == "user":
+        return None if len(parts) == 1 else ":".join(parts)
+
+    if parts[0] == "signals" and len(parts) > 1:
+        parts[1] = parts[1].lower()
+    symbol_index = 2 if parts[0] == "signals" else 1
+    if len(parts) > symbol_index:
+        parts[symbol_index] = parts[symbol_index].upper().replace("/", "")
+    return ":".join(parts)
+
+
+def serialize_message(message: Dict[str, Any]) -> str:
+    """Encode a message to a JSON text frame"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(message, default=str).decode()
+    return json.dumps(message, separators=(",", ":"), default=str)
+
+
+class ClientConnection:
+    """One WebSocket client: outbound queue + writer task"""
+
+    def __init__(self, websocket: WebSocket, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.manager = manager
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.WEBSOCKET_CLIENT_QUEUE_SIZE)
+        self.dropped = 0
+        self.consecutive_drops = 0
+        self.writer_task: Optional[asyncio.Task] = None
+        self.topics: Set[str] = set()
+        self.user_id: Optional[str] = None
+        self.using_defaults = True
+
+    def start(self):
+        self.writer_task = asyncio.create_task(self._writer())
+
+    def enqueue(self, message: str) -> bool:
+        """Queue a serialized message without waiting. Returns False if the client was dropped."""
+        if self.queue.full():
+            # Degrade: drop the oldest message, keep the newest
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            self.dropped += 1
+            self.consecutive_drops += 1
+            if self.consecutive_drops >= settings.WEBSOCKET_MAX_DROPPED_MESSAGES:
+                logger.warning(f"🐢 Dropping slow WebSocket client ({self.dropped} messages lost)")
+                self.manager.disconnect(self.websocket, reason="Client too slow")
+                return False
+
+        self.queue.put_nowait(message)
+        return True
+
+    async def _writer(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                await asyncio.wait_for(self.websocket.send_text(message), timeout=settings.WEBSOCKET_SEND_TIMEOUT)
+                self.consecutive_drops = 0
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning("🐢 WebSocket send timed out - dropping client")
+            self.manager.disconnect(self.websocket, reason="Send timeout")
+        except WebSocketDisconnect:
+            self.manager.disconnect(self.websocket)
+        except Exception as e:
+            logger.error(f"Error sending to WebSocket client: {e}")
+            self.manager.disconnect(self.websocket)
+
+    def close(self):
+        if self.writer_task and not self.writer_task.done():
+            self.writer_task.cancel()
+
 
 class ConnectionManager:
     """Manages WebSocket connections and broadcasts signals to all connected clients"""
@@ -18,18 +150,28 @@ class ConnectionManager:
     def __init__(self):
         # Active WebSocket connections
         self.active_connections: Set[WebSocket] = set()
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        # topic -> subscribed clients
+        self.topics: Dict[str, Set[ClientConnection]] = {}
+        # Cross-process fan-out (replaced in start_pubsub)
+        self.broker = InProcessBroker()
 
         # Statistics
         self.total_connections = 0
         self.total_broadcasts = 0
+        self.slow_client_disconnects = 0
 
         logger.info("🚀 WebSocket ConnectionManager initialized")
 
     async def connect(self, websocket: WebSocket) -> None:
         """Accept new WebSocket connection"""
         await websocket.accept()
+        client = ClientConnection(websocket, self)
+        self.clients[websocket] = client
         self.active_connections.add(websocket)
         self.total_connections += 1
+        self._subscribe(client, DEFAULT_TOPICS)
+        client.start()
 
         logger.info(f"✅ New WebSocket connection. Active: {len(self.active_connections)}, Total: {self.total_connections}")
 
@@ -41,28 +183,170 @@ class ConnectionManager:
             "timestamp": datetime.utcnow().isoformat()
         }, websocket)
 
-    def disconnect(self, websocket: WebSocket) -> None:
-        """Remove WebSocket connection"""
+    def disconnect(self, websocket: WebSocket, reason: Optional[str] = None) -> None:
+        """Remove WebSocket connection (reason: server-side drop of a slow client)"""
+        client = self.clients.pop(websocket, None)
         self.active_connections.discard(websocket)
+        if client is None:
+            return
+
+        self._unsubscribe(client, list(client.topics))
+        client.close()
+        if reason:
+            self.slow_client_disconnects += 1
+            # Close the socket so the endpoint's receive loop ends too
+            asyncio.create_task(self._close_socket(websocket, 1013, reason))
         logger.info(f"❌ WebSocket disconnected. Active: {len(self.active_connections)}")
 
-    async def send_personal_message(self, message: Dict[str, Any], websocket: WebSocket) -> None:
-        """Send message to specific client"""
+    async def _close_socket(self, websocket: WebSocket, code: int, reason: str):
+        try:
+            await websocket.close(code=code, reason=reason)
+        except Exception:
+            pass
+
+    async def send_personal_message(self, message: Message, websocket: WebSocket) -> None:
+        """Send message to specific client (queued)"""
+        client = self.clients.get(websocket)
+        if client:
+            client.enqueue(message if isinstance(message, str) else serialize_message(message))
+
+    def _subscribe(self, client: ClientConnection, topics: Iterable[str]):
+        for topic in topics:
+            client.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(client)
+
+    def _unsubscribe(self, client: ClientConnection, topics: Iterable[str]):
+        for topic in topics:
+            client.topics.discard(topic)
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.topics[topic]
+
+    async def handle_client_message(self, websocket: WebSocket, raw: str,
+                                    authenticate: Optional[Authenticator] = None) -> None:
+        """Handle one inbound frame: ping, subscribe, unsubscribe or auth"""
+        client = self.clients.get(websocket)
+        if client is None:
+            return
+
+        if raw == "ping":
+            client.enqueue("pong")
+            return
+
         try:
-            await websocket.send_json(message)
+            request = json.loads(raw)
+            action = request.get("action")
+        except (ValueError, AttributeError):
+            await self.send_personal_message({"type": "error", "message": "Invalid message"}, websocket)
+            return
+
+        if action == "auth":
+            await self._authenticate(client, request.get("token"), authenticate)
+            return
+
+        if action not in ("subscribe", "unsubscribe"):
+            await self.send_personal_message({"type": "error", "message": f"Unknown action: {action}"}, websocket)
+            return
+
+        topics, rejected = [], []
+        for topic in request.get("topics") or []:
+            name = normalize_topic(topic)
+            # Private user channels only for the authenticated owner
+            if name is None or (name.startswith("user:") and name != f"user:{client.user_id}"):
+                rejected.append(topic)
+            else:
+                topics.append(name)
+
+        if action == "subscribe":
+            if client.using_defaults:
+                # First explicit subscribe replaces the default firehose
+                self._unsubscribe(client, DEFAULT_TOPICS)
+                client.using_defaults = False
+            room = max(0, settings.WEBSOCKET_MAX_TOPICS_PER_CLIENT - len(client.topics))
+            new_topics = [t for t in topics if t not in client.topics]
+            rejected += new_topics[room:]
+            self._subscribe(client, new_topics[:room])
+        else:
+            self._unsubscribe(client, topics)
+
+        await self.send_personal_message({
+            "type": "subscriptions",
+            "topics": sorted(client.topics),
+            "rejected": rejected
+        }, websocket)
+
+    async def _authenticate(self, client: ClientConnection, token: Optional[str],
+                            authenticate: Optional[Authenticator]):
+        user = None
+        if token and authenticate:
+            try:
+                user = await authenticate(token)
+            except Exception:
+                user = None
+
+        user_id = (user or {}).get("user_id") or (user or {}).get("uid")
+        if not user_id:
+            await self.send_personal_message({"type": "error", "message": "Authentication failed"}, client.websocket)
+            return
+
+        if client.user_id and client.user_id != user_id:
+            self._unsubscribe(client, [f"user:{client.user_id}"])
+        client.user_id = user_id
+        self._subscribe(client, [f"user:{user_id}"])
+        await self.send_personal_message({"type": "authenticated", "user_id": user_id}, client.websocket)
+
+    async def start_pubsub(self, url: Optional[str] = None) -> None:
+        """Connect the cross-process broker (settings.PUBSUB_URL)"""
+        broker = create_broker(url)
+        try:
+            await broker.start(self._on_remote_message)
         except Exception as e:
-            logger.error(f"Error sending personal message: {e}")
-            self.disconnect(websocket)
+            logger.warning(f"⚠️ Pub/sub broker unavailable ({e}) - using in-process broker")
+            broker = InProcessBroker()
+        self.broker = broker
+
+    async def close_pubsub(self) -> None:
+        await self.broker.close()
+        self.broker = InProcessBroker()
+
+    async def _on_remote_message(self, topics: List[str], payload: str) -> None:
+        self._deliver(topics, payload)
+
+    def publish(self, topics: Iterable[str], message: Dict[str, Any]) -> int:
+        """
+        Serialize once, enqueue for every local client subscribed to any of the
+        topics (each client gets the message once) and forward to the other
+        processes. Returns the number of local recipients.
+        """
+        topics = list(topics)
+        payload = serialize_message(message)
+        self.broker.publish(topics, payload)
+        return self._deliver(topics, payload)
+
+    def _deliver(self, topics: List[str], payload: str) -> int:
+        recipients: Set[ClientConnection] = set()
+        for topic in topics:
+            recipients |= self.topics.get(topic, set())
+        if not recipients:
+            return 0
+
+        sent = 0
+        for client in recipients:
+            if client.enqueue(payload):
+                sent += 1
+        return sent
+
+    async def send_to_user(self, user_id: str, message: Dict[str, Any]) -> int:
+        """Private message to every connection of a user (user:<user_id> topic)"""
+        return self.publish([f"user:{user_id}"], message)
 
     async def broadcast_signal(self, signal: Dict[str, Any]) -> None:
         """
         Broadcast trading signal to ALL connected clients
         This is the core function for scalability
         """
-        if not self.active_connections:
-            logger.debug("No active connections to broadcast to")
-            return
-
         self.total_broadcasts += 1
 
         # Add metadata
@@ -73,47 +357,37 @@ class ConnectionManager:
             "broadcast_id": self.total_broadcasts
         }
 
-        logger.info(f"📡 Broadcasting signal to {len(self.active_connections)} clients: {signal.get('signal')} {signal.get('symbol')} @ {signal.get('exchange')}")
-
-        # Broadcast to all connections concurrently
-        disconnected = set()
-
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(broadcast_message)
-            except WebSocketDisconnect:
-                disconnected.add(connection)
-            except Exception as e:
-                logger.error(f"Error broadcasting to client: {e}")
-                disconnected.add(connection)
-
-        # Clean up disconnected clients
-        for connection in disconnected:
-            self.disconnect(connection)
-
-        logger.info(f"✅ Broadcast completed. Sent to {len(self.active_connections)} clients")
+        sent = self.publish(signal_topics(signal), broadcast_message)
+        logger.info(f"📡 Broadcast signal queued for {sent} clients: {signal.get('signal')} {signal.get('symbol')} @ {signal.get('exchange')}")
 
     async def broadcast_status(self, status: Dict[str, Any]) -> None:
         """Broadcast system status updates"""
-        message = {
+        self.publish(["status"], {
             "type": "status",
             "data": status,
             "timestamp": datetime.utcnow().isoformat()
-        }
+        })
 
-        for connection in self.active_connections.copy():
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting status: {e}")
-                self.disconnect(connection)
+    async def broadcast_arbitrage(self, opportunity: Dict[str, Any]) -> None:
+        """Broadcast a cross-exchange arbitrage opportunity"""
+        symbol = str(opportunity.get("symbol", "")).upper()
+        self.publish(["arbitrage", f"arbitrage:{symbol}"], {
+            "type": "arbitrage",
+            "data": opportunity,
+            "timestamp": datetime.utcnow().isoformat()
+        })
 
     def get_stats(self) -> Dict[str, Any]:
         """Get connection statistics"""
         return {
             "active_connections": len(self.active_connections),
             "total_connections": self.total_connections,
-            "total_broadcasts": self.total_broadcasts
+            "total_broadcasts": self.total_broadcasts,
+            "topics": len(self.topics),
+            "queued_messages": sum(c.queue.qsize() for c in self.clients.values()),
+            "dropped_messages": sum(c.dropped for c in self.clients.values()),
+            "slow_client_disconnects": self.slow_client_disconnects,
+            "pubsub": self.broker.get_stats()
         }
 
 
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Ledger Migration Script
+Moves records from the global `trades` and `signals` nodes into the per-user,
+per-month ledger: ledgers/{uid}/{trades|signals}/{YYYY-MM}/{record_id}
+
+Record IDs are kept, so the script can be re-run safely. Per-user subtrees
+under `trades` (trades/{uid}/..., written by the trade manager) are left alone.
+
+Usage: python scripts/migrate_ledger.py [--apply] [--delete-legacy] [--kind trades|signals] [--batch-size N]
+Without --apply it only reports what would be moved.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_admin import db
+
+from backend.firebase_admin import firebase_initialized
+from backend.ledger import LEDGER_KINDS, ledger_path, push_id_timestamp
+
+
+def record_time(record_id: str, record: Dict) -> Optional[float]:
+    """Creation time from the push ID, else the record's own timestamp fields"""
+    timestamp = push_id_timestamp(record_id)
+    if timestamp is not None:
+        return timestamp
+
+    for field in ("timestamp", "created_at"):
+        value = record.get(field)
+        if isinstance(value, (int, float)) and value > 0:
+            return value / 1000 if value > 1e12 else value
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+            except ValueError:
+                pass
+    return None
+
+
+def migrate_kind(kind: str, apply: bool, delete_legacy: bool, batch_size: int) -> Dict[str, int]:
+    counts = {"moved": 0, "skipped_per_user": 0, "skipped_no_user": 0, "skipped_no_time": 0}
+    last_key = None
+
+    while True:
+        query = db.reference(kind).order_by_key()
+        if last_key is not None:
+            query = query.start_at(last_key)
+        page = query.limit_to_first(batch_size + 1).get() or {}
+        keys = [k for k in sorted(page) if k != last_key]
+        if not keys:
+            break
+
+        updates = {}
+        for record_id in keys:
+            record = page[record_id]
+            if not isinstance(record, dict):
+                continue
+            user_id = record.get("user_id")
+            if not user_id:
+                if all(isinstance(v, dict) for v in record.values()):
+                    counts["skipped_per_user"] += 1
+                else:
+                    counts["skipped_no_user"] += 1
+                continue
+
+            timestamp = record_time(record_id, record)
+            if timestamp is None:
+                counts["skipped_no_time"] += 1
+                continue
+
+            updates[f"{ledger_path(user_id, kind, timestamp)}/{record_id}"] = record
+            if delete_legacy:
+                updates[f"{kind}/{record_id}"] = None
+            counts["moved"] += 1
+
+        if apply and updates:
+            # One multi-path update per page: ledger copy and legacy delete land together
+            db.reference().update(updates)
+
+        print(f"  {kind}: {counts['moved']} records {'moved' if apply else 'to move'} (last key {keys[-1]})")
+        last_key = keys[-1]
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move global trades/signals into per-user ledgers")
+    parser.add_argument("--apply", action="store_true", help="write changes (default: dry run)")
+    parser.add_argument("--delete-legacy", action="store_true", help="remove migrated records from the global node")
+    parser.add_argument("--kind", choices=LEDGER_KINDS, help="only migrate this node")
+    parser.add_argument("--batch-size", type=int, default=500, help="records per page / multi-path update")
+    args = parser.parse_args()
+
+    if not firebase_initialized:
+        print("Firebase not initialized - set FIREBASE_CREDENTIALS_JSON and FIREBASE_DATABASE_URL")
+        sys.exit(1)
+
+    print(f"Ledger migration ({'APPLY' if args.apply else 'DRY RUN'}"
+          f"{', deleting legacy records' if args.apply and args.delete_legacy else ''})")
+
+    for kind in ([args.kind] if args.kind else LEDGER_KINDS):
+        counts = migrate_kind(kind, args.apply, args.delete_legacy, args.batch_size)
+        print(f"{kind}: " + ", ".join(f"{name}={value}" for name, value in counts.items()))
+
+    if not args.apply:
+        print("Dry run only - re-run with --apply to write")
+
+
+if __name__ == "__main__":
+    main()